@@ -0,0 +1,217 @@
+"""Async wrappers around the storage module.
+
+Storage calls do blocking SQLite I/O, so running them directly inside
+async handlers stalls every other request (and SSE stream) on the event
+loop. These wrappers run each call on a dedicated thread pool, and writes
+to the same conversation are serialized so they apply in call order.
+"""
+
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from . import storage
+from .config import STORAGE_THREADS
+
+# Re-exported so modules that import this one as `storage` can catch it
+ConflictError = storage.ConflictError
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Per-conversation write locks; entries disappear once no writer holds them
+_write_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _get_write_lock(conversation_id: str) -> asyncio.Lock:
+    """Get the write lock for a conversation."""
+    lock = _write_locks.get(conversation_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _write_locks[conversation_id] = lock
+    return lock
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the storage thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=STORAGE_THREADS, thread_name_prefix="storage")
+    return _executor
+
+
+async def _run(func, *args, **kwargs):
+    """Run a blocking storage function on the storage thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(func, *args, **kwargs))
+
+
+async def _write(conversation_id: str, func, *args, **kwargs):
+    """Run a storage write, serialized per conversation."""
+    async with _get_write_lock(conversation_id):
+        return await _run(func, *args, **kwargs)
+
+
+async def create_conversation(conversation_id: str) -> Dict[str, Any]:
+    """Create a new conversation."""
+    return await _write(conversation_id, storage.create_conversation, conversation_id)
+
+
+async def get_conversation(conversation_id: str, stage2_text: bool = False) -> Optional[Dict[str, Any]]:
+    """Load a conversation from storage."""
+    return await _run(storage.get_conversation, conversation_id, stage2_text)
+
+
+async def get_stage2(conversation_id: str, seq: int) -> Optional[List[Dict[str, Any]]]:
+    """Load one message's Stage 2 results with their evaluation texts."""
+    return await _run(storage.get_stage2, conversation_id, seq)
+
+
+async def get_conversation_metadata(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """Load a conversation's metadata without its messages."""
+    return await _run(storage.get_conversation_metadata, conversation_id)
+
+
+async def list_conversations(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """List conversations newest first (metadata only)."""
+    return await _run(storage.list_conversations, limit=limit, cursor=cursor)
+
+
+async def save_conversation(conversation: Dict[str, Any], expected_version: Optional[int] = None) -> int:
+    """Save a conversation, optionally only if still at `expected_version`."""
+    return await _write(conversation["id"], storage.save_conversation, conversation, expected_version)
+
+
+async def add_user_message(conversation_id: str, content: str, expected_count: Optional[int] = None):
+    """Add a user message to a conversation."""
+    await _write(conversation_id, storage.add_user_message, conversation_id, content, expected_count)
+
+
+async def add_assistant_message(
+    conversation_id: str,
+    stage1: List[Dict[str, Any]],
+    stage2: List[Dict[str, Any]],
+    stage3: Dict[str, Any],
+    timings: Optional[Dict[str, Any]] = None,
+    usage: Optional[Dict[str, Any]] = None,
+    expected_count: Optional[int] = None
+):
+    """Add an assistant message with all 3 stages to a conversation."""
+    await _write(
+        conversation_id,
+        storage.add_assistant_message,
+        conversation_id,
+        stage1,
+        stage2,
+        stage3,
+        timings,
+        usage,
+        expected_count
+    )
+
+
+async def update_conversation_title(conversation_id: str, title: str):
+    """Update the title of a conversation."""
+    await _write(conversation_id, storage.update_conversation_title, conversation_id, title)
+
+
+async def get_messages(conversation_id: str, start: int = 0) -> List[Dict[str, Any]]:
+    """Load a conversation's messages from index `start` onwards."""
+    return await _run(lambda: list(storage.iter_messages(conversation_id, start)))
+
+
+async def get_context_state(conversation_id: str) -> Dict[str, Any]:
+    """Load a conversation's running history summary."""
+    return await _run(storage.get_context_state, conversation_id)
+
+
+async def save_context_state(conversation_id: str, summary: str, summarized_upto: int):
+    """Store a conversation's running history summary."""
+    await _write(
+        conversation_id,
+        storage.save_context_state,
+        conversation_id,
+        summary,
+        summarized_upto
+    )
+
+
+async def get_aggregate(name: str) -> Optional[Dict[str, Any]]:
+    """Load a materialized aggregate."""
+    return await _run(storage.get_aggregate, name)
+
+
+async def update_aggregate(
+    name: str,
+    apply: Callable[[Optional[Dict[str, Any]], str, int, Dict[str, Any]], Dict[str, Any]],
+    batch_size: int = 200
+) -> int:
+    """Feed messages an aggregate has not seen yet into it."""
+    return await _run(storage.update_aggregate, name, apply, batch_size)
+
+
+async def enqueue_job(job_id: str, conversation_id: str, request: Dict[str, Any]):
+    """Add a council job to the queue."""
+    await _write(conversation_id, storage.enqueue_job, job_id, conversation_id, request)
+
+
+async def claim_job(worker: str, lease_seconds: float, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Take the oldest claimable job off the queue."""
+    return await _run(storage.claim_job, worker, lease_seconds, job_id)
+
+
+async def save_job_checkpoint(job_id: str, worker: str, checkpoint: Dict[str, Any], lease_seconds: float):
+    """Store a running job's checkpoint and extend its lease."""
+    await _run(storage.save_job_checkpoint, job_id, worker, checkpoint, lease_seconds)
+
+
+async def renew_job_leases(worker: str, job_ids: List[str], lease_seconds: float) -> List[str]:
+    """Extend the leases of a worker's running jobs."""
+    return await _run(storage.renew_job_leases, worker, job_ids, lease_seconds)
+
+
+async def release_job(job_id: str, worker: str, checkpoint: Dict[str, Any]):
+    """Put a running job back on the queue for any worker to resume."""
+    await _run(storage.release_job, job_id, worker, checkpoint)
+
+
+async def finish_job(job_id: str, worker: str, status: str):
+    """Mark a job finished and drop its checkpoint."""
+    await _run(storage.finish_job, job_id, worker, status)
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Load a job's status."""
+    return await _run(storage.get_job, job_id)
+
+
+async def add_job_event(job_id: str, event_id: int, event: Dict[str, Any]):
+    """Store one event published by a job."""
+    await _run(storage.add_job_event, job_id, event_id, event)
+
+
+async def get_job_events(job_id: str, after: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+    """Load a job's stored events after event ID `after`."""
+    return await _run(storage.get_job_events, job_id, after)
+
+
+async def purge_finished_jobs(finished_before: float) -> int:
+    """Delete jobs (and their events) that finished before a time."""
+    return await _run(storage.purge_finished_jobs, finished_before)
+
+
+def encode_cursor(created_at: str, conversation_id: str) -> str:
+    """Encode a listing position as an opaque pagination cursor."""
+    return storage.encode_cursor(created_at, conversation_id)
+
+
+def shutdown():
+    """Wait for pending storage work and stop the thread pool."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
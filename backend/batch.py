@@ -0,0 +1,227 @@
+"""Batch council runs for offline evaluation.
+
+Prompts come in as JSONL, one object per line:
+
+    {"id": "q1", "prompt": "...", "council_models": [...], "chairman_model": "..."}
+
+Only "prompt" is required; "id" defaults to the line number. Each prompt
+goes through run_full_council directly (no conversation is created), at
+most `concurrency` at a time; per-provider limits still come from the
+provider schedulers (PROVIDER_LIMITS). Results are appended to a JSONL
+file as they finish, which doubles as the checkpoint: re-running with
+the same output skips prompts that already have a successful result.
+
+With --provider-batch, queries to OpenAI and Anthropic go through their
+discounted batch APIs (results can take hours), and all prompts are run
+together so each council stage becomes one batch per provider.
+
+Usage:
+    uv run python -m backend.batch prompts.jsonl results.jsonl [--concurrency 8] [--provider-batch]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Iterable, Iterator, AsyncIterator, Dict, Any, Optional, Set, List
+from .council import run_full_council
+from .providers import use_provider_batches, close_providers
+from .providers.batching import BatchCollector
+from .config import (
+    BATCH_CONCURRENCY,
+    PROVIDER_BATCH_WINDOW,
+    PROVIDER_BATCH_POLL_INTERVAL,
+    PROVIDER_BATCH_MAX_PROMPTS,
+    STAGE1_QUORUM,
+    STAGE1_GRACE_PERIOD,
+)
+
+
+def read_items(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Parse JSONL prompt lines.
+
+    Blank lines are skipped. Malformed lines are yielded with an 'error'
+    so they show up in the results instead of stopping the run.
+
+    Yields:
+        Item dicts with at least 'id' and either 'prompt' or 'error'
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict) or not isinstance(item.get("prompt"), str):
+                raise ValueError("expected an object with a string 'prompt'")
+        except ValueError as e:
+            yield {"id": str(number), "error": f"Invalid input line {number}: {e}"}
+            continue
+        item["id"] = str(item.get("id", number))
+        yield item
+
+
+def load_completed(path: str) -> Set[str]:
+    """IDs with a successful result in an existing results file."""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # Partial last line from an interrupted run
+                continue
+            if "error" not in result:
+                completed.add(result["id"])
+    return completed
+
+
+async def run_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one prompt through the council and build its result record."""
+    if "error" in item:
+        return {"id": item["id"], "error": item["error"]}
+
+    start = time.monotonic()
+    try:
+        stage1, stage2, stage3, metadata = await run_full_council(
+            item["prompt"],
+            item.get("council_models"),
+            item.get("chairman_model")
+        )
+    except Exception as e:
+        return {"id": item["id"], "error": str(e)}
+
+    result = {
+        "id": item["id"],
+        "prompt": item["prompt"],
+        "stage1": stage1,
+        "stage2": stage2,
+        "stage3": stage3,
+        "metadata": metadata,
+        "elapsed": round(time.monotonic() - start, 3),
+    }
+    if stage3.get("model") == "error":
+        # Recorded for inspection, but retried on resume
+        result["error"] = stage3.get("response")
+    return result
+
+
+async def run_batch(
+    items: Iterable[Dict[str, Any]],
+    concurrency: int = BATCH_CONCURRENCY,
+    skip_ids: Optional[Set[str]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run items through the council, yielding results as they finish.
+
+    Items are pulled lazily, so memory stays bounded by `concurrency`.
+    Closing the generator cancels the remaining work.
+
+    Args:
+        items: Items from read_items
+        concurrency: Maximum prompts in flight
+        skip_ids: IDs to skip (already completed)
+
+    Yields:
+        Result records, in completion order
+    """
+    skip_ids = skip_ids or set()
+    pending = (item for item in items if item["id"] not in skip_ids)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        for item in pending:
+            await results.put(await run_item(item))
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    finished = asyncio.ensure_future(asyncio.gather(*workers))
+
+    try:
+        while True:
+            getter = asyncio.ensure_future(results.get())
+            done, _ = await asyncio.wait({getter, finished}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                yield getter.result()
+                continue
+            getter.cancel()
+            while not results.empty():
+                yield results.get_nowait()
+            finished.result()
+            return
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+def _append_line(path: str, record: Dict[str, Any]):
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+async def run_batch_to_file(
+    items: Iterable[Dict[str, Any]],
+    output_path: str,
+    concurrency: int = BATCH_CONCURRENCY
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a batch, appending each result to `output_path` before yielding it.
+
+    Items that already have a successful result in the file are skipped,
+    so an interrupted run resumes where it stopped.
+    """
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    completed = await asyncio.to_thread(load_completed, output_path)
+    if completed:
+        print(f"Resuming batch: {len(completed)} prompts already done")
+
+    async for result in run_batch(items, concurrency, completed):
+        await asyncio.to_thread(_append_line, output_path, result)
+        yield result
+
+
+async def _main(args: argparse.Namespace):
+    concurrency = args.concurrency
+    if args.provider_batch:
+        use_provider_batches(BatchCollector(PROVIDER_BATCH_WINDOW, PROVIDER_BATCH_POLL_INTERVAL))
+        concurrency = concurrency or PROVIDER_BATCH_MAX_PROMPTS
+        if STAGE1_QUORUM or STAGE1_GRACE_PERIOD:
+            print("Warning: STAGE1_QUORUM/STAGE1_GRACE_PERIOD may drop answers from slower provider batches")
+
+    done = failed = 0
+    start = time.monotonic()
+    try:
+        with open(args.input, 'r') as f:
+            async for result in run_batch_to_file(read_items(f), args.output, concurrency or BATCH_CONCURRENCY):
+                done += 1
+                failed += "error" in result
+                if not args.quiet:
+                    status = "error" if "error" in result else f"{result['elapsed']:.1f}s"
+                    print(f"[{done}] {result['id']}: {status}")
+    finally:
+        use_provider_batches(None)
+        await close_providers()
+
+    print(f"Finished {done} prompts ({failed} failed) in {time.monotonic() - start:.1f}s")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through the council")
+    parser.add_argument("input", help="JSONL file of prompts")
+    parser.add_argument("output", help="JSONL results file (also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"prompts in flight (default {BATCH_CONCURRENCY})")
+    parser.add_argument("--provider-batch", action="store_true",
+                        help="use discounted OpenAI/Anthropic batch APIs (slow, cheap)")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
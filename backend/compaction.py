@@ -0,0 +1,152 @@
+"""Prompt compaction for the peer review and synthesis stages.
+
+Stage 2 pastes every Stage 1 answer into each reviewer's prompt, and
+Stage 3 pastes all of Stage 1 and Stage 2 into the chairman's prompt, so
+input tokens grow with N² × answer length. Compaction fits those texts
+into a per-stage token budget, either by truncating the longest texts
+(keeping head and tail) or by summarizing them with a cheap model.
+"""
+
+import asyncio
+from typing import List, Optional
+from .providers import query_model
+from .config import COMPACTION_STRATEGY, COMPACTION_SUMMARIZER_MODEL
+
+# Share of a truncated text kept from its start; the rest comes from the
+# end, where conclusions and FINAL RANKING sections live
+HEAD_FRACTION = 0.7
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def allocate_budget(lengths: List[int], budget: int) -> List[int]:
+    """
+    Split a token budget across texts, water-filling style.
+
+    Texts shorter than their fair share keep their full length and the
+    leftover is shared among the longer ones.
+
+    Args:
+        lengths: Token count of each text
+        budget: Total tokens available
+
+    Returns:
+        Token allowance per text, in input order
+    """
+    allowances = [0] * len(lengths)
+    remaining = budget
+    pending = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    while pending:
+        share = remaining // len(pending)
+        index = pending[0]
+        if lengths[index] <= share:
+            allowances[index] = lengths[index]
+            remaining -= lengths[index]
+            pending.pop(0)
+        else:
+            for i in pending:
+                allowances[i] = share
+            break
+
+    return allowances
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Shorten text to roughly `max_tokens`, keeping its head and tail.
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token allowance
+
+    Returns:
+        The text itself if it fits, otherwise head + marker + tail
+    """
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+
+    max_chars = max_tokens * 4
+    head_chars = int(max_chars * HEAD_FRACTION)
+    tail_chars = max_chars - head_chars
+    omitted = tokens - max_tokens
+
+    head = text[:head_chars].rstrip()
+    tail = text[-tail_chars:].lstrip() if tail_chars > 0 else ""
+    return f"{head}\n\n[... {omitted} tokens omitted ...]\n\n{tail}"
+
+
+async def summarize_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Summarize text to roughly `max_tokens` with a cheap model.
+
+    Falls back to truncation if the summarizer fails or overshoots.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    max_words = max(20, int(max_tokens * 0.75))
+    prompt = f"""Condense the following answer to at most {max_words} words.
+Keep every distinct claim, figure and conclusion; drop repetition and filler.
+Do not add commentary or mention that this is a summary.
+
+Answer:
+{text}"""
+
+    response = await query_model(model, [{"role": "user", "content": prompt}], timeout=60.0)
+    summary = (response or {}).get('content') or ''
+
+    if not summary or count_tokens(summary) > max_tokens * 1.2:
+        return truncate_to_tokens(summary or text, max_tokens)
+
+    return summary
+
+
+async def compact_texts(
+    texts: List[str],
+    budget: Optional[int],
+    stage: str,
+    strategy: Optional[str] = None
+) -> List[str]:
+    """
+    Fit a list of texts into a shared token budget.
+
+    Args:
+        texts: Texts to paste into one prompt
+        budget: Total token budget (None or 0 = no compaction)
+        stage: Stage label used in the savings log line
+        strategy: "truncate" or "summarize" (defaults to COMPACTION_STRATEGY)
+
+    Returns:
+        Compacted texts in input order
+    """
+    if not budget:
+        return texts
+
+    lengths = [count_tokens(text) for text in texts]
+    before = sum(lengths)
+    if before <= budget:
+        return texts
+
+    strategy = strategy or COMPACTION_STRATEGY
+    allowances = allocate_budget(lengths, budget)
+
+    if strategy == "summarize":
+        compacted = await asyncio.gather(*[
+            summarize_to_tokens(text, allowance, COMPACTION_SUMMARIZER_MODEL)
+            for text, allowance in zip(texts, allowances)
+        ])
+    else:
+        compacted = [
+            truncate_to_tokens(text, allowance)
+            for text, allowance in zip(texts, allowances)
+        ]
+
+    after = sum(count_tokens(text) for text in compacted)
+    print(f"{stage} compaction ({strategy}): {before} -> {after} tokens, saved {before - after}")
+
+    return list(compacted)
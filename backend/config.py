@@ -1,6 +1,7 @@
 """Configuration for the LLM Council."""
 
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,7 +18,7 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 # OpenRouter API key (fallback)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
-# LLM Mode: "direct" or "openrouter"
+# LLM Mode: "direct", "openrouter" or "mock" (local fake provider, no keys)
 LLM_MODE = os.getenv("LLM_MODE", "openrouter")
 
 # ==============================================
@@ -45,14 +46,294 @@ _env_chairman = os.getenv("CHAIRMAN_MODEL")
 if _env_chairman:
     CHAIRMAN_MODEL = _env_chairman.strip()
 
+# Conversation titles (a fast, cheap model; a local heuristic title is
+# used until it answers, and if it fails)
+TITLE_MODEL = os.getenv("TITLE_MODEL", "google/gemini-2.5-flash").strip()
+TITLE_TIMEOUT = float(os.getenv("TITLE_TIMEOUT", "30"))
+
+# ==============================================
+# Provider Scheduling
+# ==============================================
+
+# Each provider queues requests behind a concurrency limit and optional
+# requests-per-minute / tokens-per-minute budgets, configured per provider
+# with e.g. OPENAI_MAX_CONCURRENCY, OPENAI_RPM, OPENAI_TPM (0 = unlimited).
+def _provider_limits(prefix: str) -> dict:
+    return {
+        "max_concurrency": int(os.getenv(f"{prefix}_MAX_CONCURRENCY", "8")),
+        "rpm": float(os.getenv(f"{prefix}_RPM", "0")) or None,
+        "tpm": float(os.getenv(f"{prefix}_TPM", "0")) or None,
+    }
+
+
+PROVIDER_LIMITS = {
+    name: _provider_limits(name.upper())
+    for name in ("openai", "anthropic", "google", "openrouter", "mock")
+}
+
+# Retries for 429 / 5xx responses (jittered exponential backoff, capped;
+# a Retry-After header from the provider takes precedence)
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "3"))
+PROVIDER_RETRY_BASE_DELAY = float(os.getenv("PROVIDER_RETRY_BASE_DELAY", "1.0"))
+PROVIDER_RETRY_MAX_DELAY = float(os.getenv("PROVIDER_RETRY_MAX_DELAY", "30.0"))
+
+# ==============================================
+# Hedged Requests
+# ==============================================
+
+# Opt-in: if a call has not produced its first delta (streamed calls) or
+# its response (plain calls) within the provider's observed
+# HEDGE_PERCENTILE latency for that kind of call, send a duplicate via
+# the other route (direct <-> OpenRouter) and keep whichever answers
+# first. At most HEDGE_MAX_RATE of calls are hedged.
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.9"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1.0"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "15.0"))
+HEDGE_MAX_RATE = float(os.getenv("HEDGE_MAX_RATE", "0.1"))
+
+# ==============================================
+# Stage Pipelining
+# ==============================================
+
+# Stage 2 can start before every Stage 1 call has returned. Stage 1 stops
+# waiting as soon as either condition is met, and stragglers are dropped:
+# - STAGE1_QUORUM: number of successful answers that is enough ("any K of N")
+# - STAGE1_GRACE_PERIOD: seconds to wait for the rest after the first answer
+# Leave both unset to wait for every council member (strict barrier).
+_env_quorum = os.getenv("STAGE1_QUORUM")
+STAGE1_QUORUM = int(_env_quorum) if _env_quorum else None
+
+_env_grace = os.getenv("STAGE1_GRACE_PERIOD")
+STAGE1_GRACE_PERIOD = float(_env_grace) if _env_grace else None
+
+# ==============================================
+# Consensus Fast Path
+# ==============================================
+
+# Opt-in: when every pair of Stage 1 answers is at least
+# CONSENSUS_THRESHOLD similar (bag-of-words cosine, 0-1), skip Stage 2.
+# Only short answers (CONSENSUS_MAX_TOKENS) qualify. With
+# CONSENSUS_SKIP_CHAIRMAN the most central answer is returned as the
+# final answer and Stage 3 is skipped too.
+CONSENSUS_ENABLED = os.getenv("CONSENSUS_ENABLED", "false").lower() == "true"
+CONSENSUS_THRESHOLD = float(os.getenv("CONSENSUS_THRESHOLD", "0.8"))
+CONSENSUS_MAX_TOKENS = int(os.getenv("CONSENSUS_MAX_TOKENS", "300"))
+CONSENSUS_SKIP_CHAIRMAN = os.getenv("CONSENSUS_SKIP_CHAIRMAN", "false").lower() == "true"
+
+# ==============================================
+# Prompt Compaction
+# ==============================================
+
+# Token budgets for the answers pasted into the Stage 2 review prompt and
+# the Stage 1 + Stage 2 texts pasted into the Stage 3 chairman prompt.
+# Unset or 0 disables compaction for that stage.
+STAGE2_TOKEN_BUDGET = int(os.getenv("STAGE2_TOKEN_BUDGET", "0"))
+STAGE3_TOKEN_BUDGET = int(os.getenv("STAGE3_TOKEN_BUDGET", "0"))
+
+# "truncate" (keep head and tail of the longest texts) or "summarize"
+# (condense them with COMPACTION_SUMMARIZER_MODEL)
+COMPACTION_STRATEGY = os.getenv("COMPACTION_STRATEGY", "truncate").lower()
+COMPACTION_SUMMARIZER_MODEL = os.getenv("COMPACTION_SUMMARIZER_MODEL", "google/gemini-2.5-flash")
+
+# ==============================================
+# Ranking Aggregation
+# ==============================================
+
+# How Stage 2 reviews are combined into the aggregate ranking:
+# "mean" (average position), "borda", "copeland" or "kemeny"
+RANKING_METHOD = os.getenv("RANKING_METHOD", "mean").lower()
+
+# ==============================================
+# Adaptive Council Selection
+# ==============================================
+
+# Opt-in: when the request does not name its council, pick the
+# COUNCIL_ROUTER_SIZE members of COUNCIL_MODELS with the best expected
+# value for the query's category (historical Stage 2 rank, penalized by
+# observed latency and answer length as a cost proxy). Models with fewer
+# than COUNCIL_ROUTER_MIN_TURNS ranked turns are always kept.
+COUNCIL_ROUTER_ENABLED = os.getenv("COUNCIL_ROUTER_ENABLED", "false").lower() == "true"
+COUNCIL_ROUTER_SIZE = int(os.getenv("COUNCIL_ROUTER_SIZE", "3"))
+COUNCIL_ROUTER_MIN_TURNS = int(os.getenv("COUNCIL_ROUTER_MIN_TURNS", "20"))
+COUNCIL_ROUTER_LATENCY_WEIGHT = float(os.getenv("COUNCIL_ROUTER_LATENCY_WEIGHT", "0.1"))
+COUNCIL_ROUTER_COST_WEIGHT = float(os.getenv("COUNCIL_ROUTER_COST_WEIGHT", "0.1"))
+# Seconds between refreshes of the routing statistics from storage
+COUNCIL_ROUTER_REFRESH_SECONDS = float(os.getenv("COUNCIL_ROUTER_REFRESH_SECONDS", "300"))
+
+# ==============================================
+# Conversation History
+# ==============================================
+
+# Token budget for earlier turns sent with each new question (0 disables
+# multi-turn context). Turns that slide out of the window are folded into
+# a running summary of at most HISTORY_SUMMARY_TOKENS, updated once per turn.
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "4000"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "500"))
+HISTORY_SUMMARIZER_MODEL = os.getenv("HISTORY_SUMMARIZER_MODEL", COMPACTION_SUMMARIZER_MODEL)
+
+# ==============================================
+# Council Jobs
+# ==============================================
+
+# Streamed turns run as background jobs that clients can reconnect to.
+# JOB_EVENT_BUFFER bounds the token deltas kept per job for replay (stage
+# results are always kept); finished jobs stay replayable for
+# JOB_RETENTION_SECONDS.
+JOB_EVENT_BUFFER = int(os.getenv("JOB_EVENT_BUFFER", "2000"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "600"))
+
+# Jobs are queued in the database and picked up by any server process
+# (uvicorn worker) polling every JOB_POLL_INTERVAL seconds, up to
+# JOB_WORKER_CONCURRENCY at a time per process. A worker holds a job
+# under a lease it renews while running; when a worker dies, its jobs are
+# resumed by another one after JOB_LEASE_SECONDS.
+JOB_WORKER_ID = os.getenv("JOB_WORKER_ID")
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "30"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "32"))
+
+# Server processes started by `python -m backend.main`; they share the
+# SQLite database and the job queue
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+# ==============================================
+# Telemetry
+# ==============================================
+
+# Prometheus metrics are always served on /metrics. Set OTEL_ENABLED to
+# also emit OpenTelemetry spans (requires opentelemetry-api; configure
+# exporters with the standard OTEL_* variables).
+OTEL_ENABLED = os.getenv("OTEL_ENABLED", "false").lower() == "true"
+
+# ==============================================
+# Mock Provider
+# ==============================================
+
+# Behaviour of the fake provider used with LLM_MODE=mock and by the local
+# stub server (benchmarks.stub_server). Time to first token is lognormal
+# with median MOCK_LATENCY seconds and shape MOCK_LATENCY_SIGMA; answers
+# of MOCK_RESPONSE_TOKENS then stream at MOCK_TOKENS_PER_SECOND (0 =
+# instantly). MOCK_ERROR_RATE of requests fail with a retryable 503.
+MOCK_LATENCY = float(os.getenv("MOCK_LATENCY", "0.5"))
+MOCK_LATENCY_SIGMA = float(os.getenv("MOCK_LATENCY_SIGMA", "0.5"))
+MOCK_TOKENS_PER_SECOND = float(os.getenv("MOCK_TOKENS_PER_SECOND", "100"))
+MOCK_RESPONSE_TOKENS = int(os.getenv("MOCK_RESPONSE_TOKENS", "200"))
+MOCK_ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", "0"))
+MOCK_SEED = int(os.getenv("MOCK_SEED")) if os.getenv("MOCK_SEED") else None
+
+# ==============================================
+# Pricing
+# ==============================================
+
+# USD per million (prompt, completion) tokens, keyed by model identifier.
+# Used to cost each provider call from its reported usage. Override or
+# extend with MODEL_PRICING='{"openai/gpt-4o": [2.5, 10]}'.
+MODEL_PRICING = {
+    "openai/gpt-4o": (2.50, 10.00),
+    "openai/gpt-4o-mini": (0.15, 0.60),
+    "openai/gpt-4-turbo": (10.00, 30.00),
+    "openai/gpt-4": (30.00, 60.00),
+    "openai/gpt-3.5-turbo": (0.50, 1.50),
+    "openai/o1": (15.00, 60.00),
+    "openai/o1-mini": (1.10, 4.40),
+    "anthropic/claude-sonnet-4-20250514": (3.00, 15.00),
+    "anthropic/claude-sonnet-4.5": (3.00, 15.00),
+    "anthropic/claude-3.5-sonnet": (3.00, 15.00),
+    "anthropic/claude-3-opus": (15.00, 75.00),
+    "anthropic/claude-3-haiku": (0.25, 1.25),
+    "google/gemini-3-pro-preview": (2.00, 12.00),
+    "google/gemini-2.5-pro": (1.25, 10.00),
+    "google/gemini-2.5-flash": (0.30, 2.50),
+    "google/gemini-2.0-flash": (0.10, 0.40),
+    "google/gemini-1.5-pro": (1.25, 5.00),
+    "google/gemini-1.5-flash": (0.075, 0.30),
+}
+
+_env_pricing = os.getenv("MODEL_PRICING")
+if _env_pricing:
+    MODEL_PRICING.update({
+        model: (float(prices[0]), float(prices[1]))
+        for model, prices in json.loads(_env_pricing).items()
+    })
+
+# Provider batch APIs bill at a discount (see Batch Runs)
+PROVIDER_BATCH_PRICE_FACTOR = float(os.getenv("PROVIDER_BATCH_PRICE_FACTOR", "0.5"))
+
+# ==============================================
+# Response Cache
+# ==============================================
+
+# Identical (model, messages) queries that overlap in time share one
+# provider call instead of each paying for it.
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+
+# Cache model responses keyed by (model, normalized messages, params) so a
+# repeated question can replay without new LLM calls. Off by default.
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "false").lower() == "true"
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+
+# Optional on-disk tier (SQLite file); leave unset for memory only
+CACHE_DISK_PATH = os.getenv("CACHE_DISK_PATH")
+CACHE_DISK_MAX_ENTRIES = int(os.getenv("CACHE_DISK_MAX_ENTRIES", "20000"))
+
 # ==============================================
 # OpenRouter (legacy - kept for backward compatibility)
 # ==============================================
-OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+# Overridable to point at a local stub server for load tests (the OpenAI
+# SDK reads OPENAI_BASE_URL the same way)
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+# ==============================================
+# HTTP Connection Pooling
+# ==============================================
+
+# Shared httpx clients are kept open for the lifetime of the app so that
+# council calls reuse TCP/TLS connections instead of reconnecting per query.
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+# ==============================================
+# Batch Runs
+# ==============================================
+
+# Prompts in flight for batch runs (POST /api/batch, python -m backend.batch)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Where API batch runs keep their results / resume checkpoints
+BATCH_DIR = os.getenv("BATCH_DIR", "data/batches")
+
+# --provider-batch: queries for OpenAI/Anthropic are collected for
+# PROVIDER_BATCH_WINDOW seconds and sent as one discounted batch, polled
+# every PROVIDER_BATCH_POLL_INTERVAL seconds. Up to
+# PROVIDER_BATCH_MAX_PROMPTS prompts run together so stages batch well.
+PROVIDER_BATCH_WINDOW = float(os.getenv("PROVIDER_BATCH_WINDOW", "5.0"))
+PROVIDER_BATCH_POLL_INTERVAL = float(os.getenv("PROVIDER_BATCH_POLL_INTERVAL", "30.0"))
+PROVIDER_BATCH_MAX_PROMPTS = int(os.getenv("PROVIDER_BATCH_MAX_PROMPTS", "1000"))
 
 # ==============================================
 # Storage
 # ==============================================
+# Conversations live in a SQLite database (WAL mode); messages are
+# appended as rows so a save never rewrites the whole conversation.
+STORAGE_DB_PATH = os.getenv("STORAGE_DB_PATH", "data/conversations.db")
+
+# Worker threads for storage I/O, keeping blocking writes off the event loop
+STORAGE_THREADS = int(os.getenv("STORAGE_THREADS", "4"))
+
+# Encoding of stored messages: "json" (plain minified JSON), "zlib", or
+# "zstd" (needs the zstandard package; zlib is used without it).
+# Compression roughly halves the database but costs CPU on every load
+# (see benchmarks.storage_format). Values shorter than
+# STORAGE_COMPRESS_MIN_BYTES stay plain JSON. Every row is tagged with its
+# encoding, so changing this never breaks reading; run
+# `python -m backend.storage compact` to re-encode existing rows.
+STORAGE_CODEC = os.getenv("STORAGE_CODEC", "json")
+STORAGE_COMPRESS_MIN_BYTES = int(os.getenv("STORAGE_COMPRESS_MIN_BYTES", "512"))
+
+# Legacy per-conversation JSON files, imported into the database on startup
 DATA_DIR = "data/conversations"
 
 # ==============================================
@@ -0,0 +1,104 @@
+"""Early-exit detection when Stage 1 answers already agree.
+
+For factual questions the council members often say the same thing in
+different words; peer review then adds N calls of latency for no new
+information. Answers are compared as bag-of-words vectors (lowercased,
+punctuation and stopwords removed) with cosine similarity. When every
+pair of answers is at least CONSENSUS_THRESHOLD similar, the turn takes
+the consensus fast path: Stage 2 is skipped and, optionally, the
+chairman too (the most central answer is used as the final answer).
+
+Word overlap cannot tell "X is safe" from "X is not safe", so answers
+where some are negated and others are not never count as consensus.
+"""
+
+import math
+import re
+from collections import Counter
+from itertools import combinations
+from typing import List, Dict, Any, Optional
+from .compaction import count_tokens
+from .config import CONSENSUS_THRESHOLD, CONSENSUS_MAX_TOKENS
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an the and or but if then so of to in on at by for with from as is are was were be been being
+it its this that these those there here which who whom what when where why how i you he she we
+they me him her us them my your his our their do does did has have had can could will
+would should may might shall also just than too very about into over such
+""".split())
+
+# Words that flip an answer's meaning; kept in the vectors and compared
+# separately ("n't" contractions are expanded to "not" first)
+NEGATIONS = frozenset("not no never none nor neither nothing nobody cannot".split())
+
+
+def _words(text: str) -> List[str]:
+    text = text.lower().replace("n't", " not").replace("n\u2019t", " not")
+    return _WORD_RE.findall(text)
+
+
+def _vector(text: str) -> Counter:
+    """Bag-of-words term counts for an answer."""
+    return Counter(word for word in _words(text) if word not in STOPWORDS)
+
+
+def _negated(vector: Counter) -> bool:
+    """Whether an answer contains any negation."""
+    return any(word in vector for word in NEGATIONS)
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[word] for word, count in a.items() if word in b)
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm
+
+
+def detect_consensus(
+    stage1_results: List[Dict[str, Any]],
+    threshold: float = CONSENSUS_THRESHOLD,
+    max_tokens: int = CONSENSUS_MAX_TOKENS
+) -> Optional[Dict[str, Any]]:
+    """
+    Check whether the Stage 1 answers agree closely enough to skip review.
+
+    Args:
+        stage1_results: Results from Stage 1
+        threshold: Minimum pairwise similarity (0-1) for every pair of answers
+        max_tokens: Answers longer than this never count as consensus
+
+    Returns:
+        Dict with 'agreement' (lowest pairwise similarity) and
+        'representative' (model whose answer is most similar to the
+        others), or None if the answers do not agree
+    """
+    if len(stage1_results) < 2:
+        return None
+
+    responses = [result['response'] for result in stage1_results]
+    if any(not response or count_tokens(response) > max_tokens for response in responses):
+        return None
+
+    vectors = [_vector(response) for response in responses]
+    if len({_negated(vector) for vector in vectors}) > 1:
+        # Same words, opposite claims
+        return None
+
+    totals = [0.0] * len(vectors)
+    agreement = 1.0
+    for i, j in combinations(range(len(vectors)), 2):
+        similarity = _cosine(vectors[i], vectors[j])
+        if similarity < threshold:
+            return None
+        agreement = min(agreement, similarity)
+        totals[i] += similarity
+        totals[j] += similarity
+
+    central = max(range(len(vectors)), key=lambda i: totals[i])
+    return {
+        "agreement": round(agreement, 3),
+        "representative": stage1_results[central]['model'],
+    }
@@ -1,29 +1,91 @@
 """3-stage LLM Council orchestration."""
 
-from typing import List, Dict, Any, Tuple, Optional
-from .providers import query_models_parallel, query_model
-from .config import COUNCIL_MODELS, CHAIRMAN_MODEL
+import re
+from typing import List, Dict, Any, Tuple, Optional, Callable
+from .providers import query_models_parallel, query_model, query_model_stream
+from .compaction import compact_texts
+from .ranking import parse_ranking, RankingMatrix, aggregate, labels_for
+from .consensus import detect_consensus
+from .telemetry import timed_stage, start_turn, finish_turn
+from .pricing import summarize_usage
+from .router import get_router
+from .config import (
+    COUNCIL_MODELS,
+    CHAIRMAN_MODEL,
+    TITLE_MODEL,
+    TITLE_TIMEOUT,
+    STAGE1_QUORUM,
+    STAGE1_GRACE_PERIOD,
+    STAGE2_TOKEN_BUDGET,
+    STAGE3_TOKEN_BUDGET,
+    RANKING_METHOD,
+    COUNCIL_ROUTER_ENABLED,
+    CONSENSUS_ENABLED,
+    CONSENSUS_SKIP_CHAIRMAN,
+)
+
+
+async def choose_council(
+    user_query: str,
+    council_models: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Decide which models sit on the council for this query.
+
+    An explicit list from the request is used as is. Otherwise the
+    configured COUNCIL_MODELS are used, narrowed by the adaptive router
+    when COUNCIL_ROUTER_ENABLED is set.
+
+    Args:
+        user_query: The user's question
+        council_models: Optional models requested by the client
+
+    Returns:
+        List of council model identifiers
+    """
+    if council_models is not None:
+        return council_models
 
+    if not COUNCIL_ROUTER_ENABLED:
+        return COUNCIL_MODELS
 
+    return await get_router().select(user_query, COUNCIL_MODELS)
+
+
+@timed_stage("stage1")
 async def stage1_collect_responses(
     user_query: str,
-    council_models: Optional[List[str]] = None
+    council_models: Optional[List[str]] = None,
+    on_delta: Optional[Callable[[str, str], None]] = None,
+    history: Optional[List[Dict[str, str]]] = None
 ) -> List[Dict[str, Any]]:
     """
     Stage 1: Collect individual responses from all council models.
 
+    Slow members are dropped once STAGE1_QUORUM / STAGE1_GRACE_PERIOD is
+    reached, so Stage 2 ranks only the answers that arrived in time (and
+    only their models review them).
+
     Args:
         user_query: The user's question
         council_models: Optional list of models to use (defaults to COUNCIL_MODELS)
+        on_delta: Optional callback (model, delta) to stream tokens as they arrive
+        history: Optional earlier turns to send before the question
 
     Returns:
         List of dicts with 'model' and 'response' keys
     """
     models = council_models if council_models is not None else COUNCIL_MODELS
-    messages = [{"role": "user", "content": user_query}]
-
-    # Query all models in parallel
-    responses = await query_models_parallel(models, messages)
+    messages = list(history or []) + [{"role": "user", "content": user_query}]
+
+    # Query all models in parallel; Stage 2 proceeds once the quorum is met
+    responses = await query_models_parallel(
+        models,
+        messages,
+        on_delta,
+        quorum=STAGE1_QUORUM,
+        grace_period=STAGE1_GRACE_PERIOD
+    )
 
     # Format results
     stage1_results = []
@@ -37,6 +99,42 @@ async def stage1_collect_responses(
     return stage1_results
 
 
+def check_consensus(stage1_results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Decide whether this turn takes the consensus fast path.
+
+    Args:
+        stage1_results: Results from Stage 1
+
+    Returns:
+        Consensus dict ('agreement', 'representative', 'skip_chairman') if
+        Stage 2 should be skipped, else None
+    """
+    if not CONSENSUS_ENABLED:
+        return None
+
+    consensus = detect_consensus(stage1_results)
+    if consensus is None:
+        return None
+
+    consensus["skip_chairman"] = CONSENSUS_SKIP_CHAIRMAN
+    print(f"Consensus fast path: agreement {consensus['agreement']}, skipping Stage 2"
+          + (" and the chairman" if CONSENSUS_SKIP_CHAIRMAN else ""))
+    return consensus
+
+
+def consensus_final_answer(
+    stage1_results: List[Dict[str, Any]],
+    consensus: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Use the most central Stage 1 answer as the final answer."""
+    for result in stage1_results:
+        if result['model'] == consensus['representative']:
+            return {"model": result['model'], "response": result['response']}
+    return {"model": stage1_results[0]['model'], "response": stage1_results[0]['response']}
+
+
+@timed_stage("stage2")
 async def stage2_collect_rankings(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
@@ -45,6 +143,9 @@ async def stage2_collect_rankings(
     """
     Stage 2: Each model ranks the anonymized responses.
 
+    Only members that answered in Stage 1 review: one dropped as a
+    straggler (or that failed) would otherwise hold Stage 2 up instead.
+
     Args:
         user_query: The original user query
         stage1_results: Results from Stage 1
@@ -54,6 +155,9 @@ async def stage2_collect_rankings(
         Tuple of (rankings list, label_to_model mapping)
     """
     models = council_models if council_models is not None else COUNCIL_MODELS
+    answered = {result['model'] for result in stage1_results}
+    reviewers = [model for model in models if model in answered]
+
     # Create anonymized labels for responses (Response A, Response B, etc.)
     labels = [chr(65 + i) for i in range(len(stage1_results))]  # A, B, C, ...
 
@@ -63,10 +167,17 @@ async def stage2_collect_rankings(
         for label, result in zip(labels, stage1_results)
     }
 
+    # Fit the answers into the Stage 2 token budget
+    answers = await compact_texts(
+        [result['response'] for result in stage1_results],
+        STAGE2_TOKEN_BUDGET,
+        stage="Stage 2"
+    )
+
     # Build the ranking prompt
     responses_text = "\n\n".join([
-        f"Response {label}:\n{result['response']}"
-        for label, result in zip(labels, stage1_results)
+        f"Response {label}:\n{answer}"
+        for label, answer in zip(labels, answers)
     ])
 
     ranking_prompt = f"""You are evaluating different responses to the following question:
@@ -102,15 +213,15 @@ Now provide your evaluation and ranking:"""
 
     messages = [{"role": "user", "content": ranking_prompt}]
 
-    # Get rankings from all council models in parallel
-    responses = await query_models_parallel(models, messages)
+    # Get rankings from the reviewing models in parallel
+    responses = await query_models_parallel(reviewers, messages)
 
     # Format results
     stage2_results = []
     for model, response in responses.items():
         if response is not None:
             full_text = response.get('content', '')
-            parsed = parse_ranking_from_text(full_text)
+            parsed = parse_ranking(full_text)
             stage2_results.append({
                 "model": model,
                 "ranking": full_text,
@@ -120,11 +231,15 @@ Now provide your evaluation and ranking:"""
     return stage2_results, label_to_model
 
 
+@timed_stage("stage3")
 async def stage3_synthesize_final(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
     stage2_results: List[Dict[str, Any]],
-    chairman_model: Optional[str] = None
+    chairman_model: Optional[str] = None,
+    on_delta: Optional[Callable[[str, str], None]] = None,
+    history: Optional[List[Dict[str, str]]] = None,
+    consensus: bool = False
 ) -> Dict[str, Any]:
     """
     Stage 3: Chairman synthesizes final response.
@@ -134,43 +249,70 @@ async def stage3_synthesize_final(
         stage1_results: Individual model responses from Stage 1
         stage2_results: Rankings from Stage 2
         chairman_model: Optional chairman model (defaults to CHAIRMAN_MODEL)
+        on_delta: Optional callback (model, delta) to stream tokens as they arrive
+        history: Optional earlier turns to send before the chairman prompt
+        consensus: Whether Stage 2 was skipped on the consensus fast path
 
     Returns:
         Dict with 'model' and 'response' keys
     """
     chair_model = chairman_model if chairman_model is not None else CHAIRMAN_MODEL
+    # Fit Stage 1 answers and Stage 2 reviews into the Stage 3 token budget
+    compacted = await compact_texts(
+        [result['response'] for result in stage1_results]
+        + [result['ranking'] for result in stage2_results],
+        STAGE3_TOKEN_BUDGET,
+        stage="Stage 3"
+    )
+    answers = compacted[:len(stage1_results)]
+    rankings = compacted[len(stage1_results):]
+
     # Build comprehensive context for chairman
     stage1_text = "\n\n".join([
-        f"Model: {result['model']}\nResponse: {result['response']}"
-        for result in stage1_results
+        f"Model: {result['model']}\nResponse: {answer}"
+        for result, answer in zip(stage1_results, answers)
     ])
 
-    stage2_text = "\n\n".join([
-        f"Model: {result['model']}\nRanking: {result['ranking']}"
-        for result in stage2_results
-    ])
-
-    chairman_prompt = f"""You are the Chairman of an LLM Council. Multiple AI models have provided responses to a user's question, and then ranked each other's responses.
+    if consensus:
+        overview = "Multiple AI models have provided responses to a user's question. Their responses largely agree, so they were not asked to rank each other."
+    elif stage2_results:
+        overview = "Multiple AI models have provided responses to a user's question, and then ranked each other's responses."
+    else:
+        # Stage 2 ran, but every reviewer failed
+        overview = "Multiple AI models have provided responses to a user's question. They were asked to rank each other's responses, but no rankings were returned."
+
+    stage2_section = ""
+    stage2_point = ""
+    if stage2_results:
+        stage2_text = "\n\n".join([
+            f"Model: {result['model']}\nRanking: {ranking}"
+            for result, ranking in zip(stage2_results, rankings)
+        ])
+        stage2_section = f"\n\nSTAGE 2 - Peer Rankings:\n{stage2_text}"
+        stage2_point = "\n- The peer rankings and what they reveal about response quality"
+
+    chairman_prompt = f"""You are the Chairman of an LLM Council. {overview}
 
 Original Question: {user_query}
 
 STAGE 1 - Individual Responses:
-{stage1_text}
-
-STAGE 2 - Peer Rankings:
-{stage2_text}
+{stage1_text}{stage2_section}
 
 Your task as Chairman is to synthesize all of this information into a single, comprehensive, accurate answer to the user's original question. Consider:
-- The individual responses and their insights
-- The peer rankings and what they reveal about response quality
+- The individual responses and their insights{stage2_point}
 - Any patterns of agreement or disagreement
 
 Provide a clear, well-reasoned final answer that represents the council's collective wisdom:"""
 
-    messages = [{"role": "user", "content": chairman_prompt}]
+    messages = list(history or []) + [{"role": "user", "content": chairman_prompt}]
 
     # Query the chairman model
-    response = await query_model(chair_model, messages)
+    if on_delta is None:
+        response = await query_model(chair_model, messages)
+    else:
+        response = await query_model_stream(
+            chair_model, messages, lambda delta: on_delta(chair_model, delta)
+        )
 
     if response is None:
         # Fallback if chairman fails
@@ -195,77 +337,75 @@ def parse_ranking_from_text(ranking_text: str) -> List[str]:
     Returns:
         List of response labels in ranked order
     """
-    import re
-
-    # Look for "FINAL RANKING:" section
-    if "FINAL RANKING:" in ranking_text:
-        # Extract everything after "FINAL RANKING:"
-        parts = ranking_text.split("FINAL RANKING:")
-        if len(parts) >= 2:
-            ranking_section = parts[1]
-            # Try to extract numbered list format (e.g., "1. Response A")
-            # This pattern looks for: number, period, optional space, "Response X"
-            numbered_matches = re.findall(r'\d+\.\s*Response [A-Z]', ranking_section)
-            if numbered_matches:
-                # Extract just the "Response X" part
-                return [re.search(r'Response [A-Z]', m).group() for m in numbered_matches]
-
-            # Fallback: Extract all "Response X" patterns in order
-            matches = re.findall(r'Response [A-Z]', ranking_section)
-            return matches
-
-    # Fallback: try to find any "Response X" patterns in order
-    matches = re.findall(r'Response [A-Z]', ranking_text)
-    return matches
+    return parse_ranking(ranking_text)
 
 
 def calculate_aggregate_rankings(
     stage2_results: List[Dict[str, Any]],
-    label_to_model: Dict[str, str]
+    label_to_model: Dict[str, str],
+    method: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     Calculate aggregate rankings across all models.
 
+    Uses the `parsed_ranking` stored by Stage 2 rather than re-parsing.
+
     Args:
         stage2_results: Rankings from each model
         label_to_model: Mapping from anonymous labels to model names
+        method: Voting rule (mean, borda, copeland, kemeny; defaults to RANKING_METHOD)
 
     Returns:
-        List of dicts with model name and average rank, sorted best to worst
+        List of dicts with model name, average rank and score, sorted best to worst
     """
-    from collections import defaultdict
+    matrix = RankingMatrix.from_stage2(stage2_results, label_to_model)
+    return aggregate(matrix, method or RANKING_METHOD)
 
-    # Track positions for each model
-    model_positions = defaultdict(list)
 
-    for ranking in stage2_results:
-        ranking_text = ranking['ranking']
+_TITLE_FILLER_RE = re.compile(
+    r"^(?:(?:hi|hello|hey|please|can you|could you|would you|i want to know|tell me)\b[\s,!]*)+",
+    re.IGNORECASE
+)
+_TITLE_WORDS = 6
 
-        # Parse the ranking from the structured format
-        parsed_ranking = parse_ranking_from_text(ranking_text)
 
-        for position, label in enumerate(parsed_ranking, start=1):
-            if label in label_to_model:
-                model_name = label_to_model[label]
-                model_positions[model_name].append(position)
+def _clean_title(title: str) -> str:
+    """Strip quotes and cap the length of a title."""
+    title = title.strip().strip('"\'')
 
-    # Calculate average position for each model
-    aggregate = []
-    for model, positions in model_positions.items():
-        if positions:
-            avg_rank = sum(positions) / len(positions)
-            aggregate.append({
-                "model": model,
-                "average_rank": round(avg_rank, 2),
-                "rankings_count": len(positions)
-            })
+    # Truncate if too long
+    if len(title) > 50:
+        title = title[:47] + "..."
+
+    return title
+
+
+def heuristic_title(user_query: str) -> str:
+    """
+    Build a title locally from the first message (no model call).
+
+    Drops leading greetings and politeness filler, then keeps the first
+    few words of the first sentence.
+
+    Args:
+        user_query: The first user message
 
-    # Sort by average rank (lower is better)
-    aggregate.sort(key=lambda x: x['average_rank'])
+    Returns:
+        A short title, or "New Conversation" if nothing usable remains
+    """
+    text = _TITLE_FILLER_RE.sub("", " ".join(user_query.split()))
+    text = re.split(r"(?<=[.?!])\s", text, maxsplit=1)[0].strip(" .?!:;,")
+    words = text.split()
+    if not words:
+        return "New Conversation"
 
-    return aggregate
+    title = " ".join(words[:_TITLE_WORDS])
+    if len(words) > _TITLE_WORDS:
+        title += "..."
+    return _clean_title(title[0].upper() + title[1:])
 
 
+@timed_stage("title")
 async def generate_conversation_title(user_query: str) -> str:
     """
     Generate a short title for a conversation based on the first user message.
@@ -285,21 +425,12 @@ Title:"""
 
     messages = [{"role": "user", "content": title_prompt}]
 
-    # Use gemini-2.5-flash for title generation (fast and cheap)
-    response = await query_model("google/gemini-2.5-flash", messages, timeout=30.0)
-
-    if response is None:
-        # Fallback to a generic title
-        return "New Conversation"
-
-    title = response.get('content', 'New Conversation').strip()
+    response = await query_model(TITLE_MODEL, messages, timeout=TITLE_TIMEOUT)
 
-    # Clean up the title - remove quotes, limit length
-    title = title.strip('"\'')
-
-    # Truncate if too long
-    if len(title) > 50:
-        title = title[:47] + "..."
+    title = _clean_title((response or {}).get('content') or '')
+    if not title:
+        # Fall back to a title built from the message itself
+        return heuristic_title(user_query)
 
     return title
 
@@ -307,7 +438,8 @@ Title:"""
 async def run_full_council(
     user_query: str,
     council_models: Optional[List[str]] = None,
-    chairman_model: Optional[str] = None
+    chairman_model: Optional[str] = None,
+    history: Optional[List[Dict[str, str]]] = None
 ) -> Tuple[List, List, Dict, Dict]:
     """
     Run the complete 3-stage council process.
@@ -316,40 +448,64 @@ async def run_full_council(
         user_query: The user's question
         council_models: Optional list of models to use (defaults to COUNCIL_MODELS)
         chairman_model: Optional chairman model (defaults to CHAIRMAN_MODEL)
+        history: Optional earlier turns (see history.build_history)
 
     Returns:
         Tuple of (stage1_results, stage2_results, stage3_result, metadata)
     """
+    timings = start_turn()
+    council_models = await choose_council(user_query, council_models)
+
     # Stage 1: Collect individual responses
-    stage1_results = await stage1_collect_responses(user_query, council_models)
+    stage1_results = await stage1_collect_responses(
+        user_query, council_models, history=history
+    )
 
     # If no models responded successfully, return error
     if not stage1_results:
+        turn_timings = finish_turn(timings)
         return [], [], {
             "model": "error",
             "response": "All models failed to respond. Please try again."
-        }, {}
+        }, {"timings": turn_timings, "usage": summarize_usage(turn_timings["calls"])}
+
+    # Skip peer review (and optionally the chairman) if the answers agree
+    consensus = check_consensus(stage1_results)
 
     # Stage 2: Collect rankings
-    stage2_results, label_to_model = await stage2_collect_rankings(
-        user_query, stage1_results, council_models
-    )
+    if consensus is None:
+        stage2_results, label_to_model = await stage2_collect_rankings(
+            user_query, stage1_results, council_models
+        )
+    else:
+        stage2_results, label_to_model = [], labels_for(stage1_results)
 
     # Calculate aggregate rankings
     aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
 
     # Stage 3: Synthesize final answer
-    stage3_result = await stage3_synthesize_final(
-        user_query,
-        stage1_results,
-        stage2_results,
-        chairman_model
-    )
+    if consensus is not None and consensus["skip_chairman"]:
+        stage3_result = consensus_final_answer(stage1_results, consensus)
+    else:
+        stage3_result = await stage3_synthesize_final(
+            user_query,
+            stage1_results,
+            stage2_results,
+            chairman_model,
+            history=history,
+            consensus=consensus is not None
+        )
 
     # Prepare metadata
     metadata = {
         "label_to_model": label_to_model,
         "aggregate_rankings": aggregate_rankings
     }
+    if consensus is not None:
+        # Stored with the answer so reloaded turns still show the fast path
+        stage3_result["consensus"] = consensus
+        metadata["consensus"] = consensus
+    metadata["timings"] = finish_turn(timings)
+    metadata["usage"] = summarize_usage(metadata["timings"]["calls"])
 
     return stage1_results, stage2_results, stage3_result, metadata
@@ -0,0 +1,157 @@
+"""Multi-turn conversation context for the council.
+
+Each new question is sent with the most recent turns (user questions and
+the chairman's final answers) that fit in HISTORY_TOKEN_BUDGET. Turns
+that slide out of that window are folded into a running summary stored
+with the conversation. The summary is advanced once per turn, after the
+answer is saved, and only messages it does not cover yet are read, so
+building context costs the same on turn 50 as on turn 5.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from . import async_storage as storage
+from .compaction import count_tokens, truncate_to_tokens
+from .providers import query_model
+from .config import HISTORY_TOKEN_BUDGET, HISTORY_SUMMARY_TOKENS, HISTORY_SUMMARIZER_MODEL
+
+
+def to_chat_message(message: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    Convert a stored message to a chat message.
+
+    Assistant turns are represented by the chairman's final answer only.
+
+    Returns:
+        Message dict with 'role' and 'content', or None if there is no text
+    """
+    if message.get("role") == "user":
+        return {"role": "user", "content": message.get("content", "")}
+
+    stage3 = message.get("stage3") or {}
+    content = stage3.get("response")
+    if not content:
+        return None
+    return {"role": "assistant", "content": content}
+
+
+def select_window(messages: List[Dict[str, str]], budget: int) -> int:
+    """
+    Find where the newest run of messages fitting in `budget` starts.
+
+    The window always starts on a user message, so providers that require
+    alternating roles get a well-formed history.
+
+    Returns:
+        Index of the first message in the window (len(messages) if none fit)
+    """
+    start = len(messages)
+    used = 0
+    for index in range(len(messages) - 1, -1, -1):
+        used += count_tokens(messages[index]["content"])
+        if used > budget:
+            break
+        start = index
+
+    while start < len(messages) and messages[start]["role"] != "user":
+        start += 1
+
+    return start
+
+
+async def _load_unsummarized(conversation_id: str) -> Tuple[Dict[str, Any], List[Tuple[int, Dict[str, str]]]]:
+    """Load the summary state and the (seq, chat message) pairs it does not cover."""
+    state = await storage.get_context_state(conversation_id)
+    start = state["summarized_upto"]
+    stored = await storage.get_messages(conversation_id, start)
+
+    entries = []
+    for offset, message in enumerate(stored):
+        chat_message = to_chat_message(message)
+        if chat_message is not None:
+            entries.append((start + offset, chat_message))
+
+    state["message_count"] = start + len(stored)
+    return state, entries
+
+
+async def build_history(conversation_id: str) -> List[Dict[str, str]]:
+    """
+    Build the context to send ahead of a new question.
+
+    Call this before the new user message is stored.
+
+    Args:
+        conversation_id: Conversation identifier
+
+    Returns:
+        Chat messages: an optional system message with the running summary,
+        followed by the most recent turns that fit HISTORY_TOKEN_BUDGET
+    """
+    if not HISTORY_TOKEN_BUDGET:
+        return []
+
+    state, entries = await _load_unsummarized(conversation_id)
+    messages = [message for _, message in entries]
+    start = select_window(messages, HISTORY_TOKEN_BUDGET)
+
+    history = []
+    if state["summary"]:
+        history.append({
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{state['summary']}"
+        })
+    history.extend(messages[start:])
+
+    return history
+
+
+async def update_history_summary(conversation_id: str):
+    """
+    Fold turns that left the history window into the running summary.
+
+    Runs once per turn after the assistant message is saved. At most one
+    summarizer call is made; on failure the summary is left as is and the
+    evicted turns are folded in on a later turn.
+
+    Args:
+        conversation_id: Conversation identifier
+    """
+    if not HISTORY_TOKEN_BUDGET:
+        return
+
+    state, entries = await _load_unsummarized(conversation_id)
+    messages = [message for _, message in entries]
+    start = select_window(messages, HISTORY_TOKEN_BUDGET)
+    if start == 0:
+        return
+
+    evicted = messages[:start]
+    summarized_upto = entries[start][0] if start < len(entries) else state["message_count"]
+
+    transcript = "\n\n".join(
+        f"{message['role'].capitalize()}: {truncate_to_tokens(message['content'], HISTORY_TOKEN_BUDGET)}"
+        for message in evicted
+    )
+    max_words = max(50, int(HISTORY_SUMMARY_TOKENS * 0.75))
+
+    summary_prompt = f"""You maintain a running summary of a conversation between a user and an LLM council.
+Update the summary with the new exchanges below. Keep the user's goals, facts, decisions, answers given and open questions; drop pleasantries and repetition. Use at most {max_words} words.
+
+Current summary:
+{state['summary'] or '(none yet)'}
+
+New exchanges:
+{transcript}
+
+Updated summary:"""
+
+    messages = [{"role": "user", "content": summary_prompt}]
+    response = await query_model(HISTORY_SUMMARIZER_MODEL, messages, timeout=60.0)
+
+    summary = ((response or {}).get('content') or '').strip()
+    if not summary:
+        print(f"History summary update failed for conversation {conversation_id}")
+        return
+
+    summary = truncate_to_tokens(summary, HISTORY_SUMMARY_TOKENS)
+    await storage.save_context_state(conversation_id, summary, summarized_upto)
@@ -0,0 +1,42 @@
+"""Shared, long-lived httpx client construction."""
+
+import httpx
+from .config import (
+    HTTP2_ENABLED,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+)
+
+# HTTP/2 needs the optional 'h2' package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+
+def create_async_client(timeout: float = 120.0) -> httpx.AsyncClient:
+    """
+    Create a pooled AsyncClient with keep-alive and optional HTTP/2.
+
+    The client is meant to be created once and shared; callers are
+    responsible for closing it with `aclose()` on shutdown.
+
+    Args:
+        timeout: Default request timeout in seconds
+
+    Returns:
+        Configured httpx.AsyncClient
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+    return httpx.AsyncClient(
+        http2=HTTP2_ENABLED and H2_AVAILABLE,
+        limits=limits,
+        timeout=timeout,
+    )
@@ -0,0 +1,556 @@
+"""Background council runs, queued in the database for any worker.
+
+A council turn runs as a job that does not depend on the HTTP
+connection, so a client that disconnects does not cancel the turn. Jobs
+are queued in the council_jobs table; every server process runs a
+worker loop that claims queued jobs (and jobs whose worker died, once
+their lease runs out) and runs them as asyncio tasks.
+
+Every event a job publishes gets a sequential ID. Token deltas are kept
+in memory in a bounded ring buffer on the worker running the job (they
+are superseded by the stage's *_complete event); all other events are
+also stored in the database. A client reconnects with the last event ID
+it saw (the SSE Last-Event-ID header) and gets the events after it
+replayed, then the live ones: with deltas from the worker running the
+job, or the stored stage events polled from any other worker.
+
+Each finished stage is checkpointed together with the provider calls
+made so far. A job interrupted by a shutdown goes back on the queue, and
+one left by a crash is reclaimed after its lease expires; either way it
+resumes from its last completed stage, so answers that were already
+paid for are not requested again.
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from itertools import takewhile
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from . import async_storage as storage
+from .async_storage import ConflictError
+from .council import (
+    choose_council,
+    check_consensus,
+    consensus_final_answer,
+    generate_conversation_title,
+    heuristic_title,
+    labels_for,
+    stage1_collect_responses,
+    stage2_collect_rankings,
+    stage3_synthesize_final,
+    calculate_aggregate_rankings,
+)
+from .history import build_history, update_history_summary
+from .telemetry import start_turn, finish_turn
+from .pricing import summarize_usage
+from .config import (
+    JOB_EVENT_BUFFER,
+    JOB_RETENTION_SECONDS,
+    JOB_WORKER_ID,
+    JOB_LEASE_SECONDS,
+    JOB_POLL_INTERVAL,
+    JOB_WORKER_CONCURRENCY,
+)
+
+# Events superseded by a later *_complete event; only these may be
+# dropped from the replay buffer, and they are not stored
+DELTA_EVENTS = frozenset({"stage1_delta", "stage3_delta"})
+
+FINAL_EVENTS = frozenset({"complete", "error"})
+
+# This process's identity in the job queue
+WORKER_ID = JOB_WORKER_ID or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+Entry = Tuple[int, Dict[str, Any]]
+
+
+class CouncilJob:
+    """One council turn run by this worker and the events it has published."""
+
+    def __init__(
+        self,
+        job_id: str,
+        conversation_id: str,
+        request: Dict[str, Any],
+        last_event_id: int = 0,
+        buffer_size: int = JOB_EVENT_BUFFER
+    ):
+        self.id = job_id
+        self.conversation_id = conversation_id
+        self.request = request
+        self.status = "running"
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+        # Events up to first_event_id were published by an earlier run of
+        # the job and are only in the database
+        self.first_event_id = last_event_id
+        self._last_id = last_event_id
+        self._deltas: deque = deque(maxlen=buffer_size)
+        self._milestones: List[Entry] = []
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    def _wake(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, event: Dict[str, Any]):
+        """Record an event and wake every subscriber."""
+        self._last_id += 1
+        entry = (self._last_id, event)
+        if event["type"] in DELTA_EVENTS:
+            self._deltas.append(entry)
+        else:
+            self._milestones.append(entry)
+
+        if event["type"] in FINAL_EVENTS:
+            self.status = event["type"]
+            self.finished_at = time.monotonic()
+
+        self._wake()
+
+    def release(self):
+        """Stop following this run; the job continues on another worker."""
+        self.status = "released"
+        self.finished_at = time.monotonic()
+        self._wake()
+
+    def _since(self, last_event_id: int) -> List[Entry]:
+        """Buffered events after `last_event_id`, in order."""
+        def newer(entry: Entry) -> bool:
+            return entry[0] > last_event_id
+
+        entries = list(takewhile(newer, reversed(self._deltas)))
+        entries.extend(takewhile(newer, reversed(self._milestones)))
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+
+    async def events(self, last_event_id: int = 0) -> AsyncIterator[Entry]:
+        """
+        Replay the buffered events after `last_event_id`, then follow live ones.
+
+        Ends after the job's final event, or when the job is released.
+        Deltas older than the ring buffer are skipped; the stage's
+        *_complete event covers them.
+
+        Yields:
+            (event ID, event) tuples
+        """
+        while True:
+            changed = self._changed
+            for entry in self._since(last_event_id):
+                last_event_id = entry[0]
+                yield entry
+            if self.done:
+                return
+            await changed.wait()
+
+    def info(self) -> Dict[str, Any]:
+        """Job status for the API."""
+        return {
+            "id": self.id,
+            "conversation_id": self.conversation_id,
+            "status": self.status,
+            "worker": WORKER_ID,
+            "last_event_id": self._last_id,
+        }
+
+
+# Jobs run by this worker (finished ones are kept for JOB_RETENTION_SECONDS
+# for replay with deltas)
+_jobs: Dict[str, CouncilJob] = {}
+
+_worker_task: Optional[asyncio.Task] = None
+
+
+def _evict_finished():
+    now = time.monotonic()
+    for job_id, job in list(_jobs.items()):
+        if job.done and now - job.finished_at > JOB_RETENTION_SECONDS:
+            del _jobs[job_id]
+
+
+def _running() -> List[CouncilJob]:
+    return [job for job in _jobs.values() if not job.done]
+
+
+async def get_job_info(job_id: str) -> Optional[Dict[str, Any]]:
+    """Status of a queued, running or recently finished job on any worker."""
+    _evict_finished()
+    job = _jobs.get(job_id)
+    if job is not None and job.status != "released":
+        return job.info()
+    return await storage.get_job(job_id)
+
+
+def _launch(row: Dict[str, Any]) -> CouncilJob:
+    """Run a claimed job on this worker."""
+    job = CouncilJob(row["id"], row["conversation_id"], row["request"], row["last_event_id"])
+    _jobs[job.id] = job
+    job.task = asyncio.create_task(_run_job(job, row["checkpoint"]))
+    return job
+
+
+async def start_job(conversation_id: str, request: Dict[str, Any]) -> str:
+    """
+    Queue a council turn, running it on this worker if it has capacity.
+
+    Args:
+        conversation_id: Conversation to answer in
+        request: Dict with 'content' and optional 'council_models' and
+            'chairman_model'
+
+    Returns:
+        The job ID
+
+    Raises:
+        ConflictError: If the conversation already has a job queued or running
+    """
+    _evict_finished()
+    job_id = str(uuid.uuid4())
+    await storage.enqueue_job(job_id, conversation_id, request)
+
+    # Take it straight away so this worker streams the deltas; when busy,
+    # another worker's poll picks it up instead
+    if len(_running()) < JOB_WORKER_CONCURRENCY:
+        row = await storage.claim_job(WORKER_ID, JOB_LEASE_SECONDS, job_id)
+        if row is not None:
+            _launch(row)
+    return job_id
+
+
+async def follow_job(job_id: str, last_event_id: int = 0) -> AsyncIterator[Entry]:
+    """
+    Replay a job's events after `last_event_id`, then follow live ones.
+
+    Jobs running on this worker are followed in memory, token deltas
+    included; others by polling their stored events. Ends after the
+    job's final event, or if the job no longer exists.
+
+    Yields:
+        (event ID, event) tuples
+    """
+    while True:
+        job = _jobs.get(job_id)
+        if job is not None and job.status != "released":
+            if last_event_id < job.first_event_id:
+                # Published by an earlier run of the job (e.g. on a worker that died)
+                for entry in await storage.get_job_events(job_id, last_event_id):
+                    if entry[0] > job.first_event_id:
+                        break
+                    last_event_id = entry[0]
+                    yield entry
+            async for entry in job.events(last_event_id):
+                last_event_id = entry[0]
+                yield entry
+            if job.status != "released":
+                return
+            continue
+
+        for entry in await storage.get_job_events(job_id, last_event_id):
+            last_event_id = entry[0]
+            yield entry
+            if entry[1]["type"] in FINAL_EVENTS:
+                return
+
+        info = await storage.get_job(job_id)
+        if info is None:
+            return
+        if info["status"] in FINAL_EVENTS:
+            # Events stored between the read above and the status change
+            for entry in await storage.get_job_events(job_id, last_event_id):
+                yield entry
+            return
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def wait_for_result(job_id: str) -> Tuple[List, List, Dict[str, Any], Dict[str, Any]]:
+    """
+    Wait for a job to finish and collect its result.
+
+    Returns:
+        Tuple of (stage1_results, stage2_results, stage3_result, metadata),
+        as returned by council.run_full_council
+
+    Raises:
+        RuntimeError: If the job failed
+    """
+    events: Dict[str, Dict[str, Any]] = {}
+    async for _, event in follow_job(job_id):
+        if event["type"] not in DELTA_EVENTS:
+            events[event["type"]] = event
+
+    if "complete" not in events:
+        raise RuntimeError(events.get("error", {}).get("message", "Council job did not finish"))
+
+    stage1_results = events["stage1_complete"]["data"]
+    stage3_result = events["stage3_complete"]["data"]
+    if "stage2_complete" in events:
+        stage2_results = events["stage2_complete"]["data"]
+        metadata = dict(events["stage2_complete"]["metadata"])
+    else:
+        # Consensus fast path: no peer review
+        stage2_results = []
+        label_to_model = labels_for(stage1_results)
+        metadata = {
+            "label_to_model": label_to_model,
+            "aggregate_rankings": calculate_aggregate_rankings([], label_to_model),
+        }
+    if "consensus" in stage3_result:
+        metadata["consensus"] = stage3_result["consensus"]
+    metadata["timings"] = events["complete"]["timings"]
+    metadata["usage"] = events["complete"]["usage"]
+
+    return stage1_results, stage2_results, stage3_result, metadata
+
+
+async def _renew_leases():
+    """Keep this worker's jobs claimed; stop any another worker took over."""
+    running = {job.id: job for job in _running()}
+    if not running:
+        return
+    for job_id in await storage.renew_job_leases(WORKER_ID, list(running), JOB_LEASE_SECONDS):
+        print(f"Council job {job_id} was taken over by another worker; stopping it here")
+        running[job_id].task.cancel()
+
+
+async def _claim_jobs():
+    """Start queued (or abandoned) jobs while this worker has capacity."""
+    while len(_running()) < JOB_WORKER_CONCURRENCY:
+        row = await storage.claim_job(WORKER_ID, JOB_LEASE_SECONDS)
+        if row is None:
+            return
+        stages = [stage for stage in ("stage1", "stage2", "stage3") if stage in row["checkpoint"]]
+        if stages:
+            print(f"Resuming council job {row['id']} (completed: {', '.join(stages)})")
+        _launch(row)
+
+
+async def _worker_loop():
+    """Poll the queue, renew leases and purge old jobs until cancelled."""
+    last_purge = 0.0
+    while True:
+        try:
+            await _renew_leases()
+            await _claim_jobs()
+            if time.monotonic() - last_purge > JOB_RETENTION_SECONDS / 10:
+                last_purge = time.monotonic()
+                await storage.purge_finished_jobs(time.time() - JOB_RETENTION_SECONDS)
+            _evict_finished()
+        except Exception as e:
+            print(f"Council job worker error: {e}")
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+def start_worker():
+    """Start this process's queue worker."""
+    global _worker_task
+    if _worker_task is None:
+        _worker_task = asyncio.create_task(_worker_loop())
+
+
+async def shutdown_jobs():
+    """Stop the worker and put its running jobs back on the queue."""
+    global _worker_task
+    tasks = [job.task for job in _jobs.values() if job.task is not None and not job.task.done()]
+    if _worker_task is not None:
+        tasks.append(_worker_task)
+        _worker_task = None
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _jobs.clear()
+
+
+async def _save_message(conversation_id: str, seq: int, save, matches) -> None:
+    """
+    Append a message at position `seq`, tolerating a retry of the same write.
+
+    A job resumed after a crash may find its message already stored (the
+    crash hit between the write and the checkpoint); anything else at
+    that position means the conversation changed under the job.
+    """
+    try:
+        await save(seq)
+    except ConflictError:
+        stored = await storage.get_messages(conversation_id, seq)
+        if not stored or not matches(stored[0]):
+            raise
+
+
+async def _run_job(job: CouncilJob, checkpoint: Dict[str, Any]):
+    """Run the council turn, publishing events and checkpointing each stage."""
+    conversation_id = job.conversation_id
+    content = job.request["content"]
+    base_count = checkpoint["message_count"]
+    timings = start_turn()
+    # Calls made before a restart were paid for too
+    timings["calls"].extend(checkpoint.get("calls", []))
+
+    async def save_checkpoint():
+        checkpoint["calls"] = list(timings["calls"])
+        await storage.save_job_checkpoint(job.id, WORKER_ID, checkpoint, JOB_LEASE_SECONDS)
+
+    async def emit(event: Dict[str, Any]):
+        # Stage events are also stored for followers on other workers
+        job.publish(event)
+        await storage.add_job_event(job.id, job.last_event_id, event)
+
+    title_task = None
+    try:
+        is_first_message = base_count == 0
+        if "history" not in checkpoint:
+            # Earlier turns for context (built before this message is stored)
+            checkpoint["history"] = [] if is_first_message else await build_history(conversation_id)
+            await save_checkpoint()
+        history = checkpoint["history"]
+
+        if not checkpoint.get("user_message_saved"):
+            await _save_message(
+                conversation_id,
+                base_count,
+                lambda seq: storage.add_user_message(conversation_id, content, expected_count=seq),
+                lambda message: message == {"role": "user", "content": content}
+            )
+            checkpoint["user_message_saved"] = True
+            await save_checkpoint()
+
+        # Start title generation in parallel (don't await yet), with a
+        # local title in place until it arrives
+        if is_first_message:
+            await storage.update_conversation_title(conversation_id, heuristic_title(content))
+            title_task = asyncio.create_task(generate_conversation_title(content))
+
+        # Pick the council once so Stage 1 and Stage 2 use the same members
+        if "council_models" not in checkpoint:
+            checkpoint["council_models"] = await choose_council(content, job.request.get("council_models"))
+        council_models = checkpoint["council_models"]
+
+        # Stage 1: Collect responses, streaming per-model deltas
+        await emit({'type': 'stage1_start', 'models': council_models})
+        if "stage1" not in checkpoint:
+            checkpoint["stage1"] = await stage1_collect_responses(
+                content,
+                council_models,
+                on_delta=lambda model, delta: job.publish(
+                    {'type': 'stage1_delta', 'model': model, 'delta': delta}
+                ),
+                history=history
+            )
+            await save_checkpoint()
+        stage1_results = checkpoint["stage1"]
+        await emit({'type': 'stage1_complete', 'data': stage1_results})
+
+        # Consensus fast path: skip peer review (and optionally the chairman)
+        consensus = check_consensus(stage1_results)
+        if consensus is not None:
+            await emit({'type': 'consensus_fast_path', 'data': consensus})
+
+        # Stage 2: Collect rankings
+        if consensus is None:
+            await emit({'type': 'stage2_start'})
+            if "stage2" not in checkpoint:
+                checkpoint["stage2"], checkpoint["label_to_model"] = await stage2_collect_rankings(
+                    content,
+                    stage1_results,
+                    council_models
+                )
+                await save_checkpoint()
+            stage2_results, label_to_model = checkpoint["stage2"], checkpoint["label_to_model"]
+            aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+            await emit({
+                'type': 'stage2_complete',
+                'data': stage2_results,
+                'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}
+            })
+        else:
+            stage2_results = []
+
+        # Stage 3: Synthesize final answer
+        if consensus is not None and consensus['skip_chairman']:
+            stage3_result = consensus_final_answer(stage1_results, consensus)
+        else:
+            await emit({'type': 'stage3_start'})
+            if "stage3" not in checkpoint:
+                checkpoint["stage3"] = await stage3_synthesize_final(
+                    content,
+                    stage1_results,
+                    stage2_results,
+                    job.request.get("chairman_model"),
+                    on_delta=lambda model, delta: job.publish(
+                        {'type': 'stage3_delta', 'model': model, 'delta': delta}
+                    ),
+                    history=history,
+                    consensus=consensus is not None
+                )
+                await save_checkpoint()
+            stage3_result = checkpoint["stage3"]
+        if consensus is not None:
+            stage3_result['consensus'] = consensus
+        await emit({'type': 'stage3_complete', 'data': stage3_result})
+
+        # Wait for title generation if it was started
+        if title_task:
+            title = await title_task
+            await storage.update_conversation_title(conversation_id, title)
+            await emit({'type': 'title_complete', 'data': {'title': title}})
+
+        # Save complete assistant message (unless a crash hit right after saving it)
+        turn_timings = finish_turn(timings)
+        usage = summarize_usage(turn_timings["calls"])
+        await _save_message(
+            conversation_id,
+            base_count + 1,
+            lambda seq: storage.add_assistant_message(
+                conversation_id,
+                stage1_results,
+                stage2_results,
+                stage3_result,
+                turn_timings,
+                usage,
+                expected_count=seq
+            ),
+            lambda message: message["role"] == "assistant"
+        )
+
+        # Send completion event
+        await emit({'type': 'complete', 'timings': turn_timings, 'usage': usage})
+        await storage.finish_job(job.id, WORKER_ID, "complete")
+
+    except asyncio.CancelledError:
+        # Shutting down (or the job was taken over): back on the queue,
+        # with the calls interrupted mid-stage counted as spent
+        if title_task:
+            title_task.cancel()
+        checkpoint["calls"] = list(timings["calls"])
+        try:
+            await storage.release_job(job.id, WORKER_ID, checkpoint)
+        except ConflictError:
+            pass
+        job.release()
+        raise
+
+    except Exception as e:
+        if title_task:
+            title_task.cancel()
+        print(f"Council job {job.id} failed: {e}")
+        try:
+            await emit({'type': 'error', 'message': str(e)})
+            await storage.finish_job(job.id, WORKER_ID, "error")
+        except ConflictError:
+            job.release()
+        return
+
+    # Fold turns that left the history window into the summary
+    await update_history_summary(conversation_id)
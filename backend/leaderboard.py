@@ -0,0 +1,267 @@
+"""Leaderboard over all stored council turns.
+
+Every stored assistant message holds the Stage 1 answers (whose order
+defines the Response A/B/C labels) and the Stage 2 reviews. This module
+folds them into a materialized summary, kept in the storage `aggregates`
+table and updated incrementally: each refresh only reads messages added
+since the previous one. From the summary it reports, per model:
+
+- win rate: share of turns where it topped the aggregate ranking
+- average rank: mean position given by judges
+- Elo: sequential Elo over every pairwise judge preference
+- Bradley-Terry: strengths fitted to the pairwise preference counts
+- self-preference bias: how much better a model ranks itself than its
+  peers rank it (in positions; positive = self-favouring)
+
+Usage:
+    uv run python -m backend.leaderboard [--method mean] [--rebuild] [--json]
+"""
+
+import argparse
+import json
+import math
+from itertools import combinations
+from typing import List, Dict, Any, Optional
+from . import storage
+from . import async_storage
+from .ranking import METHODS, RankingMatrix, aggregate, labels_for
+from .config import RANKING_METHOD
+
+ELO_INITIAL = 1000.0
+ELO_K = 16.0
+
+# Bradley-Terry fitting (MM iterations) and the pseudo-count added to
+# every pair that has met, so unbeaten or winless models stay finite
+BT_ITERATIONS = 200
+BT_PRIOR = 0.5
+
+
+def aggregate_name(method: str) -> str:
+    """Storage name of the leaderboard summary for a ranking method."""
+    return f"leaderboard_{method}"
+
+
+def _empty_model() -> Dict[str, Any]:
+    return {
+        "turns": 0,
+        "wins": 0,
+        "rank_sum": 0,
+        "votes": 0,
+        "elo": ELO_INITIAL,
+        "self_rank_sum": 0,
+        "self_votes": 0,
+        "peer_rank_sum": 0,
+        "peer_votes": 0,
+    }
+
+
+def make_apply(method: str):
+    """
+    Build the storage.update_aggregate callback for a ranking method.
+
+    The callback folds one stored message into the summary state.
+    """
+    def apply(
+        state: Optional[Dict[str, Any]],
+        conversation_id: str,
+        seq: int,
+        message: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if state is None:
+            state = {"method": method, "turns": 0, "models": {}, "pairwise": {}}
+
+        if message.get("role") != "assistant" or not message.get("stage2"):
+            return state
+
+        matrix = RankingMatrix.from_stage2(message["stage2"], labels_for(message.get("stage1") or []))
+        add_turn(state, matrix, method)
+        return state
+
+    return apply
+
+
+def add_turn(state: Dict[str, Any], matrix: RankingMatrix, method: str):
+    """Fold one turn's ranking matrix into the summary state."""
+    candidates = matrix.candidates
+    n = len(candidates)
+    if n < 2:
+        return
+
+    models = state["models"]
+    pairwise = state["pairwise"]
+    for model in candidates:
+        if model not in models:
+            models[model] = _empty_model()
+        models[model]["turns"] += 1
+
+    ranking = aggregate(matrix, method)
+    if not ranking:
+        return
+    state["turns"] += 1
+    models[ranking[0]["model"]]["wins"] += 1
+
+    for j, judge in enumerate(matrix.judges):
+        row = matrix.positions[j * n:(j + 1) * n]
+
+        for c, position in enumerate(row):
+            if not position:
+                continue
+            stats = models[candidates[c]]
+            stats["rank_sum"] += position
+            stats["votes"] += 1
+            if candidates[c] == judge:
+                stats["self_rank_sum"] += position
+                stats["self_votes"] += 1
+            else:
+                stats["peer_rank_sum"] += position
+                stats["peer_votes"] += 1
+
+        # Every pairwise preference this judge expressed is one Elo game
+        for a, b in combinations(range(n), 2):
+            pa, pb = row[a], row[b]
+            if not pa and not pb:
+                continue
+            winner, loser = (a, b) if pa and (not pb or pa < pb) else (b, a)
+            w, l = candidates[winner], candidates[loser]
+            pairwise.setdefault(w, {})[l] = pairwise.get(w, {}).get(l, 0) + 1
+
+            expected = 1.0 / (1.0 + 10 ** ((models[l]["elo"] - models[w]["elo"]) / 400.0))
+            models[w]["elo"] += ELO_K * (1.0 - expected)
+            models[l]["elo"] -= ELO_K * (1.0 - expected)
+
+
+def bradley_terry(pairwise: Dict[str, Dict[str, int]]) -> Dict[str, float]:
+    """
+    Fit Bradley-Terry strengths to pairwise win counts.
+
+    Args:
+        pairwise: `pairwise[a][b]` = times a was preferred over b
+
+    Returns:
+        Ratings on the Elo scale (400 * log10 strength, mean 1000)
+    """
+    players = sorted(set(pairwise) | {b for wins in pairwise.values() for b in wins})
+    if not players:
+        return {}
+
+    def wins(a: str, b: str) -> float:
+        return pairwise.get(a, {}).get(b, 0)
+
+    games = {
+        (a, b): wins(a, b) + wins(b, a) + 2 * BT_PRIOR
+        for a, b in combinations(players, 2)
+        if wins(a, b) + wins(b, a) > 0
+    }
+    total_wins = {
+        a: sum(wins(a, b) for b in players) + BT_PRIOR * sum(1 for pair in games if a in pair)
+        for a in players
+    }
+
+    strength = {a: 1.0 for a in players}
+    for _ in range(BT_ITERATIONS):
+        updated = {}
+        for a in players:
+            denominator = sum(
+                count / (strength[a] + strength[b if a == x else x])
+                for (x, b), count in games.items()
+                if a in (x, b)
+            )
+            updated[a] = total_wins[a] / denominator if denominator else strength[a]
+        mean_log = sum(math.log(v) for v in updated.values()) / len(updated)
+        strength = {a: v / math.exp(mean_log) for a, v in updated.items()}
+
+    return {a: 1000.0 + 400.0 * math.log10(v) for a, v in strength.items()}
+
+
+def summarize(state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Turn the materialized summary into leaderboard rows.
+
+    Returns:
+        Dict with 'method', 'turns' and 'models' (sorted by Bradley-Terry rating)
+    """
+    if state is None:
+        return {"method": None, "turns": 0, "models": []}
+
+    bt = bradley_terry(state["pairwise"])
+    rows = []
+    for model, stats in state["models"].items():
+        self_rank = stats["self_rank_sum"] / stats["self_votes"] if stats["self_votes"] else None
+        peer_rank = stats["peer_rank_sum"] / stats["peer_votes"] if stats["peer_votes"] else None
+        rows.append({
+            "model": model,
+            "turns": stats["turns"],
+            "wins": stats["wins"],
+            "win_rate": round(stats["wins"] / stats["turns"], 4) if stats["turns"] else 0.0,
+            "average_rank": round(stats["rank_sum"] / stats["votes"], 2) if stats["votes"] else None,
+            "elo": round(stats["elo"], 1),
+            "bradley_terry": round(bt.get(model, 1000.0), 1),
+            "self_preference_bias": (
+                round(peer_rank - self_rank, 2)
+                if self_rank is not None and peer_rank is not None else None
+            ),
+        })
+
+    rows.sort(key=lambda row: -row["bradley_terry"])
+    return {"method": state["method"], "turns": state["turns"], "models": rows}
+
+
+def refresh(method: str = RANKING_METHOD, rebuild: bool = False) -> Dict[str, Any]:
+    """
+    Bring the materialized summary up to date and return the leaderboard.
+
+    Args:
+        method: Ranking method used to decide each turn's winner
+        rebuild: Discard the summary and rescan every conversation
+
+    Returns:
+        Leaderboard dict (see summarize)
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown ranking method: {method}")
+
+    name = aggregate_name(method)
+    if rebuild:
+        storage.reset_aggregate(name)
+    storage.update_aggregate(name, make_apply(method))
+    return summarize(storage.get_aggregate(name))
+
+
+async def get_leaderboard(method: str = RANKING_METHOD) -> Dict[str, Any]:
+    """Async variant of refresh for the API; runs storage work off the event loop."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown ranking method: {method}")
+
+    name = aggregate_name(method)
+    await async_storage.update_aggregate(name, make_apply(method))
+    return summarize(await async_storage.get_aggregate(name))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Model leaderboard from stored council turns")
+    parser.add_argument("--method", default=RANKING_METHOD, choices=METHODS,
+                        help="ranking method that decides each turn's winner")
+    parser.add_argument("--rebuild", action="store_true", help="rescan all conversations")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    leaderboard = refresh(args.method, args.rebuild)
+
+    if args.json:
+        print(json.dumps(leaderboard, indent=2))
+        return
+
+    print(f"{leaderboard['turns']} ranked turns (method: {leaderboard['method']})\n")
+    print(f"{'model':<40} {'turns':>6} {'win%':>6} {'avg rank':>8} {'elo':>7} {'bt':>7} {'self bias':>9}")
+    for row in leaderboard["models"]:
+        bias = row["self_preference_bias"]
+        average_rank = row["average_rank"]
+        print(
+            f"{row['model']:<40} {row['turns']:>6} {row['win_rate'] * 100:>5.1f}% "
+            f"{average_rank if average_rank is not None else '-':>8} {row['elo']:>7.1f} "
+            f"{row['bradley_terry']:>7.1f} {bias if bias is not None else '-':>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
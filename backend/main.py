@@ -1,20 +1,41 @@
 """FastAPI backend for LLM Council."""
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any
+import os
+import re
 import uuid
 import json
 import asyncio
 
-from . import storage
-from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings
-from .providers import get_provider_status
-from .config import COUNCIL_MODELS, CHAIRMAN_MODEL, LLM_MODE, AVAILABLE_MODELS, CHAIRMAN_ELIGIBLE_MODELS
+from . import async_storage as storage
+from . import openrouter
+from .jobs import start_job, follow_job, wait_for_result, get_job_info, start_worker, shutdown_jobs
+from .leaderboard import get_leaderboard
+from .batch import read_items, run_batch_to_file
+from .telemetry import render_metrics
+from .providers import get_provider_status, close_providers, get_cache_stats, get_response_cache, get_singleflight_stats, get_scheduler_stats, get_hedging_stats
+from .config import COUNCIL_MODELS, CHAIRMAN_MODEL, LLM_MODE, AVAILABLE_MODELS, CHAIRMAN_ELIGIBLE_MODELS, RANKING_METHOD, BATCH_DIR, BATCH_CONCURRENCY, WORKERS
 
-app = FastAPI(title="LLM Council API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: start the council job worker on startup;
+    requeue running jobs and close pooled HTTP clients and storage threads
+    on shutdown."""
+    start_worker()
+    yield
+    await shutdown_jobs()
+    await close_providers()
+    await openrouter.aclose()
+    storage.shutdown()
+
+
+app = FastAPI(title="LLM Council API", lifespan=lifespan)
 
 # Enable CORS for local development
 app.add_middleware(
@@ -23,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Batch-Id", "X-Job-Id"],
 )
 
 
@@ -72,6 +94,114 @@ async def get_providers():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: stage, provider, queue and time-to-first-token latencies."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Get response cache hit/miss counters and tier sizes."""
+    return get_cache_stats()
+
+
+@app.get("/api/singleflight/stats")
+async def singleflight_stats():
+    """Get counters for coalesced duplicate model queries."""
+    return get_singleflight_stats()
+
+
+@app.get("/api/scheduler/stats")
+async def scheduler_stats():
+    """Get per-provider queue wait, in-flight and retry counters."""
+    return get_scheduler_stats()
+
+
+@app.get("/api/hedging/stats")
+async def hedging_stats():
+    """Get hedge rate, hedge wins and per-provider hedge delays."""
+    return get_hedging_stats()
+
+
+@app.get("/api/leaderboard")
+async def leaderboard(method: str = Query(RANKING_METHOD)):
+    """
+    Get per-model win rate, average rank, Elo, Bradley-Terry rating and
+    self-preference bias across all stored turns.
+
+    The summary is materialized in storage; each request only folds in
+    messages added since the previous one.
+    """
+    try:
+        return await get_leaderboard(method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+BATCH_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _batch_path(batch_id: str) -> str:
+    """Results file for a batch, rejecting IDs that could escape BATCH_DIR."""
+    if not BATCH_ID_RE.match(batch_id):
+        raise HTTPException(status_code=400, detail="Invalid batch id")
+    return os.path.join(BATCH_DIR, f"{batch_id}.jsonl")
+
+
+@app.post("/api/batch")
+async def run_batch(
+    request: Request,
+    batch_id: str = Query(None),
+    concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=256)
+):
+    """
+    Run a JSONL body of prompts through the council without creating
+    conversations, streaming results back as JSONL as they finish.
+
+    Results are also saved under the batch id (returned in X-Batch-Id);
+    posting the same prompts with that batch_id resumes an interrupted
+    run, skipping prompts that already succeeded.
+    """
+    batch_id = batch_id or str(uuid.uuid4())
+    path = _batch_path(batch_id)
+    body = (await request.body()).decode()
+
+    async def result_lines():
+        async for result in run_batch_to_file(read_items(body.splitlines()), path, concurrency):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(
+        result_lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch_id}
+    )
+
+
+@app.get("/api/batch/{batch_id}")
+async def get_batch_results(batch_id: str):
+    """Get every result saved for a batch as JSONL."""
+    path = _batch_path(batch_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    def read_results() -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    return Response(await asyncio.to_thread(read_results), media_type="application/x-ndjson")
+
+
+@app.delete("/api/cache")
+async def clear_cache():
+    """Remove all cached model responses."""
+    cache = get_response_cache()
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Response cache is disabled")
+    await asyncio.to_thread(cache.clear)
+    return {"status": "cleared"}
+
+
 @app.get("/api/models")
 async def get_models():
     """
@@ -103,64 +233,85 @@ async def get_models():
 
 
 @app.get("/api/conversations", response_model=List[ConversationMetadata])
-async def list_conversations():
-    """List all conversations (metadata only)."""
-    return storage.list_conversations()
+async def list_conversations(
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = None
+):
+    """
+    List conversations newest first (metadata only).
+
+    Paginate with `limit`; when more results exist, the cursor for the
+    next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        conversations = await storage.list_conversations(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if limit is not None and len(conversations) == limit:
+        last = conversations[-1]
+        response.headers["X-Next-Cursor"] = storage.encode_cursor(last["created_at"], last["id"])
+
+    return conversations
 
 
 @app.post("/api/conversations", response_model=Conversation)
 async def create_conversation(request: CreateConversationRequest):
     """Create a new conversation."""
     conversation_id = str(uuid.uuid4())
-    conversation = storage.create_conversation(conversation_id)
+    conversation = await storage.create_conversation(conversation_id)
     return conversation
 
 
 @app.get("/api/conversations/{conversation_id}", response_model=Conversation)
 async def get_conversation(conversation_id: str):
     """Get a specific conversation with all its messages."""
-    conversation = storage.get_conversation(conversation_id)
+    conversation = await storage.get_conversation(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return conversation
 
 
+async def queue_council_job(conversation_id: str, request: SendMessageRequest) -> str:
+    """Queue a council turn for a conversation, mapping storage errors to HTTP ones."""
+    try:
+        return await start_job(conversation_id, request.model_dump())
+    except storage.ConflictError:
+        raise HTTPException(status_code=409, detail="A council run is already in progress for this conversation")
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+
+@app.get("/api/conversations/{conversation_id}/messages/{index}/stage2")
+async def get_message_stage2(conversation_id: str, index: int):
+    """
+    Get one assistant message's Stage 2 evaluations with their full texts.
+
+    Conversations are returned without these texts (each Stage 2 result
+    has only its parsed ranking); the UI loads them when expanded.
+    """
+    stage2 = await storage.get_stage2(conversation_id, index)
+    if stage2 is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return stage2
+
+
 @app.post("/api/conversations/{conversation_id}/message")
 async def send_message(conversation_id: str, request: SendMessageRequest):
     """
     Send a message and run the 3-stage council process.
     Returns the complete response with all stages.
-    """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
-
-    # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
 
-    # Add user message
-    storage.add_user_message(conversation_id, request.content)
-
-    # If this is the first message, generate a title
-    if is_first_message:
-        title = await generate_conversation_title(request.content)
-        storage.update_conversation_title(conversation_id, title)
-
-    # Run the 3-stage council process
-    stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
-        request.content,
-        request.council_models,
-        request.chairman_model
-    )
+    The turn runs as a queued job (see /message/stream) and this request
+    waits for it to finish.
+    """
+    job_id = await queue_council_job(conversation_id, request)
 
-    # Add assistant message with all stages
-    storage.add_assistant_message(
-        conversation_id,
-        stage1_results,
-        stage2_results,
-        stage3_result
-    )
+    try:
+        stage1_results, stage2_results, stage3_result, metadata = await wait_for_result(job_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
     # Return the complete response with metadata
     return {
@@ -175,74 +326,57 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
 async def send_message_stream(conversation_id: str, request: SendMessageRequest):
     """
     Send a message and stream the 3-stage council process.
-    Returns Server-Sent Events as each stage completes.
+    Returns Server-Sent Events as each stage completes, plus per-model
+    token deltas (stage1_delta, stage3_delta) while Stage 1 and 3 run.
+
+    The turn runs as a background job (ID in the X-Job-Id header) that
+    keeps going if the client disconnects; reconnect through
+    /api/jobs/{job_id}/events with the last event ID received.
     """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    job_id = await queue_council_job(conversation_id, request)
+    return job_event_response(job_id, 0)
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Status of a queued, running or recently finished council job."""
+    info = await get_job_info(job_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return info
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    request: Request,
+    last_event_id: int | None = Query(None, ge=0)
+):
+    """
+    Reconnect to a council job's event stream.
+
+    Events after the Last-Event-ID header (or `last_event_id` query
+    parameter) are replayed, then live events follow. Any server worker
+    can serve this; token deltas are only sent by the one running the job.
+    """
+    if await get_job_info(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if last_event_id is None:
+        header = request.headers.get("last-event-id", "0")
+        if not header.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+        last_event_id = int(header)
+
+    return job_event_response(job_id, last_event_id)
 
-    # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
 
+def job_event_response(job_id: str, last_event_id: int) -> StreamingResponse:
+    """SSE response following a job from `last_event_id` onwards."""
     async def event_generator():
-        try:
-            # Add user message
-            storage.add_user_message(conversation_id, request.content)
-
-            # Start title generation in parallel (don't await yet)
-            title_task = None
-            if is_first_message:
-                title_task = asyncio.create_task(generate_conversation_title(request.content))
-
-            # Stage 1: Collect responses
-            yield f"data: {json.dumps({'type': 'stage1_start'})}\n\n"
-            stage1_results = await stage1_collect_responses(
-                request.content,
-                request.council_models
-            )
-            yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage1_results})}\n\n"
-
-            # Stage 2: Collect rankings
-            yield f"data: {json.dumps({'type': 'stage2_start'})}\n\n"
-            stage2_results, label_to_model = await stage2_collect_rankings(
-                request.content,
-                stage1_results,
-                request.council_models
-            )
-            aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
-            yield f"data: {json.dumps({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})}\n\n"
-
-            # Stage 3: Synthesize final answer
-            yield f"data: {json.dumps({'type': 'stage3_start'})}\n\n"
-            stage3_result = await stage3_synthesize_final(
-                request.content,
-                stage1_results,
-                stage2_results,
-                request.chairman_model
-            )
-            yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
-
-            # Wait for title generation if it was started
-            if title_task:
-                title = await title_task
-                storage.update_conversation_title(conversation_id, title)
-                yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
-
-            # Save complete assistant message
-            storage.add_assistant_message(
-                conversation_id,
-                stage1_results,
-                stage2_results,
-                stage3_result
-            )
-
-            # Send completion event
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
-
-        except Exception as e:
-            # Send error event
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        # A disconnect only ends this subscription; the job keeps running
+        async for event_id, event in follow_job(job_id, last_event_id):
+            yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
 
     return StreamingResponse(
         event_generator(),
@@ -250,10 +384,15 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            "X-Job-Id": job_id,
         }
     )
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    if WORKERS > 1:
+        # Separate processes sharing the database and the job queue
+        uvicorn.run("backend.main:app", host="0.0.0.0", port=8001, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -3,6 +3,26 @@
 import httpx
 from typing import List, Dict, Any, Optional
 from .config import OPENROUTER_API_KEY, OPENROUTER_API_URL
+from .http_pool import create_async_client
+
+# Shared pooled client, created on first use and closed by aclose()
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get the shared OpenRouter HTTP client."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_async_client()
+    return _client
+
+
+async def aclose():
+    """Close the shared OpenRouter HTTP client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 
 async def query_model(
@@ -32,21 +52,21 @@ async def query_model(
     }
 
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                OPENROUTER_API_URL,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            message = data['choices'][0]['message']
-
-            return {
-                'content': message.get('content'),
-                'reasoning_details': message.get('reasoning_details')
-            }
+        response = await get_client().post(
+            OPENROUTER_API_URL,
+            headers=headers,
+            json=payload,
+            timeout=timeout
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        message = data['choices'][0]['message']
+
+        return {
+            'content': message.get('content'),
+            'reasoning_details': message.get('reasoning_details')
+        }
 
     except Exception as e:
         print(f"Error querying model {model}: {e}")
@@ -0,0 +1,78 @@
+"""Token cost accounting.
+
+Every provider call in a turn is recorded by telemetry with its prompt
+and completion tokens (as reported by the provider, or estimated from
+text length when it reports none). This module prices those calls from
+MODEL_PRICING and adds them up per stage.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from .config import MODEL_PRICING
+
+
+def _lookup(model: str) -> Optional[Tuple[float, float]]:
+    """Prices for a model, accepting direct ids (gpt-4o) for prefixed keys."""
+    prices = MODEL_PRICING.get(model)
+    if prices is not None:
+        return prices
+    for key, value in MODEL_PRICING.items():
+        if key.split("/", 1)[-1] == model:
+            return value
+    return None
+
+
+def model_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """
+    Price one call.
+
+    Returns:
+        Cost in USD, or None if the model has no entry in MODEL_PRICING
+    """
+    prices = _lookup(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+
+
+def summarize_usage(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Add up tokens and cost per stage from a turn's call records.
+
+    Args:
+        calls: Call records from telemetry.finish_turn (the 'calls' list)
+
+    Returns:
+        Dict with 'stages' (stage -> totals) and 'total', where totals hold
+        'calls', 'prompt_tokens', 'completion_tokens' and 'cost' (USD).
+        'estimated' is set when some token counts were not reported by the
+        provider, 'unpriced' lists models missing from MODEL_PRICING.
+    """
+    stages: Dict[str, Dict[str, Any]] = {}
+    total = _empty_totals()
+    unpriced = set()
+    estimated = False
+
+    for call in calls:
+        stage = stages.setdefault(call.get("stage") or "other", _empty_totals())
+        for totals in (stage, total):
+            totals["calls"] += 1
+            totals["prompt_tokens"] += call.get("prompt_tokens", 0)
+            totals["completion_tokens"] += call.get("completion_tokens", 0)
+            totals["cost"] += call.get("cost") or 0.0
+        if call.get("cost") is None:
+            unpriced.add(call["model"])
+        estimated = estimated or call.get("estimated", False)
+
+    for totals in list(stages.values()) + [total]:
+        totals["cost"] = round(totals["cost"], 6)
+
+    summary: Dict[str, Any] = {"stages": stages, "total": total}
+    if estimated:
+        summary["estimated"] = True
+    if unpriced:
+        summary["unpriced"] = sorted(unpriced)
+    return summary
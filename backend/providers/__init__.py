@@ -2,17 +2,39 @@
 Multi-provider LLM routing system.
 
 Supports direct API calls to OpenAI, Anthropic, and Google,
-with OpenRouter as fallback for unsupported models.
+with OpenRouter as fallback for unsupported models. LLM_MODE=mock
+routes everything to a local fake provider (see mock_provider.py).
 """
 
 import os
+import time
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 
 from .openai_provider import OpenAIProvider
 from .anthropic_provider import AnthropicProvider
 from .google_provider import GoogleProvider
 from .openrouter_provider import OpenRouterProvider
+from .mock_provider import MockProvider
+from .cache import ResponseCache, MemoryLRUCache, SQLiteCache, make_cache_key
+from .singleflight import SingleFlight, DeltaFanout
+from .hedging import Hedger, LatencyTracker
+from .batching import BatchCollector
+from ..telemetry import ProviderCall
+from ..config import (
+    HEDGING_ENABLED,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_DELAY,
+    HEDGE_DEFAULT_DELAY,
+    HEDGE_MAX_RATE,
+    SINGLEFLIGHT_ENABLED,
+    CACHE_ENABLED,
+    CACHE_TTL_SECONDS,
+    CACHE_MAX_ENTRIES,
+    CACHE_DISK_PATH,
+    CACHE_DISK_MAX_ENTRIES,
+    PROVIDER_BATCH_PRICE_FACTOR,
+)
 
 
 # Initialize providers (lazy loaded on first use)
@@ -20,6 +42,24 @@ _openai_provider: Optional[OpenAIProvider] = None
 _anthropic_provider: Optional[AnthropicProvider] = None
 _google_provider: Optional[GoogleProvider] = None
 _openrouter_provider: Optional[OpenRouterProvider] = None
+_mock_provider: Optional[MockProvider] = None
+
+# Response cache (lazy loaded on first use, None when disabled)
+_response_cache: Optional[ResponseCache] = None
+
+# Coalescing of identical in-flight queries, and delta fan-out for streams
+_singleflight = SingleFlight()
+_stream_fanouts: Dict[str, DeltaFanout] = {}
+
+# Hedging between direct providers and OpenRouter (also tracks latencies)
+_hedger = Hedger(HEDGE_PERCENTILE, HEDGE_MIN_DELAY, HEDGE_DEFAULT_DELAY, HEDGE_MAX_RATE)
+
+# Provider batch API routing for offline runs (None = normal requests)
+_batch_collector: Optional[BatchCollector] = None
+
+# Full response latency per model (used by the council router)
+_model_latency: Dict[str, LatencyTracker] = {}
+MODEL_LATENCY_WINDOW = 200
 
 
 def _get_providers():
@@ -38,6 +78,84 @@ def _get_providers():
     return _openai_provider, _anthropic_provider, _google_provider, _openrouter_provider
 
 
+def _get_mock_provider() -> MockProvider:
+    """Lazy initialize the mock provider (LLM_MODE=mock only)."""
+    global _mock_provider
+
+    if _mock_provider is None:
+        _mock_provider = MockProvider()
+
+    return _mock_provider
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the shared response cache, or None if caching is disabled."""
+    global _response_cache
+
+    if not CACHE_ENABLED:
+        return None
+
+    if _response_cache is None:
+        memory = MemoryLRUCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+        disk = None
+        if CACHE_DISK_PATH:
+            disk = SQLiteCache(CACHE_DISK_PATH, CACHE_DISK_MAX_ENTRIES, CACHE_TTL_SECONDS)
+        _response_cache = ResponseCache(memory, disk)
+
+    return _response_cache
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Get response cache counters."""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    """Get single-flight counters (coalesced = provider calls saved)."""
+    return {"enabled": SINGLEFLIGHT_ENABLED, **_singleflight.stats()}
+
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    """Get queueing and retry counters for each provider."""
+    return {
+        provider.name: provider.scheduler.stats()
+        for provider in _get_providers()
+    }
+
+
+def get_hedging_stats() -> Dict[str, Any]:
+    """Get hedge rate, wins and per-provider hedge delays."""
+    return {"enabled": HEDGING_ENABLED, **_hedger.stats()}
+
+
+def use_provider_batches(collector: Optional[BatchCollector]):
+    """
+    Send queries for batch-capable providers through `collector`.
+
+    Meant for offline batch runs; pass None to go back to normal requests.
+    """
+    global _batch_collector
+    _batch_collector = collector
+
+
+def _record_model_latency(model: str, latency: float):
+    """Record how long a successful query for a model took end to end."""
+    tracker = _model_latency.get(model)
+    if tracker is None:
+        tracker = LatencyTracker(MODEL_LATENCY_WINDOW)
+        _model_latency[model] = tracker
+    tracker.record(latency)
+
+
+def get_model_latency(model: str, percentile: float = 0.5) -> Optional[float]:
+    """Observed response latency for a model in seconds, or None if unseen."""
+    tracker = _model_latency.get(model)
+    return tracker.percentile(percentile) if tracker is not None else None
+
+
 def get_llm_mode() -> str:
     """Get the LLM mode from environment."""
     return os.getenv("LLM_MODE", "openrouter").lower()
@@ -45,15 +163,34 @@ def get_llm_mode() -> str:
 
 def _detect_provider(model: str):
     """Detect which provider to use for a model."""
-    openai_prov, anthropic_prov, google_prov, openrouter_prov = _get_providers()
-
     mode = get_llm_mode()
 
+    # In mock mode, every model is simulated locally
+    if mode == "mock":
+        return _get_mock_provider()
+
+    openai_prov, anthropic_prov, google_prov, openrouter_prov = _get_providers()
+
     # In openrouter mode, always use OpenRouter
     if mode == "openrouter":
         return openrouter_prov
 
     # In direct mode, try to match provider based on model name
+    direct_prov = _detect_direct_provider(model)
+    if direct_prov is not None:
+        return direct_prov
+
+    # Fallback to OpenRouter for unsupported models (x-ai/grok, etc.)
+    if openrouter_prov.available:
+        return openrouter_prov
+
+    return None
+
+
+def _detect_direct_provider(model: str):
+    """Match a model to an available direct provider, or None."""
+    openai_prov, anthropic_prov, google_prov, _ = _get_providers()
+
     if model.startswith("openai/") or model.startswith("gpt-") or model.startswith("o1"):
         if openai_prov.available:
             return openai_prov
@@ -66,7 +203,22 @@ def _detect_provider(model: str):
         if google_prov.available:
             return google_prov
 
-    # Fallback to OpenRouter for unsupported models (x-ai/grok, etc.)
+    return None
+
+
+def _detect_hedge_provider(model: str, primary):
+    """
+    Pick the alternate route for hedging: OpenRouter for a direct call,
+    or the direct provider for an OpenRouter call.
+    """
+    if get_llm_mode() == "mock":
+        return None
+
+    openrouter_prov = _get_providers()[3]
+
+    if primary is openrouter_prov:
+        return _detect_direct_provider(model)
+
     if openrouter_prov.available:
         return openrouter_prov
 
@@ -82,7 +234,9 @@ async def query_model(
     Query a model using the appropriate provider.
 
     Automatically routes to the correct provider based on model name
-    and LLM_MODE configuration.
+    and LLM_MODE configuration. Successful responses are served from and
+    stored in the response cache when CACHE_ENABLED is set, and identical
+    concurrent queries share a single provider call.
 
     Args:
         model: Model identifier (OpenRouter or direct format)
@@ -92,31 +246,207 @@ async def query_model(
     Returns:
         Response dict with 'content' and optional 'reasoning_details', or None if failed
     """
+    cache_key = make_cache_key(model, messages)
+
+    cache = get_response_cache()
+    if cache is not None:
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+    if not SINGLEFLIGHT_ENABLED:
+        return await _query_provider(model, messages, timeout, cache_key)
+
+    response = await _singleflight.do(
+        cache_key, lambda: _query_provider(model, messages, timeout, cache_key)
+    )
+    return dict(response) if response is not None else None
+
+
+async def _query_provider(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float,
+    cache_key: str
+) -> Optional[Dict[str, Any]]:
+    """Route a query to its provider (hedged if enabled) and cache the response."""
     provider = _detect_provider(model)
 
     if provider is None:
         print(f"No available provider for model {model}")
         return None
 
-    return await provider.query(model, messages, timeout)
+    async def call(prov, emit):
+        start = time.monotonic()
+        response = await prov.query(model, messages, timeout)
+        if response is not None:
+            _hedger.record(prov.name, time.monotonic() - start)
+        return response
+
+    start = time.monotonic()
+    backup = _detect_hedge_provider(model, provider) if HEDGING_ENABLED else None
+    if _batch_collector is not None and _batch_collector.supports(provider):
+        # Offline run: queue for the provider's discounted batch API
+        # (batch turnaround says nothing about interactive latency, so it
+        # is recorded under its own provider label)
+        batch_call = ProviderCall(f"{provider.name}_batch", model, PROVIDER_BATCH_PRICE_FACTOR)
+        batch_call.acquired()
+        response = await _batch_collector.submit(provider, model, messages)
+        batch_call.finish("ok" if response is not None else "error", usage=(response or {}).get('usage'))
+    else:
+        if backup is None:
+            response = await call(provider, None)
+        else:
+            response = await _hedger.run(provider, backup, call)
+        if response is not None:
+            _record_model_latency(model, time.monotonic() - start)
+
+    cache = get_response_cache()
+    if cache is not None and response is not None:
+        await cache.set(cache_key, response)
+
+    return response
+
+
+async def query_model_stream(
+    model: str,
+    messages: List[Dict[str, str]],
+    on_delta: Callable[[str], None],
+    timeout: float = 120.0
+) -> Optional[Dict[str, Any]]:
+    """
+    Query a model with token streaming.
+
+    Each text delta is passed to `on_delta` as it arrives; the assembled
+    response is returned in the same shape as `query_model`. A caller that
+    joins an identical in-flight stream first receives the deltas emitted
+    so far.
+
+    Args:
+        model: Model identifier (OpenRouter or direct format)
+        messages: List of message dicts with 'role' and 'content'
+        on_delta: Callback invoked with each text delta
+        timeout: Request timeout in seconds
+
+    Returns:
+        Response dict with 'content' and optional 'reasoning_details', or None if failed
+    """
+    cache_key = make_cache_key(model, messages)
+
+    cache = get_response_cache()
+    if cache is not None:
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            # Replay the cached answer as a single delta
+            on_delta(cached.get('content') or '')
+            return dict(cached)
+
+    if not SINGLEFLIGHT_ENABLED:
+        return await _query_provider_stream(model, messages, on_delta, timeout, cache_key)
+
+    fanout = _stream_fanouts.get(cache_key)
+    if fanout is None:
+        fanout = DeltaFanout()
+        _stream_fanouts[cache_key] = fanout
+
+    async def run_flight():
+        try:
+            return await _query_provider_stream(model, messages, fanout.emit, timeout, cache_key)
+        finally:
+            if _stream_fanouts.get(cache_key) is fanout:
+                del _stream_fanouts[cache_key]
+
+    fanout.subscribe(on_delta)
+    try:
+        response = await _singleflight.do(f"stream:{cache_key}", run_flight)
+    finally:
+        fanout.unsubscribe(on_delta)
+
+    return dict(response) if response is not None else None
+
+
+async def _query_provider_stream(
+    model: str,
+    messages: List[Dict[str, str]],
+    on_delta: Callable[[str], None],
+    timeout: float,
+    cache_key: str
+) -> Optional[Dict[str, Any]]:
+    """Stream a query from its provider (hedged if enabled) and cache the response."""
+    provider = _detect_provider(model)
+
+    if provider is None:
+        print(f"No available provider for model {model}")
+        return None
+
+    async def call(prov, emit):
+        start = time.monotonic()
+        parts = []
+        try:
+            async for delta in prov.query_stream(model, messages, timeout):
+                if not parts:
+                    _hedger.record(prov.name, time.monotonic() - start, streaming=True)
+                parts.append(delta)
+                emit(delta)
+        except Exception as e:
+            print(f"Error streaming model {model} via {prov.name}: {e}")
+            return None
+
+        return {
+            'content': "".join(parts),
+            'reasoning_details': None
+        }
+
+    start = time.monotonic()
+    backup = _detect_hedge_provider(model, provider) if HEDGING_ENABLED else None
+    if backup is None:
+        response = await call(provider, on_delta)
+    else:
+        response = await _hedger.run(provider, backup, call, on_delta, streaming=True)
+    if response is not None:
+        _record_model_latency(model, time.monotonic() - start)
+
+    cache = get_response_cache()
+    if cache is not None and response is not None:
+        await cache.set(cache_key, response)
+
+    return response
 
 
 async def query_models_parallel(
     models: List[str],
-    messages: List[Dict[str, str]]
+    messages: List[Dict[str, str]],
+    on_delta: Optional[Callable[[str, str], None]] = None,
+    quorum: Optional[int] = None,
+    grace_period: Optional[float] = None
 ) -> Dict[str, Optional[Dict[str, Any]]]:
     """
     Query multiple models in parallel.
 
+    By default this waits for every model. With `quorum` or `grace_period`
+    set it returns early and cancels the stragglers, whose entries are None.
+
     Args:
         models: List of model identifiers
         messages: List of message dicts to send to each model
+        on_delta: Optional callback (model, delta); when given, responses are streamed
+        quorum: Return once this many models have answered successfully
+        grace_period: Return this many seconds after the first successful answer
 
     Returns:
         Dict mapping model identifier to response dict (or None if failed)
     """
     # Create tasks for all models
-    tasks = [query_model(model, messages) for model in models]
+    if on_delta is None:
+        tasks = [query_model(model, messages) for model in models]
+    else:
+        tasks = [
+            query_model_stream(model, messages, lambda delta, m=model: on_delta(m, delta))
+            for model in models
+        ]
+
+    if quorum is not None or grace_period is not None:
+        return await _gather_with_quorum(models, tasks, quorum, grace_period)
 
     # Wait for all to complete
     responses = await asyncio.gather(*tasks)
@@ -125,6 +455,71 @@ async def query_models_parallel(
     return {model: response for model, response in zip(models, responses)}
 
 
+async def _gather_with_quorum(
+    models: List[str],
+    coros: List,
+    quorum: Optional[int],
+    grace_period: Optional[float]
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Await model queries until the quorum or grace period is reached."""
+    loop = asyncio.get_running_loop()
+    task_to_model = {
+        asyncio.ensure_future(coro): model for model, coro in zip(models, coros)
+    }
+    results: Dict[str, Optional[Dict[str, Any]]] = {model: None for model in models}
+    pending = set(task_to_model)
+    successes = 0
+    deadline = None
+
+    try:
+        while pending:
+            if quorum is not None and successes >= quorum:
+                break
+
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                # Grace period expired
+                break
+
+            for task in done:
+                response = task.result()
+                results[task_to_model[task]] = response
+                if response is not None:
+                    successes += 1
+                    if deadline is None and grace_period is not None:
+                        deadline = loop.time() + grace_period
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if pending:
+        dropped = ", ".join(task_to_model[task] for task in pending)
+        print(f"Dropped straggling models: {dropped}")
+
+    return results
+
+
+async def close_providers():
+    """Close pooled connections of every initialized provider."""
+    global _openai_provider, _anthropic_provider, _google_provider, _openrouter_provider, _mock_provider
+
+    for provider in (_openai_provider, _anthropic_provider, _google_provider, _openrouter_provider, _mock_provider):
+        if provider is not None:
+            try:
+                await provider.aclose()
+            except Exception as e:
+                print(f"Error closing provider {type(provider).__name__}: {e}")
+
+    _openai_provider = None
+    _anthropic_provider = None
+    _google_provider = None
+    _openrouter_provider = None
+    _mock_provider = None
+
+
 def get_provider_status() -> Dict[str, bool]:
     """Get availability status of all providers."""
     openai_prov, anthropic_prov, google_prov, openrouter_prov = _get_providers()
@@ -1,14 +1,18 @@
 """Anthropic direct API provider."""
 
 import os
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from anthropic import AsyncAnthropic
-from .base import BaseLLMProvider
+from .base import BaseLLMProvider, make_usage
 
 
 class AnthropicProvider(BaseLLMProvider):
     """Provider for Anthropic API (Claude models)."""
 
+    name = "anthropic"
+    supports_batch = True
+
     # Model name mappings: OpenRouter format -> Anthropic format
     MODEL_MAPPINGS = {
         "anthropic/claude-3.5-sonnet": "claude-sonnet-4-20250514",
@@ -21,7 +25,8 @@ class AnthropicProvider(BaseLLMProvider):
 
     def __init__(self):
         api_key = os.getenv("ANTHROPIC_API_KEY")
-        self.client = AsyncAnthropic(api_key=api_key) if api_key else None
+        # Retries are handled by the provider scheduler
+        self.client = AsyncAnthropic(api_key=api_key, max_retries=0) if api_key else None
         self.available = api_key is not None
 
     def supports_model(self, model: str) -> bool:
@@ -39,53 +44,114 @@ class AnthropicProvider(BaseLLMProvider):
             return model[10:]
         return model
 
-    async def query(
+    def _build_request(
+        self,
+        model: str,
+        messages: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Build Messages API request kwargs from chat-style messages."""
+        # Anthropic requires separating system message
+        system_message = None
+        user_messages = []
+
+        for msg in messages:
+            if msg["role"] == "system":
+                system_message = msg["content"]
+            else:
+                user_messages.append(msg)
+
+        request_kwargs = {
+            "model": self._normalize_model(model),
+            "max_tokens": 4096,
+            "messages": user_messages,
+        }
+
+        if system_message:
+            request_kwargs["system"] = system_message
+
+        return request_kwargs
+
+    async def aclose(self):
+        """Close the SDK client's connection pool."""
+        if self.client is not None:
+            await self.client.close()
+
+    async def _query(
         self,
         model: str,
         messages: List[Dict[str, str]],
-        timeout: float = 120.0
-    ) -> Optional[Dict[str, Any]]:
+        timeout: float
+    ) -> Dict[str, Any]:
         """Query Anthropic API."""
         if not self.client:
-            print("Anthropic API key not configured")
-            return None
-
-        try:
-            normalized_model = self._normalize_model(model)
-
-            # Anthropic requires separating system message
-            system_message = None
-            user_messages = []
-
-            for msg in messages:
-                if msg["role"] == "system":
-                    system_message = msg["content"]
-                else:
-                    user_messages.append(msg)
-
-            # Build request
-            request_kwargs = {
-                "model": normalized_model,
-                "max_tokens": 4096,
-                "messages": user_messages,
-            }
+            raise RuntimeError("Anthropic API key not configured")
+
+        request_kwargs = self._build_request(model, messages)
+
+        response = await self.client.messages.create(**request_kwargs, timeout=timeout)
+
+        # Extract content from response
+        content = ""
+        for block in response.content:
+            if hasattr(block, "text"):
+                content += block.text
+
+        return {
+            'content': content,
+            'reasoning_details': None,
+            'usage': make_usage(response.usage.input_tokens, response.usage.output_tokens)
+        }
 
-            if system_message:
-                request_kwargs["system"] = system_message
+    async def _query_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float
+    ) -> AsyncIterator[str]:
+        """Stream Anthropic API response deltas."""
+        if not self.client:
+            raise RuntimeError("Anthropic API key not configured")
 
-            response = await self.client.messages.create(**request_kwargs)
+        request_kwargs = self._build_request(model, messages)
 
-            # Extract content from response
+        async with self.client.messages.stream(**request_kwargs, timeout=timeout) as stream:
+            async for text in stream.text_stream:
+                if text:
+                    yield text
+            message = await stream.get_final_message()
+            yield make_usage(message.usage.input_tokens, message.usage.output_tokens)
+
+    async def query_batch(
+        self,
+        requests: List[Tuple[str, str, List[Dict[str, str]]]],
+        poll_interval: float
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Run requests through the Message Batches API (discounted, up to 24h)."""
+        if not self.client:
+            raise RuntimeError("Anthropic API key not configured")
+
+        batch = await self.client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": self._build_request(model, messages)}
+            for custom_id, model, messages in requests
+        ])
+
+        while batch.processing_status != "ended":
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.messages.batches.retrieve(batch.id)
+
+        results: Dict[str, Optional[Dict[str, Any]]] = {custom_id: None for custom_id, _, _ in requests}
+        async for entry in await self.client.messages.batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                continue
+            message = entry.result.message
             content = ""
-            for block in response.content:
+            for block in message.content:
                 if hasattr(block, "text"):
                     content += block.text
-
-            return {
+            results[entry.custom_id] = {
                 'content': content,
-                'reasoning_details': None
+                'reasoning_details': None,
+                'usage': make_usage(message.usage.input_tokens, message.usage.output_tokens)
             }
 
-        except Exception as e:
-            print(f"Error querying Anthropic model {model}: {e}")
-            return None
+        return results
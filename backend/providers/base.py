@@ -1,13 +1,74 @@
 """Base class for LLM providers."""
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from .scheduler import ProviderScheduler, estimate_tokens
+from ..telemetry import ProviderCall
+from ..config import (
+    PROVIDER_LIMITS,
+    PROVIDER_MAX_RETRIES,
+    PROVIDER_RETRY_BASE_DELAY,
+    PROVIDER_RETRY_MAX_DELAY,
+)
+
+
+def make_usage(
+    prompt_tokens: Optional[int],
+    completion_tokens: Optional[int],
+    cost: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Normalize token usage reported by a provider.
+
+    Args:
+        prompt_tokens: Input tokens billed for the request
+        completion_tokens: Output tokens billed (including any reasoning tokens)
+        cost: Cost in USD, if the provider reports it
+
+    Returns:
+        Dict with 'prompt_tokens', 'completion_tokens' and optional 'cost',
+        or None if the provider reported nothing
+    """
+    if prompt_tokens is None and completion_tokens is None:
+        return None
+    usage: Dict[str, Any] = {
+        "prompt_tokens": int(prompt_tokens or 0),
+        "completion_tokens": int(completion_tokens or 0),
+    }
+    if cost is not None:
+        usage["cost"] = float(cost)
+    return usage
 
 
 class BaseLLMProvider(ABC):
-    """Abstract base class for LLM providers."""
+    """Abstract base class for LLM providers.
+
+    Subclasses implement `_query` (and optionally `_query_stream`), which
+    raise on failure. The public `query` / `query_stream` methods run them
+    through the provider's scheduler, which handles queueing, rate limits
+    and retries.
+    """
+
+    # Short provider name, used in logs and to look up PROVIDER_LIMITS
+    name = "provider"
+
+    @property
+    def scheduler(self) -> ProviderScheduler:
+        """Per-provider scheduler, created on first use."""
+        scheduler = getattr(self, "_scheduler", None)
+        if scheduler is None:
+            limits = PROVIDER_LIMITS.get(self.name, {"max_concurrency": 8})
+            scheduler = ProviderScheduler(
+                self.name,
+                max_retries=PROVIDER_MAX_RETRIES,
+                base_delay=PROVIDER_RETRY_BASE_DELAY,
+                max_delay=PROVIDER_RETRY_MAX_DELAY,
+                **limits
+            )
+            self._scheduler = scheduler
+        return scheduler
 
-    @abstractmethod
     async def query(
         self,
         model: str,
@@ -23,11 +84,147 @@ class BaseLLMProvider(ABC):
             timeout: Request timeout in seconds
 
         Returns:
-            Response dict with 'content' and optional 'reasoning_details', or None if failed
+            Response dict with 'content', optional 'reasoning_details' and
+            'usage' (see make_usage), or None if failed
+        """
+        tokens = estimate_tokens(messages)
+        attempt = 0
+
+        while True:
+            call = ProviderCall(self.name, model)
+            try:
+                async with self.scheduler.slot(tokens):
+                    call.acquired()
+                    response = await self._query(model, messages, timeout)
+            except asyncio.CancelledError:
+                call.finish("cancelled")
+                raise
+            except Exception as e:
+                call.finish("error")
+                if not await self.scheduler.backoff(e, attempt):
+                    print(f"Error querying {self.name} model {model}: {e}")
+                    return None
+                attempt += 1
+            else:
+                completion = response.get('content') or ''
+                call.finish("ok", tokens, (len(completion) + 3) // 4, response.get('usage'))
+                return response
+
+    async def query_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float = 120.0
+    ) -> AsyncIterator[str]:
+        """
+        Stream the LLM response as text deltas.
+
+        Unlike `query`, failures are raised rather than swallowed so the
+        caller can discard any partial output. Retries only happen before
+        the first delta has been yielded.
+
+        Args:
+            model: Model identifier
+            messages: List of message dicts with 'role' and 'content'
+            timeout: Request timeout in seconds
+
+        Yields:
+            Text deltas in order
+        """
+        tokens = estimate_tokens(messages)
+        attempt = 0
+
+        while True:
+            call = ProviderCall(self.name, model)
+            started = False
+            chars = 0
+            usage = None
+            try:
+                async with self.scheduler.slot(tokens):
+                    call.acquired()
+                    async for delta in self._query_stream(model, messages, timeout):
+                        if isinstance(delta, dict):
+                            usage = delta
+                            continue
+                        call.first_token()
+                        started = True
+                        chars += len(delta)
+                        yield delta
+            except (asyncio.CancelledError, GeneratorExit):
+                call.finish("cancelled", tokens, (chars + 3) // 4, usage)
+                raise
+            except Exception as e:
+                call.finish("error", tokens, (chars + 3) // 4, usage)
+                if started or not await self.scheduler.backoff(e, attempt):
+                    raise
+                attempt += 1
+            else:
+                call.finish("ok", tokens, (chars + 3) // 4, usage)
+                return
+
+    @abstractmethod
+    async def _query(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float
+    ) -> Dict[str, Any]:
+        """
+        Send one request to the provider.
+
+        Returns:
+            Response dict with 'content', optional 'reasoning_details' and
+            optional 'usage' (built with make_usage)
+
+        Raises:
+            Exception: Any API or transport error (classified for retry)
         """
         pass
 
+    async def _query_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float
+    ) -> AsyncIterator[str]:
+        """
+        Send one streaming request to the provider.
+
+        Yields text deltas; a provider that learns the request's usage at
+        the end of the stream yields it last, as a make_usage dict (it is
+        recorded, not passed on to callers). The default implementation
+        falls back to a single delta holding the full response.
+        """
+        response = await self._query(model, messages, timeout)
+        yield response.get('content') or ''
+        if response.get('usage'):
+            yield response['usage']
+
+    # Whether the provider offers an asynchronous (discounted) batch API
+    supports_batch = False
+
+    async def query_batch(
+        self,
+        requests: List[Tuple[str, str, List[Dict[str, str]]]],
+        poll_interval: float
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Run requests through the provider's batch API and wait for results.
+
+        Args:
+            requests: (custom_id, model, messages) tuples
+            poll_interval: Seconds between batch status checks
+
+        Returns:
+            Map of custom_id to response dict, or None for failed requests
+        """
+        raise NotImplementedError(f"{self.name} has no batch API")
+
     @abstractmethod
     def supports_model(self, model: str) -> bool:
         """Check if this provider supports the given model."""
         pass
+
+    async def aclose(self):
+        """Release any pooled connections held by the provider."""
+        pass
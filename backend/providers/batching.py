@@ -0,0 +1,95 @@
+"""Route model queries through discounted provider batch APIs.
+
+OpenAI and Anthropic accept asynchronous batches at a discount, with
+results arriving minutes to hours later. That suits offline evaluation
+runs, where many prompts go through the council at once: every prompt's
+Stage 1 queries are issued together, then every Stage 2 query, and so on.
+The collector gathers queries for batch-capable providers over a short
+window, submits them as one batch per provider and resolves each caller
+with its own result, so the council code runs unchanged.
+"""
+
+import asyncio
+import itertools
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class BatchCollector:
+    """Collects concurrent queries and submits them as provider batches."""
+
+    def __init__(self, window: float, poll_interval: float, max_requests: int = 10000):
+        self.window = window
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests
+        self._pending: Dict[str, List[Tuple[str, str, List[Dict[str, str]], asyncio.Future]]] = {}
+        self._flushers: Dict[str, asyncio.Task] = {}
+        self._ids = itertools.count()
+
+        self.batches = 0
+        self.requests = 0
+
+    def supports(self, provider: Any) -> bool:
+        """Whether queries to this provider can be batched."""
+        return getattr(provider, "supports_batch", False)
+
+    async def submit(
+        self,
+        provider: Any,
+        model: str,
+        messages: List[Dict[str, str]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Queue a query for the provider's next batch and wait for its result.
+
+        Returns:
+            Response dict, or None if the request failed in the batch
+        """
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(provider.name, [])
+        pending.append((f"req-{next(self._ids)}", model, messages, future))
+
+        if len(pending) >= self.max_requests:
+            self._start_flush(provider, delay=0.0)
+        elif provider.name not in self._flushers:
+            self._start_flush(provider, delay=self.window)
+
+        return await future
+
+    def _start_flush(self, provider: Any, delay: float):
+        task = asyncio.create_task(self._flush(provider, delay))
+        self._flushers[provider.name] = task
+
+    async def _flush(self, provider: Any, delay: float):
+        """Wait out the collection window, then submit what has queued up."""
+        await asyncio.sleep(delay)
+
+        if self._flushers.get(provider.name) is asyncio.current_task():
+            del self._flushers[provider.name]
+        entries = self._pending.pop(provider.name, [])
+        if not entries:
+            return
+
+        self.batches += 1
+        self.requests += len(entries)
+        print(f"Submitting {provider.name} batch of {len(entries)} requests")
+
+        try:
+            results = await provider.query_batch(
+                [(custom_id, model, messages) for custom_id, model, messages, _ in entries],
+                self.poll_interval
+            )
+        except Exception as e:
+            print(f"Error running {provider.name} batch: {e}")
+            results = {}
+
+        for custom_id, _, _, future in entries:
+            if not future.done():
+                future.set_result(results.get(custom_id))
+
+    def stats(self) -> Dict[str, Any]:
+        """Batches and requests submitted so far."""
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "pending": sum(len(entries) for entries in self._pending.values()),
+        }
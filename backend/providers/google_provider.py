@@ -1,8 +1,8 @@
 """Google Gemini direct API provider."""
 
 import os
-from typing import List, Dict, Any, Optional
-from .base import BaseLLMProvider
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from .base import BaseLLMProvider, make_usage
 
 # Import conditionally to handle missing dependency gracefully
 try:
@@ -15,6 +15,8 @@ except ImportError:
 class GoogleProvider(BaseLLMProvider):
     """Provider for Google Gemini API."""
 
+    name = "google"
+
     # Model name mappings: OpenRouter format -> Gemini format
     MODEL_MAPPINGS = {
         "google/gemini-3-pro-preview": "gemini-3-pro-preview",
@@ -48,56 +50,100 @@ class GoogleProvider(BaseLLMProvider):
             return model[7:]
         return model
 
-    async def query(
+    def _build_contents(
+        self,
+        messages: List[Dict[str, str]]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Convert chat-style messages to Gemini contents.
+
+        The whole conversation is sent as one contents list, so no chat
+        session object is needed per call.
+
+        Returns:
+            Tuple of (contents, system instruction or None)
+        """
+        # Gemini uses 'user' and 'model' roles
+        contents = []
+        system_instruction = None
+
+        for msg in messages:
+            role = msg["role"]
+            content = msg["content"]
+
+            if role == "system":
+                system_instruction = content
+            elif role == "user":
+                contents.append({"role": "user", "parts": [content]})
+            elif role == "assistant":
+                contents.append({"role": "model", "parts": [content]})
+
+        return contents, system_instruction
+
+    @staticmethod
+    def _usage(response: Any) -> Optional[Dict[str, Any]]:
+        """Normalize Gemini usage_metadata (thinking tokens bill as output)."""
+        metadata = getattr(response, "usage_metadata", None)
+        if not metadata or not metadata.prompt_token_count:
+            return None
+        completion = (metadata.candidates_token_count or 0) + (getattr(metadata, "thoughts_token_count", 0) or 0)
+        return make_usage(metadata.prompt_token_count, completion)
+
+    async def _query(
         self,
         model: str,
         messages: List[Dict[str, str]],
-        timeout: float = 120.0
-    ) -> Optional[Dict[str, Any]]:
+        timeout: float
+    ) -> Dict[str, Any]:
         """Query Google Gemini API."""
         if not self.available:
-            print("Google API key not configured or google-generativeai not installed")
-            return None
-
-        try:
-            normalized_model = self._normalize_model(model)
-
-            # Create model instance
-            gemini_model = genai.GenerativeModel(normalized_model)
-
-            # Convert messages to Gemini format
-            # Gemini uses 'user' and 'model' roles
-            gemini_history = []
-            system_instruction = None
-
-            for msg in messages:
-                role = msg["role"]
-                content = msg["content"]
-
-                if role == "system":
-                    system_instruction = content
-                elif role == "user":
-                    gemini_history.append({"role": "user", "parts": [content]})
-                elif role == "assistant":
-                    gemini_history.append({"role": "model", "parts": [content]})
-
-            # If we have a system instruction, prepend to first user message
-            if system_instruction and gemini_history:
-                first_user_content = gemini_history[0]["parts"][0]
-                gemini_history[0]["parts"][0] = f"{system_instruction}\n\n{first_user_content}"
-
-            # Start chat and get response
-            chat = gemini_model.start_chat(history=gemini_history[:-1] if len(gemini_history) > 1 else [])
-
-            # Send last message
-            last_message = gemini_history[-1]["parts"][0] if gemini_history else ""
-            response = await chat.send_message_async(last_message)
-
-            return {
-                'content': response.text,
-                'reasoning_details': None
-            }
-
-        except Exception as e:
-            print(f"Error querying Google model {model}: {e}")
-            return None
+            raise RuntimeError("Google API key not configured or google-generativeai not installed")
+
+        contents, system_instruction = self._build_contents(messages)
+        # Cheap to build: the SDK shares one async client across models
+        gemini_model = genai.GenerativeModel(
+            self._normalize_model(model),
+            system_instruction=system_instruction
+        )
+
+        response = await gemini_model.generate_content_async(
+            contents,
+            request_options={"timeout": timeout}
+        )
+
+        return {
+            'content': response.text,
+            'reasoning_details': None,
+            'usage': self._usage(response)
+        }
+
+    async def _query_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float
+    ) -> AsyncIterator[str]:
+        """Stream Google Gemini API response deltas."""
+        if not self.available:
+            raise RuntimeError("Google API key not configured or google-generativeai not installed")
+
+        contents, system_instruction = self._build_contents(messages)
+        gemini_model = genai.GenerativeModel(
+            self._normalize_model(model),
+            system_instruction=system_instruction
+        )
+
+        response = await gemini_model.generate_content_async(
+            contents,
+            stream=True,
+            request_options={"timeout": timeout}
+        )
+
+        usage = None
+        async for chunk in response:
+            # Each chunk carries the running totals; the last one is final
+            usage = self._usage(chunk) or usage
+            if chunk.parts:
+                yield chunk.text
+        if usage:
+            yield usage
@@ -0,0 +1,210 @@
+"""Hedged requests across the direct providers and OpenRouter.
+
+A model can usually be reached both directly (OpenAI, Anthropic, Google)
+and through OpenRouter. When the primary route has not produced its
+first byte by that provider's observed latency percentile, a duplicate
+request is sent through the other route; whichever answers first wins
+and the loser is cancelled. Hedges are capped to a fraction of calls so
+a slow provider cannot double the total spend. A primary that fails
+before producing any output fails over to the other route.
+
+Latencies are tracked separately for streamed calls (time to the first
+delta) and plain calls (time to the whole response), since the two
+differ by the full generation time.
+"""
+
+import asyncio
+import math
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+
+class LatencyTracker:
+    """Rolling window of observed latencies for one provider."""
+
+    def __init__(self, window: int):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float):
+        self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency at quantile `p` (0-1), or None with no samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))
+        return ordered[index]
+
+
+class Hedger:
+    """Decides when to hedge and races the primary against the backup."""
+
+    def __init__(
+        self,
+        percentile: float,
+        min_delay: float,
+        default_delay: float,
+        max_rate: float,
+        min_samples: int = 20,
+        window: int = 200
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.window = window
+        # Keyed by (provider name, streaming)
+        self._latencies: Dict[Tuple[str, bool], LatencyTracker] = {}
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+        self.failovers = 0
+
+    def record(self, provider_name: str, latency: float, streaming: bool = False):
+        """Record a successful call's time to first delta (streaming) or response."""
+        key = (provider_name, streaming)
+        tracker = self._latencies.get(key)
+        if tracker is None:
+            tracker = LatencyTracker(self.window)
+            self._latencies[key] = tracker
+        tracker.record(latency)
+
+    def delay_for(self, provider_name: str, streaming: bool = False) -> float:
+        """How long to wait on a provider before hedging a call of this mode."""
+        tracker = self._latencies.get((provider_name, streaming))
+        if tracker is None or len(tracker) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def _allow_hedge(self) -> bool:
+        """Keep hedges within max_rate of all calls (allowing one to start)."""
+        return self.hedges + 1 <= self.max_rate * self.calls + 1
+
+    async def run(
+        self,
+        primary: Any,
+        backup: Any,
+        call: Callable[[Any, Callable[[str], None]], Awaitable[Optional[Any]]],
+        on_delta: Optional[Callable[[str], None]] = None,
+        streaming: bool = False
+    ) -> Optional[Any]:
+        """
+        Run `call` on the primary provider, hedging to the backup if slow.
+
+        `call(provider, emit)` must return the response (or None on
+        failure) and pass any streamed text to `emit`. The first attempt
+        to emit a delta (or to finish, for non-streaming calls) wins; only
+        the winner's deltas reach `on_delta`.
+
+        Args:
+            primary: Provider chosen by routing
+            backup: Alternative provider for the same model
+            call: Function performing the request on a given provider
+            on_delta: Optional callback for the winner's text deltas
+            streaming: Whether `call` streams, which selects the latency
+                tracker the hedge delay comes from
+
+        Returns:
+            The winning response, or None if both attempts failed
+        """
+        self.calls += 1
+        first_delta = asyncio.Event()
+        winner: Dict[str, Optional[asyncio.Task]] = {"task": None}
+        tasks: Dict[asyncio.Task, str] = {}
+
+        def make_emit(name: str) -> Callable[[str], None]:
+            def emit(delta: str):
+                task = next(t for t, n in tasks.items() if n == name)
+                if winner["task"] is None:
+                    winner["task"] = task
+                    first_delta.set()
+                    for other in tasks:
+                        if other is not task:
+                            other.cancel()
+                if winner["task"] is task and on_delta is not None:
+                    on_delta(delta)
+            return emit
+
+        primary_task = asyncio.ensure_future(call(primary, make_emit("primary")))
+        tasks[primary_task] = "primary"
+
+        first_wait = asyncio.ensure_future(first_delta.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {primary_task, first_wait},
+                timeout=self.delay_for(primary.name, streaming),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        except asyncio.CancelledError:
+            primary_task.cancel()
+            raise
+        finally:
+            first_wait.cancel()
+
+        primary_failed = (
+            primary_task.done()
+            and not primary_task.cancelled()
+            and primary_task.exception() is None
+            and primary_task.result() is None
+            and winner["task"] is None
+        )
+        if primary_failed:
+            # Primary failed outright: fail over to the other route
+            self.failovers += 1
+            backup_task = asyncio.ensure_future(call(backup, make_emit("backup")))
+            tasks[backup_task] = "backup"
+            return await backup_task
+
+        if done:
+            return await primary_task
+
+        if not self._allow_hedge():
+            self.denied += 1
+            return await primary_task
+
+        self.hedges += 1
+        backup_task = asyncio.ensure_future(call(backup, make_emit("backup")))
+        tasks[backup_task] = "backup"
+
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    result = task.result()
+                    # A failed attempt that already streamed text cannot be swapped out
+                    if result is not None or winner["task"] is task:
+                        if result is not None and task is backup_task:
+                            self.hedge_wins += 1
+                        return result
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge counters and the current per-provider hedge delays."""
+        delays: Dict[str, Dict[str, float]] = {}
+        for name, streaming in self._latencies:
+            mode = "stream" if streaming else "full"
+            delays.setdefault(name, {})[mode] = round(self.delay_for(name, streaming), 3)
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_rate": round(self.hedges / self.calls, 4) if self.calls else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "denied_by_cap": self.denied,
+            "failovers": self.failovers,
+            "max_rate": self.max_rate,
+            "delays": delays,
+        }
@@ -0,0 +1,133 @@
+"""Local fake provider for load tests and development without API keys.
+
+Selected with LLM_MODE=mock, and also behind the HTTP stub server in
+benchmarks.stub_server. Each request waits a sampled time to first
+token, then produces MOCK_RESPONSE_TOKENS of filler text at
+MOCK_TOKENS_PER_SECOND. Stage 2 review prompts get a well-formed
+"FINAL RANKING:" section in random order, so the whole council pipeline
+runs as it would against real models.
+"""
+
+import asyncio
+import random
+import re
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from .base import BaseLLMProvider, make_usage
+from .scheduler import estimate_tokens
+from ..config import (
+    MOCK_LATENCY,
+    MOCK_LATENCY_SIGMA,
+    MOCK_TOKENS_PER_SECOND,
+    MOCK_RESPONSE_TOKENS,
+    MOCK_ERROR_RATE,
+    MOCK_SEED,
+)
+
+_LABEL_RE = re.compile(r"^Response ([A-Z]):$", re.MULTILINE)
+
+WORDS = (
+    "the council considers each answer carefully and weighs evidence from several "
+    "sources before reaching a balanced conclusion about latency throughput cost "
+    "quality accuracy depth clarity trade offs in practice"
+).split()
+
+# Tokens per streamed delta
+CHUNK_TOKENS = 4
+
+
+class MockProviderError(Exception):
+    """Injected failure, classified like an HTTP 503 by the scheduler."""
+
+    status_code = 503
+
+
+class MockProvider(BaseLLMProvider):
+    """Provider that simulates model latency instead of calling an API."""
+
+    name = "mock"
+
+    def __init__(
+        self,
+        latency: float = MOCK_LATENCY,
+        latency_sigma: float = MOCK_LATENCY_SIGMA,
+        tokens_per_second: float = MOCK_TOKENS_PER_SECOND,
+        response_tokens: int = MOCK_RESPONSE_TOKENS,
+        error_rate: float = MOCK_ERROR_RATE,
+        seed: Optional[int] = MOCK_SEED
+    ):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.available = True
+
+    def supports_model(self, model: str) -> bool:
+        """The mock answers for any model."""
+        return True
+
+    def sample_latency(self) -> float:
+        """Time to first token in seconds (lognormal around `latency`)."""
+        if self.latency <= 0:
+            return 0.0
+        return self.latency * self.rng.lognormvariate(0.0, self.latency_sigma)
+
+    def _reply(self, messages: List[Dict[str, str]]) -> Tuple[List[str], Dict[str, Any]]:
+        """Build the answer as stream chunks, plus its usage."""
+        prompt = messages[-1]["content"] if messages else ""
+        words = [self.rng.choice(WORDS) for _ in range(self.response_tokens)]
+        chunks = [
+            " ".join(words[i:i + CHUNK_TOKENS]) + " "
+            for i in range(0, len(words), CHUNK_TOKENS)
+        ]
+
+        labels = _LABEL_RE.findall(prompt)
+        if labels and "FINAL RANKING" in prompt:
+            self.rng.shuffle(labels)
+            ranking = "\n".join(f"{i}. Response {label}" for i, label in enumerate(labels, start=1))
+            chunks.append(f"\n\nFINAL RANKING:\n{ranking}")
+
+        return chunks, make_usage(estimate_tokens(messages), len(words) + len(labels) * 3)
+
+    async def _query(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float
+    ) -> Dict[str, Any]:
+        """Wait out the simulated latency and return the whole answer."""
+        chunks, usage = self._reply(messages)
+        delay = self.sample_latency()
+        if self.tokens_per_second > 0:
+            delay += usage["completion_tokens"] / self.tokens_per_second
+        await asyncio.sleep(min(delay, timeout))
+
+        if self.rng.random() < self.error_rate:
+            raise MockProviderError(f"Injected failure for {model}")
+
+        return {
+            'content': "".join(chunks),
+            'reasoning_details': None,
+            'usage': usage
+        }
+
+    async def _query_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float
+    ) -> AsyncIterator[str]:
+        """Stream the answer in small chunks at the configured token rate."""
+        chunks, usage = self._reply(messages)
+        await asyncio.sleep(min(self.sample_latency(), timeout))
+
+        if self.rng.random() < self.error_rate:
+            raise MockProviderError(f"Injected failure for {model}")
+
+        interval = CHUNK_TOKENS / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for i, chunk in enumerate(chunks):
+            if i and interval:
+                await asyncio.sleep(interval)
+            yield chunk
+        yield usage
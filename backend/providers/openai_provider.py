@@ -1,14 +1,19 @@
 """OpenAI direct API provider."""
 
 import os
-from typing import List, Dict, Any, Optional
+import json
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from openai import AsyncOpenAI
-from .base import BaseLLMProvider
+from .base import BaseLLMProvider, make_usage
 
 
 class OpenAIProvider(BaseLLMProvider):
     """Provider for OpenAI API (GPT models)."""
 
+    name = "openai"
+    supports_batch = True
+
     # Model name mappings: OpenRouter format -> OpenAI format
     MODEL_MAPPINGS = {
         "openai/gpt-4o": "gpt-4o",
@@ -24,7 +29,8 @@ class OpenAIProvider(BaseLLMProvider):
 
     def __init__(self):
         api_key = os.getenv("OPENAI_API_KEY")
-        self.client = AsyncOpenAI(api_key=api_key) if api_key else None
+        # Retries are handled by the provider scheduler
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0) if api_key else None
         self.available = api_key is not None
 
     def supports_model(self, model: str) -> bool:
@@ -41,33 +47,118 @@ class OpenAIProvider(BaseLLMProvider):
         # Already in OpenAI format
         return model
 
-    async def query(
+    async def aclose(self):
+        """Close the SDK client's connection pool."""
+        if self.client is not None:
+            await self.client.close()
+
+    async def _query(
         self,
         model: str,
         messages: List[Dict[str, str]],
-        timeout: float = 120.0
-    ) -> Optional[Dict[str, Any]]:
+        timeout: float
+    ) -> Dict[str, Any]:
         """Query OpenAI API."""
         if not self.client:
-            print("OpenAI API key not configured")
-            return None
+            raise RuntimeError("OpenAI API key not configured")
+
+        normalized_model = self._normalize_model(model)
+
+        response = await self.client.chat.completions.create(
+            model=normalized_model,
+            messages=messages,
+            timeout=timeout
+        )
+
+        message = response.choices[0].message
+        usage = response.usage
+
+        return {
+            'content': message.content,
+            'reasoning_details': None,  # OpenAI doesn't expose reasoning details
+            'usage': make_usage(usage.prompt_tokens, usage.completion_tokens) if usage else None
+        }
+
+    async def _query_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float
+    ) -> AsyncIterator[str]:
+        """Stream OpenAI API response deltas."""
+        if not self.client:
+            raise RuntimeError("OpenAI API key not configured")
+
+        stream = await self.client.chat.completions.create(
+            model=self._normalize_model(model),
+            messages=messages,
+            timeout=timeout,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        async for chunk in stream:
+            # Usage arrives in a final chunk with no choices
+            if chunk.usage is not None:
+                yield make_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    async def query_batch(
+        self,
+        requests: List[Tuple[str, str, List[Dict[str, str]]]],
+        poll_interval: float
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Run chat completions through the OpenAI Batch API (discounted, up to 24h)."""
+        if not self.client:
+            raise RuntimeError("OpenAI API key not configured")
 
-        try:
-            normalized_model = self._normalize_model(model)
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self._normalize_model(model), "messages": messages},
+            })
+            for custom_id, model, messages in requests
+        ]
+        input_file = await self.client.files.create(
+            file=("council-batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
 
-            response = await self.client.chat.completions.create(
-                model=normalized_model,
-                messages=messages,
-                timeout=timeout
-            )
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
 
-            message = response.choices[0].message
+        if batch.status != "completed":
+            print(f"OpenAI batch {batch.id} ended with status {batch.status}")
 
-            return {
-                'content': message.content,
-                'reasoning_details': None  # OpenAI doesn't expose reasoning details
-            }
+        results: Dict[str, Optional[Dict[str, Any]]] = {custom_id: None for custom_id, _, _ in requests}
+        # Expired batches still return the requests that finished
+        if batch.output_file_id:
+            output = await self.client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                message = response["body"]["choices"][0]["message"]
+                usage = response["body"].get("usage") or {}
+                results[item["custom_id"]] = {
+                    'content': message.get("content"),
+                    'reasoning_details': None,
+                    'usage': make_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+                }
 
-        except Exception as e:
-            print(f"Error querying OpenAI model {model}: {e}")
-            return None
+        return results
@@ -1,34 +1,60 @@
 """OpenRouter API provider (fallback for unsupported models)."""
 
 import os
+import json
 import httpx
-from typing import List, Dict, Any, Optional
-from .base import BaseLLMProvider
+from typing import List, Dict, Any, Optional, AsyncIterator
+from .base import BaseLLMProvider, make_usage
+from ..http_pool import create_async_client
+from ..config import OPENROUTER_API_URL
 
 
 class OpenRouterProvider(BaseLLMProvider):
     """Provider for OpenRouter API (supports all models as fallback)."""
 
-    API_URL = "https://openrouter.ai/api/v1/chat/completions"
+    name = "openrouter"
+
+    API_URL = OPENROUTER_API_URL
 
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.available = self.api_key is not None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = create_async_client()
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     def supports_model(self, model: str) -> bool:
         """OpenRouter supports all models as fallback."""
         return self.available
 
-    async def query(
+    @staticmethod
+    def _usage(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Normalize an OpenAI-style usage object (OpenRouter also reports cost)."""
+        usage = data.get("usage")
+        if not usage:
+            return None
+        return make_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("cost"))
+
+    async def _query(
         self,
         model: str,
         messages: List[Dict[str, str]],
-        timeout: float = 120.0
-    ) -> Optional[Dict[str, Any]]:
+        timeout: float
+    ) -> Dict[str, Any]:
         """Query OpenRouter API."""
         if not self.api_key:
-            print("OpenRouter API key not configured")
-            return None
+            raise RuntimeError("OpenRouter API key not configured")
 
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -38,25 +64,78 @@ class OpenRouterProvider(BaseLLMProvider):
         payload = {
             "model": model,
             "messages": messages,
+            "usage": {"include": True},
         }
 
-        try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    self.API_URL,
-                    headers=headers,
-                    json=payload
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                message = data['choices'][0]['message']
-
-                return {
-                    'content': message.get('content'),
-                    'reasoning_details': message.get('reasoning_details')
-                }
-
-        except Exception as e:
-            print(f"Error querying OpenRouter model {model}: {e}")
-            return None
+        response = await self.client.post(
+            self.API_URL,
+            headers=headers,
+            json=payload,
+            timeout=timeout
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        message = data['choices'][0]['message']
+
+        return {
+            'content': message.get('content'),
+            'reasoning_details': message.get('reasoning_details'),
+            'usage': self._usage(data)
+        }
+
+    async def _query_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: float
+    ) -> AsyncIterator[str]:
+        """Stream OpenRouter API response deltas (OpenAI-compatible SSE)."""
+        if not self.api_key:
+            raise RuntimeError("OpenRouter API key not configured")
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "usage": {"include": True},
+        }
+
+        async with self.client.stream(
+            "POST",
+            self.API_URL,
+            headers=headers,
+            json=payload,
+            timeout=timeout
+        ) as response:
+            response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                # Skip blank lines and SSE comments (OpenRouter keep-alives)
+                if not line.startswith("data: "):
+                    continue
+
+                data = line[6:].strip()
+                if data == "[DONE]":
+                    break
+
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"].get("message", "OpenRouter stream error"))
+
+                # Usage accounting arrives in the last chunk
+                usage = self._usage(chunk)
+                if usage:
+                    yield usage
+
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
@@ -0,0 +1,231 @@
+"""Per-provider request scheduling: concurrency, rate limits and retries.
+
+Each provider owns a ProviderScheduler that bounds in-flight requests
+with a semaphore, paces them with token buckets for requests-per-minute
+and tokens-per-minute, and retries rate-limit (429) and server (5xx)
+errors with jittered exponential backoff that honors Retry-After. Under
+a burst, requests queue instead of failing, so council members arrive
+late rather than not at all.
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+
+# HTTP statuses worth retrying (529 is Anthropic's "overloaded")
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# Transport failures worth retrying; timeouts are not retried because the
+# request already consumed its whole time budget
+RETRYABLE_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.RemoteProtocolError, httpx.ReadError)
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt token estimate (~4 characters per token)."""
+    return sum(len(msg.get("content") or "") for msg in messages) // 4 + 1
+
+
+def _error_chain(error: BaseException):
+    """Yield an exception and its causes."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """Extract an HTTP status code from SDK or httpx exceptions."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    if status is None:
+        # google.api_core exceptions expose the HTTP status as `code`
+        code = getattr(error, "code", None)
+        status = code if isinstance(code, int) else None
+    return int(status) if status is not None else None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Read a Retry-After delay (seconds or HTTP date) from an error response."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: BaseException) -> Tuple[bool, Optional[int], Optional[float]]:
+    """
+    Decide whether a provider error is retryable.
+
+    Returns:
+        Tuple of (retryable, status code, Retry-After seconds)
+    """
+    for err in _error_chain(error):
+        status = _status_code(err)
+        if status is not None:
+            return status in RETRYABLE_STATUSES, status, _retry_after(err)
+        if isinstance(err, RETRYABLE_TRANSPORT_ERRORS):
+            return True, None, None
+    return False, None, None
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.tokens = rate_per_minute
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` tokens are available and take them."""
+        # A request larger than the bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class ProviderScheduler:
+    """Concurrency limit, rate limits and retry policy for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        # Provider-wide pause after a 429 with Retry-After
+        self._paused_until = 0.0
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0):
+        """
+        Hold a request slot: waits for concurrency, pauses and rate limits.
+
+        Args:
+            tokens: Estimated tokens the request will consume (for TPM)
+        """
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        try:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            if self._requests is not None:
+                await self._requests.acquire(1)
+            if self._tokens is not None and tokens:
+                await self._tokens.acquire(tokens)
+
+            wait = time.monotonic() - queued_at
+            self.requests += 1
+            self.queue_wait_total += wait
+            self.queue_wait_max = max(self.queue_wait_max, wait)
+
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+        finally:
+            self._semaphore.release()
+
+    async def backoff(self, error: BaseException, attempt: int) -> bool:
+        """
+        Sleep before retrying `error`, or return False if it should not be retried.
+
+        Args:
+            error: The exception raised by the failed attempt
+            attempt: Zero-based number of the failed attempt
+        """
+        retryable, status, retry_after = classify_error(error)
+        if not retryable or attempt >= self.max_retries:
+            return False
+
+        if status == 429:
+            self.rate_limited += 1
+
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay)
+            # Every request to this provider should respect the server's pause
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        else:
+            # Full jitter exponential backoff
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+        self.retries += 1
+        print(f"Retrying {self.name} request in {delay:.1f}s (attempt {attempt + 1}, status {status})")
+        await asyncio.sleep(delay)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue and retry counters."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "queue_wait_avg_s": round(self.queue_wait_total / self.requests, 4) if self.requests else 0.0,
+            "queue_wait_max_s": round(self.queue_wait_max, 4),
+        }
@@ -0,0 +1,106 @@
+"""Single-flight coalescing of identical in-flight model queries.
+
+When the same (model, messages) query is issued while an identical one
+is still running, the newcomer waits on the running call instead of
+starting another provider request. Every waiter gets the same result or
+the same exception.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class _Call:
+    """A shared in-flight call and the number of callers waiting on it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one task."""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `factory()` once per key, sharing the result with concurrent callers.
+
+        The shared task is cancelled only when every waiter has been
+        cancelled, so one impatient caller cannot fail the others.
+
+        Args:
+            key: Identity of the call (e.g. a hash of model and messages)
+            factory: Zero-argument function returning the awaitable to run
+
+        Returns:
+            The awaitable's result (exceptions are re-raised to every waiter)
+        """
+        call = self._calls.get(key)
+        if call is None or call.task.done():
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call):
+        """Drop a finished call unless a newer one replaced it."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters; `coalesced` is the number of provider calls saved."""
+        return {
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+        }
+
+
+class DeltaFanout:
+    """Forwards streamed deltas to every subscriber of a shared stream.
+
+    Late subscribers first receive the deltas emitted so far, so every
+    caller observes the complete text.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._subscribers: List[Callable[[str], None]] = []
+
+    def emit(self, delta: str):
+        """Record a delta and pass it to all current subscribers."""
+        self._parts.append(delta)
+        for subscriber in list(self._subscribers):
+            subscriber(delta)
+
+    def subscribe(self, subscriber: Callable[[str], None]):
+        """Replay buffered deltas to a subscriber, then keep it updated."""
+        for part in self._parts:
+            subscriber(part)
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[str], None]):
+        """Stop sending deltas to a subscriber."""
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
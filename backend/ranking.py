@@ -0,0 +1,282 @@
+"""Ranking parsing and aggregation for Stage 2 peer reviews.
+
+Each judge's review is parsed once (in Stage 2) into an ordered list of
+response labels and stored as `parsed_ranking`. Aggregation works on a
+judges × candidates matrix of positions, stored row-major in a flat
+integer array, from which several voting rules are computed:
+
+- mean: average position (lower is better), the original council score
+- borda: each judge gives a candidate one point per candidate ranked below it
+- copeland: pairwise majority wins minus losses
+- kemeny: Kemeny-Young approximation (Borda start + local search), the
+  order that agrees with the most pairwise judge preferences
+"""
+
+import re
+from array import array
+from itertools import combinations
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+FINAL_RANKING_MARKER = "FINAL RANKING:"
+
+_NUMBERED_RE = re.compile(r'\d+\.\s*(Response [A-Z])')
+_LABEL_RE = re.compile(r'Response [A-Z]')
+
+METHODS = ("mean", "borda", "copeland", "kemeny")
+
+
+def parse_ranking(ranking_text: str) -> List[str]:
+    """
+    Parse the FINAL RANKING section from a judge's review.
+
+    Args:
+        ranking_text: The full text response from the model
+
+    Returns:
+        List of response labels in ranked order
+    """
+    parts = ranking_text.split(FINAL_RANKING_MARKER, 2)
+    if len(parts) >= 2:
+        ranking_section = parts[1]
+        # Numbered list format (e.g., "1. Response A")
+        numbered = _NUMBERED_RE.findall(ranking_section)
+        if numbered:
+            return numbered
+        # Fallback: all "Response X" patterns in order
+        return _LABEL_RE.findall(ranking_section)
+
+    # Fallback: any "Response X" patterns in the whole text
+    return _LABEL_RE.findall(ranking_text)
+
+
+def labels_for(stage1_results: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Rebuild the label -> model mapping Stage 2 uses (A, B, C, ... in Stage 1 order)."""
+    return {
+        f"Response {chr(65 + i)}": result['model']
+        for i, result in enumerate(stage1_results)
+    }
+
+
+class RankingMatrix:
+    """Positions of each candidate in each judge's ranking.
+
+    `positions[j * n + c]` is the 1-based position judge j gave candidate
+    c, or 0 if the judge did not rank it.
+    """
+
+    def __init__(self, candidates: List[str], judges: List[str], positions: array):
+        self.candidates = candidates
+        self.judges = judges
+        self.positions = positions
+
+    @classmethod
+    def from_stage2(
+        cls,
+        stage2_results: List[Dict[str, Any]],
+        label_to_model: Dict[str, str]
+    ) -> "RankingMatrix":
+        """
+        Build the matrix from Stage 2 results.
+
+        Uses each result's stored `parsed_ranking` and only parses the text
+        for results saved without one. Repeated or unknown labels are ignored.
+        """
+        candidates = list(dict.fromkeys(label_to_model.values()))
+        index = {label: candidates.index(model) for label, model in label_to_model.items()}
+        n = len(candidates)
+
+        judges = []
+        positions = array('i', bytes(4 * n * len(stage2_results)))
+        for j, result in enumerate(stage2_results):
+            judges.append(result.get('model', f"judge-{j}"))
+            parsed = result.get('parsed_ranking')
+            if parsed is None:
+                parsed = parse_ranking(result.get('ranking', ''))
+
+            row = j * n
+            position = 0
+            for label in parsed:
+                c = index.get(label)
+                if c is None or positions[row + c]:
+                    continue
+                position += 1
+                positions[row + c] = position
+
+        return cls(candidates, judges, positions)
+
+    def _rows(self) -> Iterator[array]:
+        n = len(self.candidates)
+        for j in range(len(self.judges)):
+            yield self.positions[j * n:(j + 1) * n]
+
+    def mean_ranks(self) -> List[Optional[float]]:
+        """Average position per candidate (None if nobody ranked it)."""
+        n = len(self.candidates)
+        totals = [0] * n
+        counts = [0] * n
+        for row in self._rows():
+            for c, position in enumerate(row):
+                if position:
+                    totals[c] += position
+                    counts[c] += 1
+        return [totals[c] / counts[c] if counts[c] else None for c in range(n)]
+
+    def counts(self) -> List[int]:
+        """Number of judges that ranked each candidate."""
+        n = len(self.candidates)
+        counts = [0] * n
+        for row in self._rows():
+            for c, position in enumerate(row):
+                if position:
+                    counts[c] += 1
+        return counts
+
+    def borda(self) -> List[float]:
+        """Borda score per candidate (higher is better)."""
+        n = len(self.candidates)
+        scores = [0.0] * n
+        for row in self._rows():
+            ranked = sum(1 for position in row if position)
+            for c, position in enumerate(row):
+                if position:
+                    scores[c] += ranked - position
+        return scores
+
+    def pairwise(self) -> List[List[int]]:
+        """`P[a][b]` = number of judges preferring candidate a over b.
+
+        A ranked candidate is preferred over an unranked one.
+        """
+        n = len(self.candidates)
+        prefs = [[0] * n for _ in range(n)]
+        for row in self._rows():
+            for a, b in combinations(range(n), 2):
+                pa, pb = row[a], row[b]
+                if pa and (not pb or pa < pb):
+                    prefs[a][b] += 1
+                elif pb and (not pa or pb < pa):
+                    prefs[b][a] += 1
+        return prefs
+
+    def copeland(self, prefs: Optional[List[List[int]]] = None) -> List[float]:
+        """Copeland score per candidate: pairwise wins minus losses."""
+        prefs = prefs or self.pairwise()
+        n = len(self.candidates)
+        scores = [0.0] * n
+        for a, b in combinations(range(n), 2):
+            if prefs[a][b] > prefs[b][a]:
+                scores[a] += 1
+                scores[b] -= 1
+            elif prefs[b][a] > prefs[a][b]:
+                scores[b] += 1
+                scores[a] -= 1
+        return scores
+
+    def kemeny_order(self, prefs: Optional[List[List[int]]] = None) -> List[int]:
+        """
+        Approximate Kemeny-Young order (candidate indices, best first).
+
+        Starts from the Borda order and moves single candidates to the
+        position that most increases pairwise agreement until no move
+        helps. Exact Kemeny is NP-hard; councils are small, so this
+        converges in a few passes.
+        """
+        prefs = prefs or self.pairwise()
+        borda = self.borda()
+        order = sorted(range(len(self.candidates)), key=lambda c: -borda[c])
+
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(order)):
+                candidate = order[i]
+                rest = order[:i] + order[i + 1:]
+                # Agreement gained by placing the candidate at each slot,
+                # relative to placing it last
+                best_slot, best_gain, gain = len(rest), 0, 0
+                for slot in range(len(rest) - 1, -1, -1):
+                    other = rest[slot]
+                    gain += prefs[candidate][other] - prefs[other][candidate]
+                    if gain > best_gain:
+                        best_slot, best_gain = slot, gain
+                current_gain = sum(
+                    prefs[candidate][other] - prefs[other][candidate]
+                    for other in rest[i:]
+                )
+                if best_gain > current_gain:
+                    order = rest[:best_slot] + [candidate] + rest[best_slot:]
+                    improved = True
+
+        return order
+
+
+def aggregate(matrix: RankingMatrix, method: str = "mean") -> List[Dict[str, Any]]:
+    """
+    Aggregate a ranking matrix with the given voting rule.
+
+    Args:
+        matrix: Judges × candidates positions
+        method: One of METHODS
+
+    Returns:
+        List of dicts with 'model', 'average_rank', 'rankings_count' and
+        'score', sorted best to worst. Candidates nobody ranked are omitted.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown ranking method: {method}")
+
+    means = matrix.mean_ranks()
+    counts = matrix.counts()
+    ranked = [c for c in range(len(matrix.candidates)) if counts[c]]
+
+    if method == "mean":
+        scores = means
+        order = sorted(ranked, key=lambda c: means[c])
+    elif method == "borda":
+        scores = matrix.borda()
+        order = sorted(ranked, key=lambda c: -scores[c])
+    elif method == "copeland":
+        scores = matrix.copeland()
+        order = sorted(ranked, key=lambda c: (-scores[c], means[c]))
+    else:
+        kemeny = [c for c in matrix.kemeny_order() if counts[c]]
+        scores = [0.0] * len(matrix.candidates)
+        for place, c in enumerate(kemeny, start=1):
+            scores[c] = float(place)
+        order = kemeny
+
+    return [
+        {
+            "model": matrix.candidates[c],
+            "average_rank": round(means[c], 2),
+            "rankings_count": counts[c],
+            "score": round(scores[c], 2),
+        }
+        for c in order
+    ]
+
+
+def rescore_messages(
+    messages: Iterable[Dict[str, Any]],
+    method: str = "mean"
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Recompute aggregate rankings for stored assistant messages.
+
+    Non-assistant messages and turns without Stage 2 results are skipped.
+    Label mappings are rebuilt from the Stage 1 order, so no metadata
+    needs to be stored.
+
+    Args:
+        messages: Stored messages (e.g. storage.iter_messages)
+        method: One of METHODS
+
+    Yields:
+        Aggregate rankings per assistant turn, in order
+    """
+    for message in messages:
+        if message.get("role") != "assistant" or not message.get("stage2"):
+            continue
+        label_to_model = labels_for(message.get("stage1") or [])
+        matrix = RankingMatrix.from_stage2(message["stage2"], label_to_model)
+        yield aggregate(matrix, method)
@@ -0,0 +1,328 @@
+"""Adaptive council selection.
+
+Every council member costs a Stage 1 answer and a Stage 2 review (which
+itself reads every answer), so a member that almost always ranks last is
+pure overhead. The router picks a smaller council per query:
+
+1. The query is put in a coarse category by a keyword classifier (no
+   model call).
+2. Each member's expected quality for that category comes from stored
+   Stage 2 ranks, shrunk towards its overall record when the category
+   has little data.
+3. Quality is penalized by observed response latency and by answer
+   length (a proxy for output-token cost).
+4. Members with too little history are always kept, so new models get
+   ranked before they can be dropped.
+
+Routing statistics are a storage aggregate (see storage.update_aggregate),
+refreshed incrementally. Running this module replays stored turns in
+order, routing each one with only the turns before it, and reports how
+much spend drops and how often the full council's winner is kept:
+
+Usage:
+    uv run python -m backend.router [--size 3] [--min-turns 20]
+"""
+
+import argparse
+import asyncio
+import re
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from . import storage
+from . import async_storage
+from .compaction import count_tokens
+from .providers import get_model_latency
+from .ranking import RankingMatrix, aggregate, labels_for
+from .config import (
+    COUNCIL_ROUTER_SIZE,
+    COUNCIL_ROUTER_MIN_TURNS,
+    COUNCIL_ROUTER_LATENCY_WEIGHT,
+    COUNCIL_ROUTER_COST_WEIGHT,
+    COUNCIL_ROUTER_REFRESH_SECONDS,
+    RANKING_METHOD,
+)
+
+ROUTER_AGGREGATE = "council_router"
+
+# Checked in order; anything else is "general"
+CATEGORY_PATTERNS = [
+    ("code", re.compile(
+        r"```|\b(code|function|class|bug|error|exception|traceback|compile|python|javascript|"
+        r"typescript|java|rust|golang|sql|regex|api|refactor)\b", re.IGNORECASE)),
+    ("math", re.compile(
+        r"\b(prove|proof|integral|derivative|equation|probability|theorem|calculate|solve)\b"
+        r"|\d\s*[-+*/^=]\s*\d", re.IGNORECASE)),
+    ("creative", re.compile(
+        r"\b(poem|story|lyrics|haiku|slogan|fiction|essay|rewrite|tone)\b", re.IGNORECASE)),
+]
+
+# Weight (in turns) of a model's overall record when estimating its
+# quality in a category
+CATEGORY_PRIOR_TURNS = 5.0
+
+
+def classify_query(query: str) -> str:
+    """Coarse query category: code, math, creative or general."""
+    for category, pattern in CATEGORY_PATTERNS:
+        if pattern.search(query or ""):
+            return category
+    return "general"
+
+
+def add_turn(
+    state: Dict[str, Any],
+    category: str,
+    matrix: RankingMatrix,
+    stage1_results: List[Dict[str, Any]]
+):
+    """Fold one ranked turn into the routing statistics."""
+    n = len(matrix.candidates)
+    if n < 2:
+        return
+
+    means = matrix.mean_ranks()
+    answer_tokens = {result['model']: count_tokens(result.get('response', '')) for result in stage1_results}
+
+    for bucket_name in (category, "all"):
+        bucket = state["categories"].setdefault(bucket_name, {})
+        for c, model in enumerate(matrix.candidates):
+            if means[c] is None:
+                continue
+            stats = bucket.setdefault(model, {"turns": 0, "quality_sum": 0.0, "tokens_sum": 0})
+            stats["turns"] += 1
+            # Normalized so 1.0 = always ranked first, 0.0 = always last
+            stats["quality_sum"] += 1.0 - (means[c] - 1.0) / (n - 1)
+            stats["tokens_sum"] += answer_tokens.get(model, 0)
+
+
+def make_apply():
+    """Build the storage.update_aggregate callback for the routing statistics."""
+    # Last user message seen in this update, per conversation: (seq, content)
+    questions: Dict[str, Tuple[int, str]] = {}
+
+    def apply(
+        state: Optional[Dict[str, Any]],
+        conversation_id: str,
+        seq: int,
+        message: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if state is None:
+            state = {"categories": {}}
+        # Left by versions that carried questions across refreshes
+        state.pop("pending_questions", None)
+
+        if message.get("role") == "user":
+            questions[conversation_id] = (seq, message.get("content", ""))
+            return state
+
+        if not message.get("stage2"):
+            return state
+
+        # A turn's question is the user message just before the answer. A
+        # refresh can run between the two (the user message is saved before
+        # the council is chosen), so it may have been applied by an earlier
+        # refresh; then it is read back from storage.
+        seen = questions.pop(conversation_id, None)
+        if seen is not None and seen[0] == seq - 1:
+            question = seen[1]
+        else:
+            previous = storage.get_message(conversation_id, seq - 1)
+            question = previous.get("content", "") if previous and previous.get("role") == "user" else ""
+
+        stage1 = message.get("stage1") or []
+        matrix = RankingMatrix.from_stage2(message["stage2"], labels_for(stage1))
+        add_turn(state, classify_query(question), matrix, stage1)
+        return state
+
+    return apply
+
+
+class CouncilRouter:
+    """Chooses a council subset from historical ranks, latency and cost."""
+
+    def __init__(
+        self,
+        size: int = COUNCIL_ROUTER_SIZE,
+        min_turns: int = COUNCIL_ROUTER_MIN_TURNS,
+        latency_weight: float = COUNCIL_ROUTER_LATENCY_WEIGHT,
+        cost_weight: float = COUNCIL_ROUTER_COST_WEIGHT,
+        refresh_seconds: float = COUNCIL_ROUTER_REFRESH_SECONDS
+    ):
+        # Peer review needs at least two answers
+        self.size = max(2, size)
+        self.min_turns = min_turns
+        self.latency_weight = latency_weight
+        self.cost_weight = cost_weight
+        self.refresh_seconds = refresh_seconds
+        self.state: Dict[str, Any] = {"categories": {}}
+        self._refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, force: bool = False):
+        """Fold newly stored turns into the statistics if they are stale."""
+        async with self._lock:
+            now = time.monotonic()
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_seconds:
+                return
+            await async_storage.update_aggregate(ROUTER_AGGREGATE, make_apply())
+            self.state = await async_storage.get_aggregate(ROUTER_AGGREGATE) or {"categories": {}}
+            self._refreshed_at = now
+
+    def _estimate(self, category: str, model: str) -> Optional[Dict[str, float]]:
+        """Expected quality and answer tokens of a model for a category."""
+        overall = self.state["categories"].get("all", {}).get(model)
+        if overall is None or overall["turns"] < self.min_turns:
+            return None
+
+        prior_quality = overall["quality_sum"] / overall["turns"]
+        stats = self.state["categories"].get(category, {}).get(model, {"turns": 0, "quality_sum": 0.0})
+        quality = (stats["quality_sum"] + CATEGORY_PRIOR_TURNS * prior_quality) / (stats["turns"] + CATEGORY_PRIOR_TURNS)
+
+        return {"quality": quality, "tokens": overall["tokens_sum"] / overall["turns"]}
+
+    def choose(
+        self,
+        query: str,
+        candidates: List[str],
+        latency: Optional[Callable[[str], Optional[float]]] = None
+    ) -> List[str]:
+        """
+        Choose the council for a query.
+
+        Args:
+            query: The user's question
+            candidates: Full council, in configured order
+            latency: Optional function returning a model's observed latency
+
+        Returns:
+            Selected models, in the candidates' order
+        """
+        if len(candidates) <= self.size:
+            return list(candidates)
+
+        category = classify_query(query)
+        estimates = {model: self._estimate(category, model) for model in candidates}
+
+        # Too little history to judge: keep, so the model gets ranked
+        exploring = [model for model in candidates if estimates[model] is None]
+        known = [model for model in candidates if estimates[model] is not None]
+
+        latencies = {model: latency(model) for model in known} if latency else {}
+        max_latency = max((v for v in latencies.values() if v), default=0.0)
+        max_tokens = max((estimates[model]["tokens"] for model in known), default=0.0)
+
+        def utility(model: str) -> float:
+            estimate = estimates[model]
+            score = estimate["quality"]
+            if max_tokens:
+                score -= self.cost_weight * estimate["tokens"] / max_tokens
+            if max_latency and latencies.get(model):
+                score -= self.latency_weight * latencies[model] / max_latency
+            return score
+
+        known.sort(key=utility, reverse=True)
+        chosen = set(exploring) | set(known[:max(0, self.size - len(exploring))])
+
+        return [model for model in candidates if model in chosen]
+
+    async def select(self, query: str, candidates: List[str]) -> List[str]:
+        """Refresh statistics if stale and choose the council for a query."""
+        await self.refresh()
+        chosen = self.choose(query, candidates, latency=get_model_latency)
+        if len(chosen) < len(candidates):
+            print(f"Council router ({classify_query(query)}): using {len(chosen)}/{len(candidates)} members: {chosen}")
+        return chosen
+
+
+_router: Optional[CouncilRouter] = None
+
+
+def get_router() -> CouncilRouter:
+    """Get the shared council router."""
+    global _router
+    if _router is None:
+        _router = CouncilRouter()
+    return _router
+
+
+def replay(router: CouncilRouter) -> Dict[str, Any]:
+    """
+    Replay stored turns oldest first, routing each with only earlier history.
+
+    Spend is estimated in tokens: Stage 1 answers plus every judge reading
+    every answer in Stage 2. Quality is proxied by whether the full
+    council's aggregate winner (which the chairman leans on most) is kept,
+    and by how far down the full ranking the best kept member sits.
+
+    Returns:
+        Dict of replay metrics
+    """
+    turns = routed = winner_kept = 0
+    regret_sum = 0
+    full_tokens = routed_tokens = 0
+    full_slowest = routed_slowest = 0
+
+    conversations = storage.list_conversations()
+    for conversation in reversed(conversations):
+        question = ""
+        for message in storage.iter_messages(conversation["id"]):
+            if message.get("role") == "user":
+                question = message.get("content", "")
+                continue
+            if not message.get("stage2"):
+                continue
+
+            stage1 = message.get("stage1") or []
+            matrix = RankingMatrix.from_stage2(message["stage2"], labels_for(stage1))
+            ranking = [row["model"] for row in aggregate(matrix, RANKING_METHOD)]
+            candidates = [result["model"] for result in stage1]
+            if len(ranking) < 2:
+                continue
+
+            chosen = router.choose(question, candidates)
+            tokens = {result["model"]: count_tokens(result.get("response", "")) for result in stage1}
+
+            turns += 1
+            routed += len(chosen) < len(candidates)
+            winner_kept += ranking[0] in chosen
+            regret_sum += min((ranking.index(m) for m in chosen if m in ranking), default=len(ranking) - 1)
+
+            # Stage 1 writes every answer; Stage 2 has each judge read all of them
+            full_answers = sum(tokens.values())
+            routed_answers = sum(tokens[m] for m in chosen)
+            full_tokens += full_answers * (1 + len(candidates))
+            routed_tokens += routed_answers * (1 + len(chosen))
+            # Stage 1 ends with its longest answer (output tokens as latency proxy)
+            full_slowest += max(tokens.values())
+            routed_slowest += max(tokens[m] for m in chosen)
+
+            add_turn(router.state, classify_query(question), matrix, stage1)
+
+    if not turns:
+        return {"turns": 0}
+
+    return {
+        "turns": turns,
+        "routed_turns": routed,
+        "winner_kept_rate": round(winner_kept / turns, 4),
+        "mean_best_kept_rank": round(1 + regret_sum / turns, 3),
+        "token_spend_ratio": round(routed_tokens / full_tokens, 4) if full_tokens else 1.0,
+        "stage1_latency_proxy_ratio": round(routed_slowest / full_slowest, 4) if full_slowest else 1.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline replay evaluation of the council router")
+    parser.add_argument("--size", type=int, default=COUNCIL_ROUTER_SIZE)
+    parser.add_argument("--min-turns", type=int, default=COUNCIL_ROUTER_MIN_TURNS)
+    parser.add_argument("--latency-weight", type=float, default=COUNCIL_ROUTER_LATENCY_WEIGHT)
+    parser.add_argument("--cost-weight", type=float, default=COUNCIL_ROUTER_COST_WEIGHT)
+    args = parser.parse_args(argv)
+
+    router = CouncilRouter(args.size, args.min_turns, args.latency_weight, args.cost_weight)
+    for key, value in replay(router).items():
+        print(f"{key:<28} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,419 @@
-"""JSON-based storage for conversations."""
+"""SQLite-based storage for conversations.
 
+Conversations are stored in a single SQLite database in WAL mode. Each
+message is its own row, so adding a message is an O(1) append instead of
+a rewrite of the whole conversation. Legacy JSON files in DATA_DIR are
+imported on first use.
+
+Messages are stored as minified JSON, compressed (zlib, or zstd when the
+zstandard package is installed) once they pass STORAGE_COMPRESS_MIN_BYTES;
+rows are decoded by their own tag, so databases with mixed encodings
+read transparently. The Stage 2 evaluation texts, most of a turn's bytes,
+are kept in a separate column that conversation loads skip; they are
+read per message with get_stage2.
+
+Several server processes can share the database. Every write runs in an
+immediate (write-locking) transaction, and each conversation carries a
+version number bumped by every write, so read-modify-write callers can
+save with a compare-and-swap on the version they read instead of
+overwriting a concurrent writer's changes.
+"""
+
+import argparse
+import base64
 import json
 import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable, Union
 from pathlib import Path
-from .config import DATA_DIR
+from .config import DATA_DIR, STORAGE_DB_PATH, STORAGE_CODEC, STORAGE_COMPRESS_MIN_BYTES
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    title TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- data is the message and details its Stage 2 evaluation texts, read
+-- only when asked for. Each value is JSON text, or a tagged compressed
+-- blob once large enough (see _encode), so a column holds both; BLOB
+-- columns store every value with its own type
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL REFERENCES conversations(id),
+    seq INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    details BLOB,
+    PRIMARY KEY (conversation_id, seq)
+);
+
+-- Running summary of the turns that have slid out of the history window;
+-- messages with seq < summarized_upto are covered by the summary
+CREATE TABLE IF NOT EXISTS conversation_context (
+    conversation_id TEXT PRIMARY KEY REFERENCES conversations(id),
+    summary TEXT NOT NULL,
+    summarized_upto INTEGER NOT NULL
+);
+
+-- Materialized aggregates over all messages (e.g. the leaderboard) and,
+-- per conversation, how many messages each one has already consumed
+CREATE TABLE IF NOT EXISTS aggregates (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS aggregate_progress (
+    name TEXT NOT NULL,
+    conversation_id TEXT NOT NULL,
+    processed_upto INTEGER NOT NULL,
+    PRIMARY KEY (name, conversation_id)
+);
+
+-- Council run queue shared by all server processes. A worker claims a
+-- queued job (or one whose lease ran out because its worker died) and
+-- keeps renewing the lease while it runs; the checkpoint holds the
+-- results of the stages already finished
+CREATE TABLE IF NOT EXISTS council_jobs (
+    id TEXT PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations(id),
+    request TEXT NOT NULL,
+    checkpoint TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    finished_at REAL
+);
+
+-- Stage events of each job (token deltas are not stored), so clients
+-- can follow a job from any worker
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    PRIMARY KEY (job_id, id)
+);
+
+-- Keyset index for newest-first listing; list cost is the page size
+CREATE INDEX IF NOT EXISTS idx_conversations_created
+    ON conversations (created_at DESC, id DESC);
+"""
+
+# Columns added after their table first shipped: (table, column, definition)
+ADDED_COLUMNS = [
+    ("conversations", "version", "INTEGER NOT NULL DEFAULT 0"),
+    ("messages", "details", "BLOB"),
+    ("council_jobs", "status", "TEXT NOT NULL DEFAULT 'queued'"),
+    ("council_jobs", "worker", "TEXT"),
+    ("council_jobs", "lease_until", "REAL NOT NULL DEFAULT 0"),
+    ("council_jobs", "finished_at", "REAL"),
+]
+
+# Columns whose declared type changed after their table first shipped:
+# (table, column, old type, new type)
+RETYPED_COLUMNS = [
+    ("messages", "data", "TEXT", "BLOB"),
+]
+
+# Indexes on added columns, created once the columns exist
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_council_jobs_status
+    ON council_jobs (status, lease_until);
+CREATE INDEX IF NOT EXISTS idx_council_jobs_conversation
+    ON council_jobs (conversation_id, status);
+"""
+
+# First byte of a compressed blob; uncompressed values are stored as text
+_TAG_ZLIB = 1
+_TAG_ZSTD = 2
+
+# Job states that still hold the conversation
+ACTIVE_JOB_STATES = ("queued", "running")
+
+
+class ConflictError(Exception):
+    """A compare-and-swap write found the data changed by another writer."""
+
+# One connection per thread; sqlite3 connections are not thread-safe
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
 
 
 def ensure_data_dir():
     """Ensure the data directory exists."""
     Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
+    Path(STORAGE_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a new database connection with WAL enabled."""
+    conn = sqlite3.connect(STORAGE_DB_PATH, timeout=30.0, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get this thread's database connection, initializing the schema once."""
+    global _initialized
+
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        ensure_data_dir()
+        conn = _connect()
+        _local.conn = conn
+
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                conn.executescript(SCHEMA)
+                _migrate(conn)
+                conn.executescript(INDEXES)
+                _import_legacy_files(conn)
+                _initialized = True
+
+    return conn
+
+
+class _transaction:
+    """Context manager for an immediate (write-locking) transaction."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
+
+
+def _migrate(conn: sqlite3.Connection):
+    """Bring databases created by earlier versions up to the current schema."""
+    # Inside a write transaction so concurrently starting workers don't
+    # both try to add the same column
+    with _transaction(conn):
+        for table, column, definition in ADDED_COLUMNS:
+            columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+        for table, column, old_type, new_type in RETYPED_COLUMNS:
+            types = {row["name"]: row["type"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if types.get(column) == old_type:
+                _retype_column(conn, table, column, old_type, new_type)
+
+
+def _retype_column(conn: sqlite3.Connection, table: str, column: str, old_type: str, new_type: str):
+    """
+    Change a column's declared type by rebuilding its table.
+
+    SQLite cannot alter a column, so the rows are copied into a table
+    created from the stored definition with the new type, which then
+    replaces the old one. Values keep their stored types.
+    """
+    sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()["sql"]
+    rebuilt = f"{table}_rebuilt"
+    sql = re.sub(rf"^CREATE TABLE \"?{table}\"?", f"CREATE TABLE {rebuilt}", sql)
+    sql = re.sub(rf"\b{column} {old_type}\b", f"{column} {new_type}", sql, count=1)
+    columns = ", ".join(row["name"] for row in conn.execute(f"PRAGMA table_info({table})"))
+
+    conn.execute(sql)
+    conn.execute(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {rebuilt} RENAME TO {table}")
+
+
+def _codec() -> str:
+    """The configured codec, falling back to zlib when zstd is unavailable."""
+    if STORAGE_CODEC == "zstd" and not ZSTD_AVAILABLE:
+        return "zlib"
+    return STORAGE_CODEC
+
+
+def _encode(value: Any) -> Union[str, bytes]:
+    """
+    Serialize a value as JSON text, compressed if large enough.
+
+    Returns:
+        The JSON as str, or as bytes when compressed: a codec tag byte
+        (_TAG_ZLIB / _TAG_ZSTD) followed by the compressed JSON
+    """
+    text = json.dumps(value, separators=(",", ":"))
+    codec = _codec()
+    if codec == "json" or len(text) < STORAGE_COMPRESS_MIN_BYTES:
+        return text
+
+    raw = text.encode()
+    if codec == "zstd":
+        return bytes([_TAG_ZSTD]) + zstandard.ZstdCompressor().compress(raw)
+    return bytes([_TAG_ZLIB]) + zlib.compress(raw)
+
+
+def _decode(data: Union[str, bytes]) -> Any:
+    """Deserialize a value written by _encode (with any codec)."""
+    if isinstance(data, str):
+        return json.loads(data)
+
+    tag, body = data[0], data[1:]
+    if tag == _TAG_ZLIB:
+        return json.loads(zlib.decompress(body))
+    if tag == _TAG_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Stored data is zstd-compressed; install the zstandard package")
+        return json.loads(zstandard.ZstdDecompressor().decompress(body))
+    raise ValueError(f"Unknown stored data encoding: {tag}")
+
+
+def _encode_message(message: Dict[str, Any]) -> Tuple[Union[str, bytes], Optional[Union[str, bytes]]]:
+    """
+    Serialize a message for storage.
+
+    Returns:
+        Tuple of (data, details): the message without its Stage 2
+        evaluation texts, and the texts (None if there are none). Each
+        is encoded by _encode, so it is JSON text or a compressed blob
+        depending on its size and the codec; rows of both kinds share
+        the BLOB-declared messages columns
+    """
+    stage2 = message.get("stage2")
+    if not stage2 or not any("ranking" in result for result in stage2):
+        return _encode(message), None
+
+    texts = [result.get("ranking") for result in stage2]
+    message = dict(message, stage2=[
+        {key: value for key, value in result.items() if key != "ranking"}
+        for result in stage2
+    ])
+    return _encode(message), _encode(texts)
+
+
+def _decode_message(data: Union[str, bytes], details: Optional[Union[str, bytes]] = None) -> Dict[str, Any]:
+    """Deserialize a stored message, restoring Stage 2 texts if `details` is given."""
+    message = _decode(data)
+    if details is not None:
+        for result, text in zip(message["stage2"], _decode(details)):
+            if text is not None:
+                result["ranking"] = text
+    return message
+
+
+def _import_legacy_files(conn: sqlite3.Connection):
+    """Import conversations saved as JSON files by earlier versions."""
+    if not os.path.isdir(DATA_DIR):
+        return
+
+    for filename in os.listdir(DATA_DIR):
+        if not filename.endswith('.json'):
+            continue
+
+        conversation_id = filename[:-5]
+        exists = conn.execute(
+            "SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        if exists:
+            continue
+
+        try:
+            with open(os.path.join(DATA_DIR, filename), 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping unreadable conversation file {filename}: {e}")
+            continue
+
+        _write_conversation(conn, data)
+
+
+def _write_conversation(
+    conn: sqlite3.Connection,
+    conversation: Dict[str, Any],
+    expected_version: Optional[int] = None
+) -> int:
+    """
+    Replace a conversation and all its messages in one transaction.
+
+    Raises:
+        ConflictError: If `expected_version` is given and the stored
+            conversation is missing or at a different version
+
+    Returns:
+        The conversation's new version
+    """
+    messages = conversation.get("messages", [])
+
+    with _transaction(conn):
+        row = conn.execute(
+            "SELECT version FROM conversations WHERE id = ?", (conversation["id"],)
+        ).fetchone()
+        if expected_version is not None and (row is None or row["version"] != expected_version):
+            raise ConflictError(
+                f"Conversation {conversation['id']} changed since version {expected_version}"
+            )
+        version = 0 if row is None else row["version"] + 1
 
+        conn.execute(
+            "INSERT INTO conversations (id, created_at, title, message_count, version) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET created_at = excluded.created_at, "
+            "title = excluded.title, message_count = excluded.message_count, "
+            "version = excluded.version",
+            (
+                conversation["id"],
+                conversation["created_at"],
+                conversation.get("title", "New Conversation"),
+                len(messages),
+                version,
+            )
+        )
+        # Messages loaded without their Stage 2 texts keep the stored ones
+        stored_details = dict(conn.execute(
+            "SELECT seq, details FROM messages WHERE conversation_id = ? AND details IS NOT NULL",
+            (conversation["id"],)
+        ).fetchall())
+        conn.execute(
+            "DELETE FROM messages WHERE conversation_id = ?", (conversation["id"],)
+        )
+        # The messages changed, so any running summary of them is stale
+        conn.execute(
+            "DELETE FROM conversation_context WHERE conversation_id = ?", (conversation["id"],)
+        )
 
-def get_conversation_path(conversation_id: str) -> str:
-    """Get the file path for a conversation."""
-    return os.path.join(DATA_DIR, f"{conversation_id}.json")
+        rows = []
+        for seq, message in enumerate(messages):
+            data, details = _encode_message(message)
+            if details is None and message.get("stage2"):
+                details = stored_details.get(seq)
+            rows.append((conversation["id"], seq, data, details))
+        conn.executemany(
+            "INSERT INTO messages (conversation_id, seq, data, details) VALUES (?, ?, ?, ?)",
+            rows
+        )
+
+    return version
 
 
 def create_conversation(conversation_id: str) -> Dict[str, Any]:
@@ -28,110 +426,290 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
     Returns:
         New conversation dict
     """
-    ensure_data_dir()
-
     conversation = {
         "id": conversation_id,
         "created_at": datetime.utcnow().isoformat(),
         "title": "New Conversation",
+        "version": 0,
         "messages": []
     }
 
-    # Save to file
-    path = get_conversation_path(conversation_id)
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    conn = get_connection()
+    conn.execute(
+        "INSERT INTO conversations (id, created_at, title, message_count) VALUES (?, ?, ?, 0)",
+        (conversation["id"], conversation["created_at"], conversation["title"])
+    )
 
     return conversation
 
 
-def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
+def get_conversation_metadata(conversation_id: str) -> Optional[Dict[str, Any]]:
     """
-    Load a conversation from storage.
+    Load a conversation's metadata without its messages.
 
     Args:
         conversation_id: Unique identifier for the conversation
 
     Returns:
-        Conversation dict or None if not found
+        Metadata dict or None if not found
+    """
+    row = get_connection().execute(
+        "SELECT id, created_at, title, message_count, version FROM conversations WHERE id = ?",
+        (conversation_id,)
+    ).fetchone()
+
+    if row is None:
+        return None
+
+    return dict(row)
+
+
+def iter_messages(
+    conversation_id: str,
+    start: int = 0,
+    stage2_text: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily iterate over a conversation's messages in order.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+        start: Index of the first message to return
+        stage2_text: Include the Stage 2 evaluation texts ('ranking');
+            without it Stage 2 results carry only their parsed rankings
+
+    Yields:
+        Message dicts
+    """
+    columns = "data, details" if stage2_text else "data, NULL AS details"
+    cursor = get_connection().execute(
+        f"SELECT {columns} FROM messages WHERE conversation_id = ? AND seq >= ? ORDER BY seq",
+        (conversation_id, start)
+    )
+    for row in cursor:
+        yield _decode_message(row["data"], row["details"])
+
+
+def get_message(conversation_id: str, seq: int) -> Optional[Dict[str, Any]]:
+    """
+    Load one message (without its Stage 2 evaluation texts).
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+        seq: Index of the message
+
+    Returns:
+        Message dict, or None if there is no such message
+    """
+    row = get_connection().execute(
+        "SELECT data FROM messages WHERE conversation_id = ? AND seq = ?",
+        (conversation_id, seq)
+    ).fetchone()
+
+    if row is None:
+        return None
+
+    return _decode_message(row["data"])
+
+
+def get_stage2(conversation_id: str, seq: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Load one message's Stage 2 results with their evaluation texts.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+        seq: Index of the message
+
+    Returns:
+        The Stage 2 results, or None if there is no such assistant message
     """
-    path = get_conversation_path(conversation_id)
+    row = get_connection().execute(
+        "SELECT data, details FROM messages WHERE conversation_id = ? AND seq = ?",
+        (conversation_id, seq)
+    ).fetchone()
 
-    if not os.path.exists(path):
+    if row is None:
         return None
 
-    with open(path, 'r') as f:
-        return json.load(f)
+    return _decode_message(row["data"], row["details"]).get("stage2")
 
 
-def save_conversation(conversation: Dict[str, Any]):
+def get_conversation(conversation_id: str, stage2_text: bool = False) -> Optional[Dict[str, Any]]:
     """
-    Save a conversation to storage.
+    Load a conversation from storage.
+
+    The metadata and messages are read in one transaction, so the
+    returned 'version' matches the messages.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+        stage2_text: Include the Stage 2 evaluation texts (see iter_messages)
+
+    Returns:
+        Conversation dict or None if not found
+    """
+    conn = get_connection()
+    conn.execute("BEGIN")
+    try:
+        metadata = get_conversation_metadata(conversation_id)
+        if metadata is None:
+            return None
+
+        return {
+            "id": metadata["id"],
+            "created_at": metadata["created_at"],
+            "title": metadata["title"],
+            "version": metadata["version"],
+            "messages": list(iter_messages(conversation_id, stage2_text=stage2_text))
+        }
+    finally:
+        conn.execute("COMMIT")
+
+
+def save_conversation(conversation: Dict[str, Any], expected_version: Optional[int] = None) -> int:
+    """
+    Save a conversation to storage, replacing any stored version.
+
+    Prefer the add_* functions, which append instead of rewriting. For a
+    read-modify-write, pass the 'version' the conversation was loaded at:
+    the save then fails instead of discarding changes another writer made
+    in between, and the caller reloads and retries.
 
     Args:
         conversation: Conversation dict to save
+        expected_version: Version the stored conversation must still be at
+
+    Returns:
+        The conversation's new version
+
+    Raises:
+        ConflictError: If the stored conversation changed since `expected_version`
     """
-    ensure_data_dir()
+    return _write_conversation(get_connection(), conversation, expected_version)
 
-    path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
 
+def encode_cursor(created_at: str, conversation_id: str) -> str:
+    """Encode a listing position as an opaque pagination cursor."""
+    raw = f"{created_at}|{conversation_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
 
-def list_conversations() -> List[Dict[str, Any]]:
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a pagination cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, conversation_id = raw.split("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, conversation_id
+
+
+def list_conversations(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """
-    List all conversations (metadata only).
+    List conversations newest first (metadata only).
+
+    Reads from the conversations table, which the write functions keep up
+    to date, so no message data is touched.
+
+    Args:
+        limit: Maximum number of conversations to return (None = all)
+        cursor: Cursor from a previous page; returns conversations after it
 
     Returns:
         List of conversation metadata dicts
     """
-    ensure_data_dir()
+    query = "SELECT id, created_at, title, message_count FROM conversations"
+    params: List[Any] = []
 
-    conversations = []
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.json'):
-            path = os.path.join(DATA_DIR, filename)
-            with open(path, 'r') as f:
-                data = json.load(f)
-                # Return metadata only
-                conversations.append({
-                    "id": data["id"],
-                    "created_at": data["created_at"],
-                    "title": data.get("title", "New Conversation"),
-                    "message_count": len(data["messages"])
-                })
+    if cursor is not None:
+        created_at, conversation_id = decode_cursor(cursor)
+        query += " WHERE (created_at, id) < (?, ?)"
+        params.extend([created_at, conversation_id])
+
+    query += " ORDER BY created_at DESC, id DESC"
+
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    rows = get_connection().execute(query, params).fetchall()
+
+    return [dict(row) for row in rows]
+
+
+def _append_message(
+    conversation_id: str,
+    message: Dict[str, Any],
+    expected_count: Optional[int] = None
+):
+    """
+    Append a message row and bump the conversation's message count and version.
+
+    The position is read and written in one immediate transaction, so
+    concurrent appends (from any process) never take the same seq.
+
+    Raises:
+        ConflictError: If `expected_count` is given and the conversation
+            holds a different number of messages
+    """
+    conn = get_connection()
+
+    with _transaction(conn):
+        row = conn.execute(
+            "SELECT message_count FROM conversations WHERE id = ?",
+            (conversation_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
 
-    # Sort by creation time, newest first
-    conversations.sort(key=lambda x: x["created_at"], reverse=True)
+        seq = row["message_count"]
+        if expected_count is not None and seq != expected_count:
+            raise ConflictError(
+                f"Conversation {conversation_id} has {seq} messages, expected {expected_count}"
+            )
 
-    return conversations
+        conn.execute(
+            "INSERT INTO messages (conversation_id, seq, data, details) VALUES (?, ?, ?, ?)",
+            (conversation_id, seq, *_encode_message(message))
+        )
+        conn.execute(
+            "UPDATE conversations SET message_count = ?, version = version + 1 WHERE id = ?",
+            (seq + 1, conversation_id)
+        )
 
 
-def add_user_message(conversation_id: str, content: str):
+def add_user_message(conversation_id: str, content: str, expected_count: Optional[int] = None):
     """
     Add a user message to a conversation.
 
     Args:
         conversation_id: Conversation identifier
         content: User message content
+        expected_count: If given, only append when the conversation holds
+            exactly this many messages (raises ConflictError otherwise)
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
-
-    conversation["messages"].append({
+    _append_message(conversation_id, {
         "role": "user",
         "content": content
-    })
-
-    save_conversation(conversation)
+    }, expected_count)
 
 
 def add_assistant_message(
     conversation_id: str,
     stage1: List[Dict[str, Any]],
     stage2: List[Dict[str, Any]],
-    stage3: Dict[str, Any]
+    stage3: Dict[str, Any],
+    timings: Optional[Dict[str, Any]] = None,
+    usage: Optional[Dict[str, Any]] = None,
+    expected_count: Optional[int] = None
 ):
     """
     Add an assistant message with all 3 stages to a conversation.
@@ -141,19 +719,23 @@ def add_assistant_message(
         stage1: List of individual model responses
         stage2: List of model rankings
         stage3: Final synthesized response
+        timings: Optional per-stage and per-call timings for the turn
+        usage: Optional token and cost totals for the turn (see pricing.py)
+        expected_count: If given, only append when the conversation holds
+            exactly this many messages (raises ConflictError otherwise)
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
-
-    conversation["messages"].append({
+    message = {
         "role": "assistant",
         "stage1": stage1,
         "stage2": stage2,
         "stage3": stage3
-    })
+    }
+    if timings is not None:
+        message["timings"] = timings
+    if usage is not None:
+        message["usage"] = usage
 
-    save_conversation(conversation)
+    _append_message(conversation_id, message, expected_count)
 
 
 def update_conversation_title(conversation_id: str, title: str):
@@ -164,9 +746,468 @@ def update_conversation_title(conversation_id: str, title: str):
         conversation_id: Conversation identifier
         title: New title for the conversation
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
+    cursor = get_connection().execute(
+        "UPDATE conversations SET title = ?, version = version + 1 WHERE id = ?",
+        (title, conversation_id)
+    )
+    if cursor.rowcount == 0:
         raise ValueError(f"Conversation {conversation_id} not found")
 
-    conversation["title"] = title
-    save_conversation(conversation)
+
+def get_context_state(conversation_id: str) -> Dict[str, Any]:
+    """
+    Load a conversation's running history summary.
+
+    Args:
+        conversation_id: Conversation identifier
+
+    Returns:
+        Dict with 'summary' and 'summarized_upto' (index of the first
+        message not covered by the summary)
+    """
+    row = get_connection().execute(
+        "SELECT summary, summarized_upto FROM conversation_context WHERE conversation_id = ?",
+        (conversation_id,)
+    ).fetchone()
+
+    if row is None:
+        return {"summary": "", "summarized_upto": 0}
+
+    return dict(row)
+
+
+def save_context_state(conversation_id: str, summary: str, summarized_upto: int):
+    """
+    Store a conversation's running history summary.
+
+    Args:
+        conversation_id: Conversation identifier
+        summary: Summary of messages before `summarized_upto`
+        summarized_upto: Index of the first message not covered by the summary
+    """
+    get_connection().execute(
+        "INSERT INTO conversation_context (conversation_id, summary, summarized_upto) "
+        "VALUES (?, ?, ?) "
+        "ON CONFLICT(conversation_id) DO UPDATE SET summary = excluded.summary, "
+        "summarized_upto = excluded.summarized_upto",
+        (conversation_id, summary, summarized_upto)
+    )
+
+
+def get_aggregate(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a materialized aggregate.
+
+    Args:
+        name: Aggregate name
+
+    Returns:
+        The stored aggregate state, or None if it has never been built
+    """
+    row = get_connection().execute(
+        "SELECT data FROM aggregates WHERE name = ?", (name,)
+    ).fetchone()
+
+    if row is None:
+        return None
+
+    return json.loads(row["data"])
+
+
+def update_aggregate(
+    name: str,
+    apply: Callable[[Optional[Dict[str, Any]], str, int, Dict[str, Any]], Dict[str, Any]],
+    batch_size: int = 200
+) -> int:
+    """
+    Feed messages an aggregate has not seen yet into it.
+
+    Conversations with unseen messages are processed `batch_size` at a
+    time, streaming their messages. Each batch loads the state, applies
+    the messages and saves the state and progress in one transaction, so
+    memory stays bounded and concurrent updaters never count a message twice.
+
+    Args:
+        name: Aggregate name
+        apply: Function (state, conversation_id, seq, message) -> new state;
+            state is None before the first message
+        batch_size: Conversations per transaction
+
+    Returns:
+        Number of messages applied
+    """
+    conn = get_connection()
+    applied = 0
+
+    while True:
+        with _transaction(conn):
+            pending = conn.execute(
+                "SELECT c.id, c.message_count, COALESCE(p.processed_upto, 0) AS processed_upto "
+                "FROM conversations c "
+                "LEFT JOIN aggregate_progress p ON p.name = ? AND p.conversation_id = c.id "
+                "WHERE c.message_count > COALESCE(p.processed_upto, 0) "
+                "LIMIT ?",
+                (name, batch_size)
+            ).fetchall()
+            if not pending:
+                return applied
+
+            row = conn.execute("SELECT data FROM aggregates WHERE name = ?", (name,)).fetchone()
+            state = json.loads(row["data"]) if row is not None else None
+
+            for conversation in pending:
+                cursor = conn.execute(
+                    "SELECT seq, data FROM messages "
+                    "WHERE conversation_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                    (conversation["id"], conversation["processed_upto"], conversation["message_count"])
+                )
+                for message in cursor:
+                    state = apply(state, conversation["id"], message["seq"], _decode_message(message["data"]))
+                    applied += 1
+
+            conn.execute(
+                "INSERT INTO aggregates (name, data) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET data = excluded.data",
+                (name, json.dumps(state, separators=(",", ":")))
+            )
+            conn.executemany(
+                "INSERT INTO aggregate_progress (name, conversation_id, processed_upto) "
+                "VALUES (?, ?, ?) "
+                "ON CONFLICT(name, conversation_id) DO UPDATE SET processed_upto = excluded.processed_upto",
+                [(name, conversation["id"], conversation["message_count"]) for conversation in pending]
+            )
+
+
+def compact_messages(batch_size: int = 500) -> Dict[str, int]:
+    """
+    Re-encode every stored message with the current codec.
+
+    Rows written by earlier versions (plain JSON with Stage 2 texts
+    inline) are split and compressed like new ones. Runs in batches of
+    `batch_size` rows, one transaction each.
+
+    Returns:
+        Dict with 'messages' rewritten and total 'bytes_before' and 'bytes_after'
+    """
+    conn = get_connection()
+    stats = {"messages": 0, "bytes_before": 0, "bytes_after": 0}
+    position = ("", -1)
+
+    while True:
+        with _transaction(conn):
+            rows = conn.execute(
+                "SELECT conversation_id, seq, data, details FROM messages "
+                "WHERE (conversation_id, seq) > (?, ?) ORDER BY conversation_id, seq LIMIT ?",
+                (*position, batch_size)
+            ).fetchall()
+            if not rows:
+                return stats
+
+            for row in rows:
+                data, details = _encode_message(_decode_message(row["data"], row["details"]))
+                conn.execute(
+                    "UPDATE messages SET data = ?, details = ? WHERE conversation_id = ? AND seq = ?",
+                    (data, details, row["conversation_id"], row["seq"])
+                )
+                stats["messages"] += 1
+                stats["bytes_before"] += _size(row["data"]) + _size(row["details"])
+                stats["bytes_after"] += _size(data) + _size(details)
+            position = (rows[-1]["conversation_id"], rows[-1]["seq"])
+
+
+def _size(value: Optional[Union[str, bytes]]) -> int:
+    """Stored size of a data or details value in bytes."""
+    if value is None:
+        return 0
+    return len(value.encode()) if isinstance(value, str) else len(value)
+
+
+def reset_aggregate(name: str):
+    """Drop a materialized aggregate so the next update rebuilds it from scratch."""
+    conn = get_connection()
+    with _transaction(conn):
+        conn.execute("DELETE FROM aggregates WHERE name = ?", (name,))
+        conn.execute("DELETE FROM aggregate_progress WHERE name = ?", (name,))
+
+
+def _job_row(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "conversation_id": row["conversation_id"],
+        "request": json.loads(row["request"]),
+        "checkpoint": json.loads(row["checkpoint"]),
+    }
+
+
+def enqueue_job(job_id: str, conversation_id: str, request: Dict[str, Any]):
+    """
+    Add a council job to the queue.
+
+    The job's checkpoint starts with the conversation's current
+    'message_count', read in the same transaction, so the turn's messages
+    go right after the ones present when it was queued.
+
+    Args:
+        job_id: Job identifier
+        conversation_id: Conversation the job answers in
+        request: The original request (content, council and chairman models)
+
+    Raises:
+        ValueError: If the conversation does not exist
+        ConflictError: If the conversation already has a queued or running job
+    """
+    conn = get_connection()
+
+    with _transaction(conn):
+        conversation = conn.execute(
+            "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        if conversation is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+        active = conn.execute(
+            "SELECT id FROM council_jobs WHERE conversation_id = ? AND status IN (?, ?)",
+            (conversation_id, *ACTIVE_JOB_STATES)
+        ).fetchone()
+        if active is not None:
+            raise ConflictError(f"Conversation {conversation_id} already has job {active['id']}")
+
+        conn.execute(
+            "INSERT INTO council_jobs (id, conversation_id, request, checkpoint, updated_at, status) "
+            "VALUES (?, ?, ?, ?, ?, 'queued')",
+            (
+                job_id,
+                conversation_id,
+                json.dumps(request, separators=(",", ":")),
+                json.dumps({"message_count": conversation["message_count"]}, separators=(",", ":")),
+                datetime.utcnow().isoformat(),
+            )
+        )
+
+
+def claim_job(worker: str, lease_seconds: float, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Take the oldest claimable job off the queue.
+
+    A job is claimable while queued, or while running under a lease that
+    has expired (its worker stopped renewing it). The select and update
+    run in one immediate transaction, so each job goes to one worker.
+
+    Args:
+        worker: Claiming worker's ID
+        lease_seconds: How long the claim lasts without renewal
+        job_id: Only claim this job
+
+    Returns:
+        Dict with 'id', 'conversation_id', 'request', 'checkpoint' and
+        'last_event_id' (highest stored event ID), or None if nothing
+        was claimable
+    """
+    conn = get_connection()
+    now = time.time()
+    query = (
+        "SELECT * FROM council_jobs "
+        "WHERE (status = 'queued' OR (status = 'running' AND lease_until < ?))"
+    )
+    params: List[Any] = [now]
+    if job_id is not None:
+        query += " AND id = ?"
+        params.append(job_id)
+    query += " ORDER BY updated_at LIMIT 1"
+
+    with _transaction(conn):
+        row = conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+
+        conn.execute(
+            "UPDATE council_jobs SET status = 'running', worker = ?, lease_until = ? WHERE id = ?",
+            (worker, now + lease_seconds, row["id"])
+        )
+        last_event_id = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM job_events WHERE job_id = ?", (row["id"],)
+        ).fetchone()[0]
+
+    job = _job_row(row)
+    job["last_event_id"] = last_event_id
+    return job
+
+
+def save_job_checkpoint(job_id: str, worker: str, checkpoint: Dict[str, Any], lease_seconds: float):
+    """
+    Store a running job's checkpoint and extend its lease.
+
+    Args:
+        job_id: Job identifier
+        worker: ID of the worker running the job
+        checkpoint: Results of the stages finished so far
+        lease_seconds: New lease length from now
+
+    Raises:
+        ConflictError: If `worker` no longer holds the job
+    """
+    cursor = get_connection().execute(
+        "UPDATE council_jobs SET checkpoint = ?, lease_until = ?, updated_at = ? "
+        "WHERE id = ? AND worker = ? AND status = 'running'",
+        (
+            json.dumps(checkpoint, separators=(",", ":")),
+            time.time() + lease_seconds,
+            datetime.utcnow().isoformat(),
+            job_id,
+            worker,
+        )
+    )
+    if cursor.rowcount == 0:
+        raise ConflictError(f"Worker {worker} no longer holds job {job_id}")
+
+
+def renew_job_leases(worker: str, job_ids: List[str], lease_seconds: float) -> List[str]:
+    """
+    Extend the leases of a worker's running jobs.
+
+    Args:
+        worker: Worker ID
+        job_ids: Jobs the worker is running
+        lease_seconds: New lease length from now
+
+    Returns:
+        IDs of the jobs the worker no longer holds
+    """
+    conn = get_connection()
+    lease_until = time.time() + lease_seconds
+    lost = []
+
+    with _transaction(conn):
+        for job_id in job_ids:
+            cursor = conn.execute(
+                "UPDATE council_jobs SET lease_until = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (lease_until, job_id, worker)
+            )
+            if cursor.rowcount == 0:
+                lost.append(job_id)
+
+    return lost
+
+
+def release_job(job_id: str, worker: str, checkpoint: Dict[str, Any]):
+    """
+    Put a running job back on the queue for any worker to resume.
+
+    Raises:
+        ConflictError: If `worker` no longer holds the job
+    """
+    cursor = get_connection().execute(
+        "UPDATE council_jobs SET status = 'queued', worker = NULL, lease_until = 0, "
+        "checkpoint = ?, updated_at = ? "
+        "WHERE id = ? AND worker = ? AND status = 'running'",
+        (json.dumps(checkpoint, separators=(",", ":")), datetime.utcnow().isoformat(), job_id, worker)
+    )
+    if cursor.rowcount == 0:
+        raise ConflictError(f"Worker {worker} no longer holds job {job_id}")
+
+
+def finish_job(job_id: str, worker: str, status: str):
+    """
+    Mark a job finished ('complete' or 'error') and drop its checkpoint.
+
+    Its events stay readable until purge_finished_jobs removes them.
+
+    Raises:
+        ConflictError: If `worker` no longer holds the job
+    """
+    cursor = get_connection().execute(
+        "UPDATE council_jobs SET status = ?, checkpoint = '{}', finished_at = ? "
+        "WHERE id = ? AND worker = ? AND status = 'running'",
+        (status, time.time(), job_id, worker)
+    )
+    if cursor.rowcount == 0:
+        raise ConflictError(f"Worker {worker} no longer holds job {job_id}")
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a job's status.
+
+    Returns:
+        Dict with 'id', 'conversation_id', 'status', 'worker' and
+        'last_event_id', or None if not found
+    """
+    row = get_connection().execute(
+        "SELECT id, conversation_id, status, worker, "
+        "(SELECT COALESCE(MAX(id), 0) FROM job_events WHERE job_id = council_jobs.id) AS last_event_id "
+        "FROM council_jobs WHERE id = ?",
+        (job_id,)
+    ).fetchone()
+
+    if row is None:
+        return None
+
+    return dict(row)
+
+
+def add_job_event(job_id: str, event_id: int, event: Dict[str, Any]):
+    """Store one event published by a job."""
+    get_connection().execute(
+        "INSERT OR IGNORE INTO job_events (job_id, id, event) VALUES (?, ?, ?)",
+        (job_id, event_id, json.dumps(event, separators=(",", ":")))
+    )
+
+
+def get_job_events(job_id: str, after: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Load a job's stored events after event ID `after`.
+
+    Returns:
+        List of (event ID, event) tuples in order
+    """
+    rows = get_connection().execute(
+        "SELECT id, event FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+        (job_id, after)
+    ).fetchall()
+
+    return [(row["id"], json.loads(row["event"])) for row in rows]
+
+
+def purge_finished_jobs(finished_before: float) -> int:
+    """
+    Delete jobs (and their events) that finished before a time.
+
+    Args:
+        finished_before: Unix timestamp
+
+    Returns:
+        Number of jobs deleted
+    """
+    conn = get_connection()
+
+    with _transaction(conn):
+        conn.execute(
+            "DELETE FROM job_events WHERE job_id IN "
+            "(SELECT id FROM council_jobs WHERE finished_at < ?)",
+            (finished_before,)
+        )
+        cursor = conn.execute(
+            "DELETE FROM council_jobs WHERE finished_at < ?", (finished_before,)
+        )
+
+    return cursor.rowcount
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Conversation storage maintenance")
+    parser.add_argument("command", choices=["compact"],
+                        help="compact: re-encode all messages with STORAGE_CODEC and reclaim space")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        stats = compact_messages()
+        get_connection().execute("VACUUM")
+        print(
+            f"Re-encoded {stats['messages']} messages with {_codec()}: "
+            f"{stats['bytes_before']:,} -> {stats['bytes_after']:,} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
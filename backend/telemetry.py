@@ -0,0 +1,235 @@
+"""Latency instrumentation for council turns and provider calls.
+
+Three outputs share the same measurements:
+
+- Prometheus metrics (see metrics.py), served on /metrics: stage wall
+  time, provider network time, queue time, time to first token, request
+  outcomes and token counts.
+- Per-turn timings, stored with each assistant message: wall time per
+  stage and one record per provider call (queue, network, TTFT, tokens
+  and cost; see pricing.py).
+- OpenTelemetry spans, when OTEL_ENABLED is set and opentelemetry-api is
+  installed; exporters are configured the standard way (e.g. running
+  under opentelemetry-instrument).
+
+The current turn and stage are tracked in context variables, so provider
+calls made from tasks spawned inside a stage are attributed to it.
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Iterator, Callable
+from .metrics import REGISTRY
+from .pricing import model_cost
+from .config import OTEL_ENABLED
+
+try:
+    from opentelemetry import trace
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+_tracer = trace.get_tracer("llm-council") if OTEL_ENABLED and OTEL_AVAILABLE else None
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "llm_council_stage_seconds", "Wall time of each council stage", ["stage"]
+)
+TURN_SECONDS = REGISTRY.histogram(
+    "llm_council_turn_seconds", "Wall time of a full council turn"
+)
+PROVIDER_SECONDS = REGISTRY.histogram(
+    "llm_council_provider_request_seconds",
+    "Provider request time once a slot is held (network and generation)",
+    ["provider", "model", "outcome"]
+)
+QUEUE_SECONDS = REGISTRY.histogram(
+    "llm_council_provider_queue_seconds",
+    "Time waiting for a provider slot (concurrency and rate limits)",
+    ["provider"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0)
+)
+TTFT_SECONDS = REGISTRY.histogram(
+    "llm_council_provider_ttft_seconds", "Time to first streamed token", ["provider", "model"]
+)
+REQUESTS = REGISTRY.counter(
+    "llm_council_provider_requests_total", "Provider request attempts by outcome", ["provider", "outcome"]
+)
+TOKENS = REGISTRY.counter(
+    "llm_council_provider_tokens_total",
+    "Prompt and completion tokens (estimated when the provider reports no usage)",
+    ["provider", "model", "kind"]
+)
+COST = REGISTRY.counter(
+    "llm_council_provider_cost_dollars_total",
+    "Cost of provider calls in USD (models listed in MODEL_PRICING)",
+    ["provider", "model"]
+)
+
+_turn: ContextVar[Optional[Dict[str, Any]]] = ContextVar("council_turn", default=None)
+_stage: ContextVar[Optional[str]] = ContextVar("council_stage", default=None)
+
+
+def start_turn() -> Dict[str, Any]:
+    """Start collecting timings for a council turn in the current context."""
+    timings = {"stages": {}, "calls": [], "started": time.monotonic()}
+    _turn.set(timings)
+    return timings
+
+
+def finish_turn(timings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Close a turn and return its timings in storable form.
+
+    Returns:
+        Dict with 'total' seconds, 'stages' (stage -> seconds) and 'calls'
+        (one record per provider call)
+    """
+    total = time.monotonic() - timings["started"]
+    TURN_SECONDS.observe(total)
+    return {
+        "total": round(total, 3),
+        "stages": dict(timings["stages"]),
+        "calls": list(timings["calls"]),
+    }
+
+
+@contextmanager
+def _otel_span(name: str, **attributes: Any) -> Iterator[None]:
+    if _tracer is None:
+        yield
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes):
+        yield
+
+
+@contextmanager
+def stage_span(stage: str) -> Iterator[None]:
+    """Time a council stage and attribute provider calls inside it to the stage."""
+    token = _stage.set(stage)
+    start = time.monotonic()
+    try:
+        with _otel_span(f"council.{stage}", stage=stage):
+            yield
+    finally:
+        elapsed = time.monotonic() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _turn.get()
+        if timings is not None:
+            timings["stages"][stage] = round(elapsed, 3)
+        _stage.reset(token)
+
+
+def timed_stage(stage: str) -> Callable:
+    """Decorator running an async council stage function inside stage_span."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with stage_span(stage):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProviderCall:
+    """Timing of one provider request attempt.
+
+    Created when the request is issued; `acquired` marks when the
+    scheduler slot was granted (end of queueing) and `first_token` the
+    first streamed delta. `price_factor` scales the list price (e.g. for
+    discounted batch APIs).
+    """
+
+    def __init__(self, provider: str, model: str, price_factor: float = 1.0):
+        self.provider = provider
+        self.model = model
+        self.price_factor = price_factor
+        self.created = time.monotonic()
+        self.started: Optional[float] = None
+        self.ttft: Optional[float] = None
+        self._span = (
+            _tracer.start_span("provider.query", attributes={"provider": provider, "model": model})
+            if _tracer is not None else None
+        )
+
+    def acquired(self):
+        self.started = time.monotonic()
+
+    def first_token(self):
+        if self.ttft is None and self.started is not None:
+            self.ttft = time.monotonic() - self.started
+
+    def finish(
+        self,
+        outcome: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        usage: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Record the attempt's outcome ('ok', 'error', 'cancelled') and usage.
+
+        Args:
+            outcome: How the attempt ended
+            prompt_tokens: Estimated prompt tokens
+            completion_tokens: Estimated completion tokens
+            usage: Usage reported by the provider, which takes precedence
+                over the estimates
+        """
+        estimated = not usage
+        if usage:
+            prompt_tokens = usage["prompt_tokens"]
+            completion_tokens = usage["completion_tokens"]
+        cost = usage.get("cost") if usage else None
+        if cost is None:
+            cost = model_cost(self.model, prompt_tokens, completion_tokens)
+            if cost is not None:
+                cost *= self.price_factor
+
+        now = time.monotonic()
+        started = self.started if self.started is not None else now
+        queue = started - self.created
+        network = now - started
+
+        QUEUE_SECONDS.observe(queue, provider=self.provider)
+        PROVIDER_SECONDS.observe(network, provider=self.provider, model=self.model, outcome=outcome)
+        REQUESTS.inc(provider=self.provider, outcome=outcome)
+        if self.ttft is not None:
+            TTFT_SECONDS.observe(self.ttft, provider=self.provider, model=self.model)
+        if prompt_tokens:
+            TOKENS.inc(prompt_tokens, provider=self.provider, model=self.model, kind="prompt")
+        if completion_tokens:
+            TOKENS.inc(completion_tokens, provider=self.provider, model=self.model, kind="completion")
+        if cost:
+            COST.inc(cost, provider=self.provider, model=self.model)
+
+        timings = _turn.get()
+        if timings is not None:
+            timings["calls"].append({
+                "stage": _stage.get(),
+                "provider": self.provider,
+                "model": self.model,
+                "outcome": outcome,
+                "queue": round(queue, 3),
+                "network": round(network, 3),
+                "ttft": round(self.ttft, 3) if self.ttft is not None else None,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "estimated": estimated,
+                "cost": round(cost, 6) if cost is not None else None,
+            })
+
+        if self._span is not None:
+            self._span.set_attribute("outcome", outcome)
+            self._span.set_attribute("queue_seconds", queue)
+            self._span.set_attribute("prompt_tokens", prompt_tokens)
+            self._span.set_attribute("completion_tokens", completion_tokens)
+            if self.ttft is not None:
+                self._span.set_attribute("ttft_seconds", self.ttft)
+            self._span.end()
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text format."""
+    return REGISTRY.render()
@@ -0,0 +1,147 @@
+"""
+Multi-process storage consistency check (no lost updates).
+
+Several processes share one database, the way uvicorn workers do, and
+hammer the same conversation:
+
+- append: every process appends messages with add_user_message; all of
+  them must be stored, at distinct consecutive positions.
+- cas: every process does read-modify-write cycles (load the
+  conversation, add a message, save it with the version it read) and
+  retries on ConflictError; every message must survive. With --no-cas
+  the saves ignore the version, showing the lost updates CAS prevents.
+- queue: jobs are queued and every process claims and finishes jobs
+  until the queue is empty; each job must be claimed exactly once.
+
+Exits non-zero if any check fails.
+
+Usage:
+    uv run python -m benchmarks.concurrent_writers [--processes 8] [--writes 50] [--jobs 200] [--no-cas]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+
+def _storage(db_path: str):
+    """Import storage in a worker process, pointed at the shared database."""
+    os.environ["STORAGE_DB_PATH"] = db_path
+    from backend import storage
+    return storage
+
+
+def append_worker(db_path: str, conversation_id: str, worker: int, writes: int, _cas: bool) -> int:
+    storage = _storage(db_path)
+    for i in range(writes):
+        storage.add_user_message(conversation_id, f"append {worker}-{i}")
+    return 0
+
+
+def cas_worker(db_path: str, conversation_id: str, worker: int, writes: int, cas: bool) -> int:
+    """Read-modify-write loop; returns the number of CAS retries."""
+    storage = _storage(db_path)
+    retries = 0
+    for i in range(writes):
+        while True:
+            conversation = storage.get_conversation(conversation_id)
+            conversation["messages"].append({"role": "user", "content": f"cas {worker}-{i}"})
+            try:
+                storage.save_conversation(conversation, conversation["version"] if cas else None)
+                break
+            except storage.ConflictError:
+                retries += 1
+    return retries
+
+
+def queue_worker(db_path: str, _conversation_id: str, worker: int, _writes: int, _cas: bool) -> list:
+    """Claim and finish jobs until none are left; returns the claimed IDs."""
+    storage = _storage(db_path)
+    worker_id = f"bench-worker-{worker}"
+    claimed = []
+    while True:
+        job = storage.claim_job(worker_id, lease_seconds=60)
+        if job is None:
+            return claimed
+        claimed.append(job["id"])
+        storage.finish_job(job["id"], worker_id, "complete")
+
+
+def run_workers(target, db_path: str, conversation_id: str, processes: int, writes: int, cas: bool):
+    """Run `target` in `processes` processes at once; returns results and wall time."""
+    args = [(db_path, conversation_id, worker, writes, cas) for worker in range(processes)]
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        results = pool.starmap(target, args)
+    return results, time.perf_counter() - start
+
+
+def check_messages(storage, conversation_id: str, prefix: str, expected: int) -> bool:
+    conversation = storage.get_conversation(conversation_id)
+    contents = [m["content"] for m in conversation["messages"] if m["content"].startswith(prefix)]
+    stored = conversation["messages"]
+    duplicates = sum(count - 1 for count in Counter(contents).values())
+    print(f"  stored {len(contents)}/{expected} messages, {duplicates} duplicates, "
+          f"message_count={len(stored)}, version={conversation['version']}")
+    return len(contents) == expected and duplicates == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=50, help="writes per process")
+    parser.add_argument("--jobs", type=int, default=200, help="jobs for the queue check")
+    parser.add_argument("--no-cas", action="store_true", help="save without the version check")
+    parser.add_argument("--db", default=None, help="database path (default: a scratch file)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="council-bench-"), "bench.db")
+    storage = _storage(db_path)
+    expected = args.processes * args.writes
+    ok = True
+
+    print(f"append: {args.processes} processes x {args.writes} appends")
+    conversation_id = str(uuid.uuid4())
+    storage.create_conversation(conversation_id)
+    _, elapsed = run_workers(append_worker, db_path, conversation_id, args.processes, args.writes, True)
+    passed = check_messages(storage, conversation_id, "append ", expected)
+    print(f"  {expected / elapsed:.0f} writes/s -> {'ok' if passed else 'FAILED'}")
+    ok = ok and passed
+
+    mode = "without CAS" if args.no_cas else "with CAS"
+    print(f"cas: {args.processes} processes x {args.writes} read-modify-writes ({mode})")
+    conversation_id = str(uuid.uuid4())
+    storage.create_conversation(conversation_id)
+    retries, elapsed = run_workers(cas_worker, db_path, conversation_id, args.processes, args.writes, not args.no_cas)
+    passed = check_messages(storage, conversation_id, "cas ", expected)
+    print(f"  {sum(retries)} retries, {expected / elapsed:.0f} writes/s -> {'ok' if passed else 'FAILED (lost updates)'}")
+    ok = ok and passed
+
+    print(f"queue: {args.jobs} jobs claimed by {args.processes} processes")
+    job_ids = set()
+    for _ in range(args.jobs):
+        # One active job per conversation, so each job gets its own
+        conversation_id = str(uuid.uuid4())
+        storage.create_conversation(conversation_id)
+        job_id = str(uuid.uuid4())
+        storage.enqueue_job(job_id, conversation_id, {"content": "bench"})
+        job_ids.add(job_id)
+    claimed, elapsed = run_workers(queue_worker, db_path, "", args.processes, 0, True)
+    counts = Counter(job_id for ids in claimed for job_id in ids)
+    missing = len(job_ids - set(counts))
+    duplicated = sum(1 for count in counts.values() if count > 1)
+    passed = missing == 0 and duplicated == 0
+    print(f"  per process: {sorted(len(ids) for ids in claimed)}, "
+          f"{missing} never claimed, {duplicated} claimed twice -> {'ok' if passed else 'FAILED'}")
+    ok = ok and passed
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Per-call client overhead of GoogleProvider against a local stub.
+
+The Gemini async client is replaced with an in-process stub that answers
+instantly, so the timings isolate the work done around each request.
+The previous approach is compared with the current provider:
+
+- legacy: new GenerativeModel + start_chat + send_message_async per call
+- current: GoogleProvider._query (GenerativeModel + generate_content_async
+  with the whole contents list, no chat session)
+
+Both build a GenerativeModel per call; that is cheap because the SDK
+shares one async client per process. The two are timed in alternating
+rounds and the median round is reported, so drift (CPU frequency, other
+load) affects both alike.
+
+Usage:
+    uv run python -m benchmarks.gemini_overhead [--rounds 15] [--calls 500] [--turns 6]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "bench-key")
+
+import google.generativeai as genai  # noqa: E402
+from google.generativeai import client as genai_client  # noqa: E402
+from google.ai import generativelanguage as glm  # noqa: E402
+
+from backend.providers.google_provider import GoogleProvider  # noqa: E402
+
+
+class StubAsyncClient:
+    """Stands in for GenerativeServiceAsyncClient; answers immediately."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, request, **kwargs):
+        self.calls += 1
+        return glm.GenerateContentResponse(candidates=[{
+            "content": {"role": "model", "parts": [{"text": "stub answer"}]},
+            "finish_reason": "STOP",
+        }])
+
+
+def make_messages(turns: int):
+    """A multi-turn conversation ending in a user message."""
+    messages = [{"role": "system", "content": "You are a council member."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " * 50})
+        messages.append({"role": "assistant", "content": f"answer {i} " * 50})
+    messages.append({"role": "user", "content": "final question"})
+    return messages
+
+
+async def legacy_query(model: str, messages):
+    """The per-call approach GoogleProvider used before handle caching."""
+    gemini_model = genai.GenerativeModel(model)
+
+    history = []
+    system_instruction = None
+    for msg in messages:
+        if msg["role"] == "system":
+            system_instruction = msg["content"]
+        elif msg["role"] == "user":
+            history.append({"role": "user", "parts": [msg["content"]]})
+        else:
+            history.append({"role": "model", "parts": [msg["content"]]})
+    if system_instruction and history:
+        history[0]["parts"][0] = f"{system_instruction}\n\n{history[0]['parts'][0]}"
+
+    chat = gemini_model.start_chat(history=history[:-1])
+    response = await chat.send_message_async(history[-1]["parts"][0])
+    return response.text
+
+
+async def timed_round(fn, calls: int) -> float:
+    """Seconds per call over one round of `calls` calls."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        await fn()
+    return (time.perf_counter() - start) / calls
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--calls", type=int, default=500, help="calls per round")
+    parser.add_argument("--turns", type=int, default=6, help="prior user/assistant turns")
+    args = parser.parse_args()
+
+    stub = StubAsyncClient()
+    genai_client.get_default_generative_async_client = lambda: stub
+
+    provider = GoogleProvider()
+    messages = make_messages(args.turns)
+    variants = {
+        "legacy": lambda: legacy_query("gemini-2.5-flash", messages),
+        "current": lambda: provider._query("google/gemini-2.5-flash", messages, 120.0),
+    }
+
+    # Warm up (imports, first client construction)
+    for fn in variants.values():
+        for _ in range(20):
+            await fn()
+
+    rounds = {label: [] for label in variants}
+    for _ in range(args.rounds):
+        for label, fn in variants.items():
+            rounds[label].append(await timed_round(fn, args.calls))
+
+    print(f"{args.rounds} rounds x {args.calls} calls, {args.turns} prior turns")
+    for label, times in rounds.items():
+        print(f"{label:<8} median {statistics.median(times) * 1e6:7.1f} us/call  "
+              f"(min {min(times) * 1e6:.1f}, max {max(times) * 1e6:.1f})")
+    legacy, current = (statistics.median(rounds[label]) for label in variants)
+    print(f"current / legacy: {current / legacy:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,301 @@
+"""
+Hedged request checks through the real provider query path.
+
+Two stub providers stand in for a direct API and OpenRouter: each
+answers quickly most of the time but occasionally stalls. Routing is
+pointed at the stubs and queries go through the same code the council
+uses (_query_provider and _query_provider_stream), checking that:
+
+- latency: with hedging on, p95 latency is below the unhedged p95, the
+  hedge rate stays within the cap and every losing attempt is cancelled
+- failover: a primary that fails outright is answered by the backup,
+  for both plain and streaming queries
+- streaming: only the winner's deltas reach on_delta (no duplicated or
+  interleaved text from the loser) and the losing stream is cancelled
+- modes: plain and streamed calls through one hedger get separate hedge
+  delays, the streamed one (time to first delta) below the plain one
+  (time to the whole response)
+
+Exits non-zero if any check fails.
+
+Usage:
+    uv run python -m benchmarks.hedging [--calls 500] [--slow-rate 0.1]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+from backend import providers
+from backend.providers.base import BaseLLMProvider
+from backend.providers.hedging import Hedger
+from backend.providers.scheduler import ProviderScheduler
+
+MODEL = "stub/model"
+CHUNKS = 5
+
+
+class StubProvider(BaseLLMProvider):
+    """Provider that sleeps for a sampled latency instead of calling an API."""
+
+    def __init__(self, name: str, fast: float, slow: float, slow_rate: float,
+                 rng: random.Random, fail: bool = False):
+        self.name = name
+        self.fast = fast
+        self.slow = slow
+        self.slow_rate = slow_rate
+        self.rng = rng
+        self.fail = fail
+        # Generous limits: the checks are about hedging, not queueing
+        self._scheduler = ProviderScheduler(name, max_concurrency=1000, max_retries=0)
+        self.started = 0
+        self.finished = 0
+        self.cancelled = 0
+
+    def supports_model(self, model: str) -> bool:
+        return True
+
+    def _latency(self) -> float:
+        if self.rng.random() < self.slow_rate:
+            return self.slow
+        return self.rng.uniform(self.fast * 0.5, self.fast * 1.5)
+
+    async def _query(self, model: str, messages: List[Dict[str, str]], timeout: float) -> Dict[str, Any]:
+        self.started += 1
+        try:
+            await asyncio.sleep(self._latency())
+            if not self.fail:
+                # A plain call also waits while the whole answer is generated
+                await asyncio.sleep(CHUNKS * self.fast / 2)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        self.finished += 1
+        if self.fail:
+            raise RuntimeError("stub failure")
+        return {'content': f"{self.name} answer", 'reasoning_details': None}
+
+    async def _query_stream(self, model: str, messages: List[Dict[str, str]], timeout: float) -> AsyncIterator[str]:
+        self.started += 1
+        try:
+            await asyncio.sleep(self._latency())
+            if self.fail:
+                self.finished += 1
+                raise RuntimeError("stub failure")
+            for i in range(CHUNKS):
+                yield f"{self.name}:{i} "
+                await asyncio.sleep(self.fast / 2)
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+        self.finished += 1
+
+
+def use_providers(primary: StubProvider, backup: StubProvider, hedger: Hedger, hedging: bool = True):
+    """Route every model to `primary`, with `backup` as its hedge route."""
+    providers._detect_provider = lambda model: primary
+    providers._detect_hedge_provider = lambda model, provider: backup
+    providers.HEDGING_ENABLED = hedging
+    providers._hedger = hedger
+
+
+def make_hedger(args) -> Hedger:
+    return Hedger(
+        percentile=0.9,
+        min_delay=args.fast,
+        default_delay=args.fast * 3,
+        max_rate=args.max_rate,
+    )
+
+
+def make_stubs(args, seed: int, fail: bool = False):
+    rng = random.Random(seed)
+    primary = StubProvider("direct", args.fast, args.slow, args.slow_rate, rng, fail=fail)
+    backup = StubProvider("openrouter", args.fast * 1.2, args.slow, args.slow_rate, rng)
+    return primary, backup
+
+
+async def settle(*stubs: StubProvider):
+    """Let cancelled attempts unwind before their counters are read."""
+    for _ in range(10):
+        if all(stub.started == stub.finished + stub.cancelled for stub in stubs):
+            return
+        await asyncio.sleep(0.01)
+
+
+async def run_workload(calls: int, concurrency: int, stream: bool) -> List[Dict[str, Any]]:
+    """Issue `calls` queries with bounded concurrency; return per-call results."""
+    semaphore = asyncio.Semaphore(concurrency)
+    messages = [{"role": "user", "content": "ping"}]
+    results: List[Dict[str, Any]] = []
+
+    async def one(index: int):
+        deltas: List[str] = []
+        cache_key = f"bench-{index}"
+        async with semaphore:
+            start = time.monotonic()
+            if stream:
+                response = await providers._query_provider_stream(
+                    MODEL, messages, deltas.append, 120.0, cache_key
+                )
+            else:
+                response = await providers._query_provider(MODEL, messages, 120.0, cache_key)
+            results.append({
+                "latency": time.monotonic() - start,
+                "response": response,
+                "deltas": deltas,
+            })
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return results
+
+
+def percentile(latencies: List[float], p: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def summarize(latencies: List[float]) -> str:
+    return (
+        f"p50={statistics.median(latencies) * 1000:.0f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:.0f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:.0f}ms max={max(latencies) * 1000:.0f}ms"
+    )
+
+
+def check_streams(results: List[Dict[str, Any]]) -> int:
+    """Count calls whose deltas are not exactly one provider's full stream."""
+    bad = 0
+    for result in results:
+        response = result["response"]
+        deltas = result["deltas"]
+        sources = {delta.split(":")[0] for delta in deltas}
+        if (response is None or "".join(deltas) != response["content"]
+                or len(sources) != 1 or len(deltas) != CHUNKS):
+            bad += 1
+    return bad
+
+
+async def check_latency(args) -> bool:
+    print(f"latency: {args.calls} calls, {args.slow_rate:.0%} stalled, concurrency {args.concurrency}")
+    latencies = {}
+    for label, hedging in (("no hedging", False), ("hedging", True)):
+        primary, backup = make_stubs(args, args.seed)
+        hedger = make_hedger(args)
+        use_providers(primary, backup, hedger, hedging)
+        results = await run_workload(args.calls, args.concurrency, stream=False)
+        await settle(primary, backup)
+        latencies[label] = [result["latency"] for result in results]
+        stats = hedger.stats()
+        print(f"  {label:<11} {summarize(latencies[label])} hedge_rate={stats['hedge_rate']:.3f} "
+              f"hedge_wins={stats['hedge_wins']} losers_cancelled={primary.cancelled + backup.cancelled}")
+
+    ok = True
+    unhedged, hedged = (percentile(latencies[label], 0.95) for label in ("no hedging", "hedging"))
+    passed = hedged < unhedged
+    print(f"  p95 {hedged * 1000:.0f}ms < {unhedged * 1000:.0f}ms -> {'ok' if passed else 'FAILED'}")
+    ok = ok and passed
+
+    # The cap lets one hedge start before any calls have been counted
+    passed = stats["hedges"] <= args.max_rate * stats["calls"] + 1
+    print(f"  {stats['hedges']} hedges within max_rate={args.max_rate} -> {'ok' if passed else 'FAILED'}")
+    ok = ok and passed
+
+    answered = primary.finished + backup.finished
+    leaked = primary.started + backup.started - answered - primary.cancelled - backup.cancelled
+    # Every attempt that reached a provider, other than the winner, was cancelled
+    losers = primary.started + backup.started - args.calls
+    passed = answered == args.calls and leaked == 0 and primary.cancelled + backup.cancelled == losers
+    print(f"  {answered}/{args.calls} answered once, {primary.cancelled + backup.cancelled}/{losers} losers "
+          f"cancelled, {leaked} still running -> {'ok' if passed else 'FAILED'}")
+    return ok and passed
+
+
+async def check_failover(args) -> bool:
+    print("failover: primary fails outright")
+    ok = True
+    for stream in (False, True):
+        primary, backup = make_stubs(args, args.seed, fail=True)
+        primary.slow_rate = backup.slow_rate = 0.0
+        hedger = make_hedger(args)
+        use_providers(primary, backup, hedger)
+        [result] = await run_workload(1, 1, stream)
+        response = result["response"]
+        passed = (
+            response is not None
+            and response["content"].startswith(backup.name)
+            and hedger.failovers == 1
+            and (not stream or "".join(result["deltas"]) == response["content"])
+        )
+        label = "stream" if stream else "query"
+        content = response["content"].strip() if response else None
+        print(f"  {label:<6} answered {content!r}, failovers={hedger.failovers} -> {'ok' if passed else 'FAILED'}")
+        ok = ok and passed
+    return ok
+
+
+async def check_streaming(args) -> bool:
+    print(f"streaming: {args.calls} calls")
+    primary, backup = make_stubs(args, args.seed + 1)
+    # Short stalls, so the losing stream would still be emitting while
+    # the winner streams unless it is cut off
+    primary.slow = backup.slow = args.fast * 3
+    hedger = make_hedger(args)
+    use_providers(primary, backup, hedger)
+    results = await run_workload(args.calls, args.concurrency, stream=True)
+    await settle(primary, backup)
+    stats = hedger.stats()
+    bad = check_streams(results)
+    leaked = primary.started + backup.started - primary.finished - backup.finished \
+        - primary.cancelled - backup.cancelled
+    # A backup cancelled before it reached the provider never started
+    losers = primary.started + backup.started - args.calls
+    passed = bad == 0 and leaked == 0 and primary.cancelled + backup.cancelled == losers
+    print(f"  {stats['hedges']} hedges ({stats['hedge_wins']} won by the backup), "
+          f"{bad} calls with duplicated or mixed deltas, "
+          f"{primary.cancelled + backup.cancelled}/{losers} losing streams cancelled, {leaked} still running "
+          f"-> {'ok' if passed else 'FAILED'}")
+    return passed
+
+
+async def check_modes(args) -> bool:
+    print(f"modes: {args.calls} plain and {args.calls} streamed calls through one hedger")
+    primary, backup = make_stubs(args, args.seed + 2)
+    hedger = make_hedger(args)
+    use_providers(primary, backup, hedger)
+    await run_workload(args.calls, args.concurrency, stream=False)
+    await run_workload(args.calls, args.concurrency, stream=True)
+    await settle(primary, backup)
+    delays = hedger.stats()["delays"].get(primary.name, {})
+    passed = (
+        isinstance(delays, dict) and "full" in delays and "stream" in delays
+        and delays["stream"] < delays["full"]
+    )
+    print(f"  {primary.name} hedge delays {delays} -> {'ok' if passed else 'FAILED'}")
+    return passed
+
+
+async def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--fast", type=float, default=0.05, help="typical latency (s)")
+    parser.add_argument("--slow", type=float, default=1.0, help="stall latency (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.1, help="fraction of stalled calls")
+    parser.add_argument("--max-rate", type=float, default=0.15, help="hedge rate cap")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ok = await check_latency(args)
+    ok = await check_failover(args) and ok
+    ok = await check_streaming(args) and ok
+    ok = await check_modes(args) and ok
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,361 @@
+"""
+Load test of the full council pipeline against simulated providers.
+
+Runs `--requests` council turns with `--concurrency` in flight, either by
+calling run_full_council directly (--target council) or through the
+FastAPI endpoints served by an in-process uvicorn (--target api, with
+--stream for the SSE endpoint). Providers are simulated: --backend mock
+uses the in-process mock provider; stub-openrouter / stub-openai start
+benchmarks.stub_server in a subprocess and go through the real provider
+HTTP clients. A ticker coroutine measures event-loop lag meanwhile.
+
+Reports p50/p95/p99 turn latency, throughput and loop lag. The --max-*
+and --min-throughput options turn it into a regression gate (exit status
+1 when a limit is exceeded).
+
+Usage:
+    uv run python -m benchmarks.load_test [--target council|api] [--stream] \\
+        [--backend mock|stub-openrouter|stub-openai] [--concurrency 16] [--requests 200] \\
+        [--max-p95 5.0] [--min-throughput 2.0] [--max-lag-p99 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+TICK = 0.01
+
+# Stub-backed runs: OpenAI-routed council plus OpenRouter for the rest
+STUB_OPENAI_MODELS = "openai/gpt-4o,openai/gpt-4o-mini,openai/o1-mini"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def configure_environment(args: argparse.Namespace) -> Optional[subprocess.Popen]:
+    """Point the backend at a scratch database and the simulated providers.
+
+    Must run before anything from `backend` is imported (config is read
+    at import time). Returns the stub server process, if one was started.
+    """
+    tmpdir = tempfile.mkdtemp(prefix="council-load-")
+    os.environ["STORAGE_DB_PATH"] = os.path.join(tmpdir, "load.db")
+    # Every prompt is distinct, but make sure nothing is served from cache
+    os.environ["CACHE_ENABLED"] = "false"
+
+    mock_settings = {
+        "MOCK_LATENCY": args.latency,
+        "MOCK_LATENCY_SIGMA": args.sigma,
+        "MOCK_TOKENS_PER_SECOND": args.tokens_per_second,
+        "MOCK_RESPONSE_TOKENS": args.response_tokens,
+        "MOCK_ERROR_RATE": args.error_rate,
+        "MOCK_SEED": args.seed,
+    }
+    for name, value in mock_settings.items():
+        if value is not None:
+            os.environ[name] = str(value)
+    if args.provider_concurrency is not None:
+        for prefix in ("MOCK", "OPENAI", "OPENROUTER"):
+            os.environ[f"{prefix}_MAX_CONCURRENCY"] = str(args.provider_concurrency)
+
+    if args.backend == "mock":
+        os.environ["LLM_MODE"] = "mock"
+        return None
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_server", "--port", str(port)],
+        env=os.environ.copy()
+    )
+    base = f"http://127.0.0.1:{port}"
+    os.environ["OPENROUTER_API_KEY"] = "stub"
+    os.environ["OPENROUTER_API_URL"] = f"{base}/api/v1/chat/completions"
+    if args.backend == "stub-openai":
+        os.environ["LLM_MODE"] = "direct"
+        os.environ["OPENAI_API_KEY"] = "stub"
+        os.environ["OPENAI_BASE_URL"] = f"{base}/v1"
+        os.environ["COUNCIL_MODELS"] = STUB_OPENAI_MODELS
+        os.environ["CHAIRMAN_MODEL"] = "openai/gpt-4o"
+    else:
+        os.environ["LLM_MODE"] = "openrouter"
+
+    wait_for_port(port)
+    return server
+
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"stub server did not start on port {port}")
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def ticker(lags: list, stop: asyncio.Event):
+    """Record how late each tick fires."""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def drive(
+    turn: Callable[[int], Awaitable[Dict[str, Any]]],
+    requests: int,
+    concurrency: int
+) -> Dict[str, Any]:
+    """Run `requests` turns with `concurrency` workers (closed loop)."""
+    samples: List[Dict[str, Any]] = []
+    counter = iter(range(requests))
+    lags: list = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+
+    async def worker():
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                sample = await turn(index)
+            except Exception as e:
+                sample = {"error": str(e)}
+            sample["latency"] = time.perf_counter() - start
+            samples.append(sample)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick_task
+    return {"samples": samples, "elapsed": elapsed, "lags": lags}
+
+
+def summarize(run: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    """Latency percentiles, throughput and loop lag for a run."""
+    samples = run["samples"]
+    ok = [s for s in samples if "error" not in s]
+    latencies = sorted(s["latency"] for s in ok)
+    lags = sorted(run["lags"])
+
+    result = {
+        "target": args.target + ("/stream" if args.stream else ""),
+        "backend": args.backend,
+        "concurrency": args.concurrency,
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "elapsed": round(run["elapsed"], 3),
+        "throughput": round(len(ok) / run["elapsed"], 3) if run["elapsed"] else 0.0,
+        "latency": {
+            "p50": round(percentile(latencies, 0.50), 4),
+            "p95": round(percentile(latencies, 0.95), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+            "max": round(latencies[-1], 4) if latencies else 0.0,
+        },
+        "loop_lag": {
+            "p50": round(percentile(lags, 0.50), 4),
+            "p99": round(percentile(lags, 0.99), 4),
+            "max": round(lags[-1], 4) if lags else 0.0,
+        },
+    }
+
+    ttfts = sorted(s["ttft"] for s in ok if s.get("ttft") is not None)
+    if ttfts:
+        result["ttft"] = {"p50": round(percentile(ttfts, 0.50), 4), "p95": round(percentile(ttfts, 0.95), 4)}
+
+    stages: Dict[str, List[float]] = {}
+    for sample in ok:
+        for stage, seconds in (sample.get("stages") or {}).items():
+            stages.setdefault(stage, []).append(seconds)
+    if stages:
+        result["stages_p50"] = {
+            stage: round(percentile(sorted(values), 0.50), 4) for stage, values in stages.items()
+        }
+
+    return result
+
+
+def check_gates(result: Dict[str, Any], args: argparse.Namespace) -> List[str]:
+    """Limits exceeded by the run, as messages."""
+    failures = []
+    if args.max_p95 is not None and result["latency"]["p95"] > args.max_p95:
+        failures.append(f"p95 latency {result['latency']['p95']:.3f}s > {args.max_p95}s")
+    if args.max_p99 is not None and result["latency"]["p99"] > args.max_p99:
+        failures.append(f"p99 latency {result['latency']['p99']:.3f}s > {args.max_p99}s")
+    if args.min_throughput is not None and result["throughput"] < args.min_throughput:
+        failures.append(f"throughput {result['throughput']:.2f}/s < {args.min_throughput}/s")
+    if args.max_lag_p99 is not None and result["loop_lag"]["p99"] > args.max_lag_p99:
+        failures.append(f"loop lag p99 {result['loop_lag']['p99']:.3f}s > {args.max_lag_p99}s")
+    if args.max_error_rate is not None and result["requests"]:
+        rate = result["errors"] / result["requests"]
+        if rate > args.max_error_rate:
+            failures.append(f"error rate {rate:.3f} > {args.max_error_rate}")
+    return failures
+
+
+def report(result: Dict[str, Any]):
+    """Print a run summary."""
+    latency, lag = result["latency"], result["loop_lag"]
+    print(
+        f"{result['target']} via {result['backend']}: {result['requests']} turns "
+        f"({result['errors']} errors) at concurrency {result['concurrency']} "
+        f"in {result['elapsed']:.2f}s -> {result['throughput']:.2f} turns/s"
+    )
+    print(
+        f"  latency p50={latency['p50'] * 1000:.0f}ms p95={latency['p95'] * 1000:.0f}ms "
+        f"p99={latency['p99'] * 1000:.0f}ms max={latency['max'] * 1000:.0f}ms"
+    )
+    if "ttft" in result:
+        print(f"  first delta p50={result['ttft']['p50'] * 1000:.0f}ms p95={result['ttft']['p95'] * 1000:.0f}ms")
+    if "stages_p50" in result:
+        stages = " ".join(f"{stage}={seconds * 1000:.0f}ms" for stage, seconds in result["stages_p50"].items())
+        print(f"  stage p50 {stages}")
+    print(f"  loop lag p50={lag['p50'] * 1000:.2f}ms p99={lag['p99'] * 1000:.2f}ms max={lag['max'] * 1000:.2f}ms")
+
+
+async def run_council_target(args: argparse.Namespace) -> Dict[str, Any]:
+    """Drive run_full_council directly."""
+    from backend.council import run_full_council
+    from backend.providers import close_providers
+
+    async def turn(index: int) -> Dict[str, Any]:
+        _, _, stage3, metadata = await run_full_council(f"Load test question {index}: how do councils decide?")
+        sample = {"stages": metadata.get("timings", {}).get("stages")}
+        if stage3.get("model") == "error":
+            sample["error"] = stage3.get("response")
+        return sample
+
+    try:
+        return await drive(turn, args.requests, args.concurrency)
+    finally:
+        await close_providers()
+
+
+async def run_api_target(args: argparse.Namespace) -> Dict[str, Any]:
+    """Drive the FastAPI endpoints over HTTP on an in-process uvicorn."""
+    import httpx
+    import uvicorn
+    from backend.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.01)
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=600.0, limits=limits)
+
+    async def turn(index: int) -> Dict[str, Any]:
+        response = await client.post("/api/conversations", json={})
+        response.raise_for_status()
+        conversation_id = response.json()["id"]
+        content = {"content": f"Load test question {index}: how do councils decide?"}
+
+        if not args.stream:
+            response = await client.post(f"/api/conversations/{conversation_id}/message", json=content)
+            response.raise_for_status()
+            data = response.json()
+            sample = {"stages": data["metadata"].get("timings", {}).get("stages")}
+            if data["stage3"].get("model") == "error":
+                sample["error"] = data["stage3"].get("response")
+            return sample
+
+        start = time.perf_counter()
+        sample: Dict[str, Any] = {"ttft": None}
+        async with client.stream(
+            "POST", f"/api/conversations/{conversation_id}/message/stream", json=content
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[6:])
+                if event["type"] == "stage1_delta" and sample["ttft"] is None:
+                    sample["ttft"] = time.perf_counter() - start
+                elif event["type"] == "error":
+                    sample["error"] = event.get("message")
+                elif event["type"] == "stage3_complete" and event["data"].get("model") == "error":
+                    sample["error"] = event["data"].get("response")
+                elif event["type"] == "complete":
+                    sample["stages"] = (event.get("timings") or {}).get("stages")
+        return sample
+
+    try:
+        return await drive(turn, args.requests, args.concurrency)
+    finally:
+        await client.aclose()
+        server.should_exit = True
+        await server_task
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--target", choices=("council", "api"), default="council")
+    parser.add_argument("--stream", action="store_true", help="use the SSE endpoint (api target)")
+    parser.add_argument("--backend", choices=("mock", "stub-openrouter", "stub-openai"), default="mock")
+    parser.add_argument("--concurrency", type=int, default=16, help="turns in flight")
+    parser.add_argument("--requests", type=int, default=200, help="total turns")
+    parser.add_argument("--latency", type=float, default=None, help="median time to first token (s)")
+    parser.add_argument("--sigma", type=float, default=None, help="lognormal latency spread")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--response-tokens", type=int, default=None)
+    parser.add_argument("--error-rate", type=float, default=None, help="fraction of failed provider calls")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--provider-concurrency", type=int, default=None,
+                        help="override the per-provider concurrency limit")
+    parser.add_argument("--max-p95", type=float, default=None, help="fail if p95 latency exceeds (s)")
+    parser.add_argument("--max-p99", type=float, default=None, help="fail if p99 latency exceeds (s)")
+    parser.add_argument("--min-throughput", type=float, default=None, help="fail below turns/s")
+    parser.add_argument("--max-lag-p99", type=float, default=None, help="fail if p99 loop lag exceeds (s)")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="fail above this fraction of failed turns")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    stub_server = configure_environment(args)
+    try:
+        runner = run_api_target if args.target == "api" else run_council_target
+        run = asyncio.run(runner(args))
+    finally:
+        if stub_server is not None:
+            stub_server.terminate()
+            stub_server.wait()
+
+    result = summarize(run, args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        report(result)
+
+    failures = check_gates(result, args)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
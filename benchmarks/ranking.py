@@ -0,0 +1,63 @@
+"""
+Bulk re-scoring throughput of the ranking engine on synthetic turns.
+
+Builds stored-style assistant messages (Stage 1 answers plus Stage 2
+reviews with parsed rankings) and re-scores them with each aggregation
+method, reporting turns per second. `--reparse` drops the stored
+`parsed_ranking` to include text parsing in the measurement.
+
+Usage:
+    uv run python -m benchmarks.ranking [--turns 5000] [--models 5] [--reparse]
+"""
+
+import argparse
+import random
+import time
+
+from backend.ranking import METHODS, rescore_messages
+
+
+def make_turns(count: int, models: int, reparse: bool, rng: random.Random):
+    """Synthetic assistant messages with `models` members judging each other."""
+    names = [f"provider/model-{i}" for i in range(models)]
+    labels = [f"Response {chr(65 + i)}" for i in range(models)]
+    turns = []
+    for _ in range(count):
+        stage2 = []
+        for judge in names:
+            order = labels[:]
+            rng.shuffle(order)
+            text = "Review text... " * 40 + "\nFINAL RANKING:\n" + "\n".join(
+                f"{i}. {label}" for i, label in enumerate(order, start=1)
+            )
+            result = {"model": judge, "ranking": text}
+            if not reparse:
+                result["parsed_ranking"] = order
+            stage2.append(result)
+        turns.append({
+            "role": "assistant",
+            "stage1": [{"model": name, "response": "..."} for name in names],
+            "stage2": stage2,
+            "stage3": {"model": names[0], "response": "..."},
+        })
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=5000)
+    parser.add_argument("--models", type=int, default=5)
+    parser.add_argument("--reparse", action="store_true", help="parse review text instead of parsed_ranking")
+    args = parser.parse_args()
+
+    turns = make_turns(args.turns, args.models, args.reparse, random.Random(7))
+
+    for method in METHODS:
+        start = time.perf_counter()
+        scored = sum(1 for _ in rescore_messages(turns, method))
+        elapsed = time.perf_counter() - start
+        print(f"{method:<9} {scored / elapsed:10.0f} turns/s  ({scored} turns, {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
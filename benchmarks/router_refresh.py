@@ -0,0 +1,81 @@
+"""
+Check that routing statistics file each turn under its question's category.
+
+In live use the user message is stored, the router refreshes (consuming
+it) while choosing the council, and the assistant message is only
+applied by a later refresh. This stores a code question and its answer
+that way, and also in one go, and checks both runs file the turn under
+"code" (not "general"). It also stores questions that never get an
+answer (failed or cancelled turns) and checks that they leave nothing
+behind in the stored state.
+
+Exits non-zero if a check fails.
+
+Usage:
+    uv run python -m benchmarks.router_refresh
+"""
+
+import os
+import sys
+import tempfile
+
+# Point storage at a scratch database before the backend reads its config
+_tmpdir = tempfile.mkdtemp(prefix="council-bench-")
+os.environ.setdefault("STORAGE_DB_PATH", os.path.join(_tmpdir, "bench.db"))
+
+from backend import storage  # noqa: E402
+from backend.router import make_apply  # noqa: E402
+
+QUESTION = "fix this python function bug"
+MODELS = ["provider/model-a", "provider/model-b", "provider/model-c"]
+UNANSWERED = 20
+
+
+def add_answer(conversation_id: str):
+    stage1 = [{"model": model, "response": f"Answer from {model}"} for model in MODELS]
+    labels = [f"Response {chr(65 + i)}" for i in range(len(MODELS))]
+    stage2 = [
+        {"model": model, "ranking": "FINAL RANKING:", "parsed_ranking": labels}
+        for model in MODELS
+    ]
+    storage.add_assistant_message(conversation_id, stage1, stage2, {"model": MODELS[0], "response": "Final"})
+
+
+def categories(name: str) -> list:
+    state = storage.get_aggregate(name) or {}
+    return sorted(state.get("categories", {}))
+
+
+def main():
+    failed = False
+
+    for name, split in (("router-split", True), ("router-single", False)):
+        conversation_id = f"bench-{name}"
+        storage.create_conversation(conversation_id)
+        storage.add_user_message(conversation_id, QUESTION)
+        if split:
+            storage.update_aggregate(name, make_apply())
+        add_answer(conversation_id)
+        storage.update_aggregate(name, make_apply())
+
+        found = categories(name)
+        ok = found == ["all", "code"]
+        failed = failed or not ok
+        print(f"{'split' if split else 'single'} refresh: categories {found} -> {'ok' if ok else 'FAILED'}")
+
+    name = "router-unanswered"
+    for i in range(UNANSWERED):
+        conversation_id = f"bench-{name}-{i}"
+        storage.create_conversation(conversation_id)
+        storage.add_user_message(conversation_id, QUESTION)
+    storage.update_aggregate(name, make_apply())
+    state = storage.get_aggregate(name) or {}
+    ok = set(state) == {"categories"}
+    failed = failed or not ok
+    print(f"{UNANSWERED} unanswered questions: state keys {sorted(state)} -> {'ok' if ok else 'FAILED'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
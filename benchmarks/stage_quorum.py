@@ -0,0 +1,113 @@
+"""
+Stage 1 + Stage 2 latency with one slow council member, with and without a quorum.
+
+Runs the council's first two stages (stage1_collect_responses and
+stage2_collect_rankings) against the mock provider, with one of the
+council members much slower than the rest. With a strict barrier every
+turn waits for the slow member twice; with STAGE1_QUORUM set to leave it
+out, Stage 1 drops it and it must not be asked to review in Stage 2
+either, or the turn still waits for it.
+
+Exits non-zero unless the quorum run's p95 is below the barrier run's
+and no dropped member was asked to review.
+
+Usage:
+    uv run python -m benchmarks.stage_quorum [--turns 60] [--members 4] [--slow 1.0]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Every prompt is distinct, but make sure nothing is served from cache
+os.environ["CACHE_ENABLED"] = "false"
+
+from backend import council, providers  # noqa: E402
+from backend.providers.mock_provider import MockProvider  # noqa: E402
+from backend.providers.scheduler import ProviderScheduler  # noqa: E402
+
+
+class CountingMockProvider(MockProvider):
+    """Mock provider that records which models were asked to review."""
+
+    def __init__(self, latency: float, reviewers: List[str]):
+        super().__init__(latency=latency, latency_sigma=0.2, tokens_per_second=0, response_tokens=50)
+        # Generous limits: the check is about stage barriers, not queueing
+        self._scheduler = ProviderScheduler("mock", max_concurrency=1000, max_retries=0)
+        self.reviewers = reviewers
+
+    async def _query(self, model, messages, timeout):
+        if "FINAL RANKING" in messages[-1]["content"]:
+            self.reviewers.append(model)
+        return await super()._query(model, messages, timeout)
+
+
+def percentile(latencies: List[float], p: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def run(models: List[str], slow_model: str, args, quorum: Optional[int]) -> Dict[str, object]:
+    """Run `args.turns` turns of Stage 1 + Stage 2; return latencies and reviewers."""
+    reviewers: List[str] = []
+    fast = CountingMockProvider(args.latency, reviewers)
+    slow = CountingMockProvider(args.slow, reviewers)
+    providers._detect_provider = lambda model: slow if model == slow_model else fast
+    council.STAGE1_QUORUM = quorum
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+
+    async def turn(index: int):
+        async with semaphore:
+            start = time.monotonic()
+            stage1 = await council.stage1_collect_responses(f"Question {index}?", models)
+            await council.stage2_collect_rankings(f"Question {index}?", stage1, models)
+            latencies.append(time.monotonic() - start)
+
+    await asyncio.gather(*(turn(i) for i in range(args.turns)))
+    return {"latencies": latencies, "reviewers": reviewers}
+
+
+async def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--members", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="typical member latency (s)")
+    parser.add_argument("--slow", type=float, default=1.0, help="slow member latency (s)")
+    args = parser.parse_args()
+
+    models = [f"provider/model-{i}" for i in range(args.members)]
+    slow_model = models[-1]
+    print(f"{args.turns} turns, {args.members} members, {slow_model} ~{args.slow:.2f}s, "
+          f"others ~{args.latency:.2f}s")
+
+    results = {}
+    for label, quorum in (("barrier", None), (f"quorum {args.members - 1}", args.members - 1)):
+        result = await run(models, slow_model, args, quorum)
+        results[label] = result
+        latencies = result["latencies"]
+        slow_reviews = result["reviewers"].count(slow_model)
+        print(f"  {label:<9} p50={statistics.median(latencies) * 1000:.0f}ms "
+              f"p95={percentile(latencies, 0.95) * 1000:.0f}ms "
+              f"reviews by {slow_model}: {slow_reviews}/{args.turns}")
+
+    barrier, quorum_run = results.values()
+    barrier_p95 = percentile(barrier["latencies"], 0.95)
+    quorum_p95 = percentile(quorum_run["latencies"], 0.95)
+    ok = quorum_p95 < barrier_p95 / 2
+    print(f"  p95 {quorum_p95 * 1000:.0f}ms < half of {barrier_p95 * 1000:.0f}ms -> {'ok' if ok else 'FAILED'}")
+
+    slow_reviews = quorum_run["reviewers"].count(slow_model)
+    passed = slow_reviews == 0
+    print(f"  dropped member asked to review {slow_reviews} times -> {'ok' if passed else 'FAILED'}")
+    return ok and passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
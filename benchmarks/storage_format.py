@@ -0,0 +1,188 @@
+"""
+Bytes on disk and load time of stored conversations, per storage format.
+
+Writes the same synthetic conversations (council turns with Stage 1
+answers, Stage 2 critiques and a Stage 3 synthesis) in each format:
+
+- files: the original one-JSON-file-per-conversation format (indent=2)
+- sqlite-inline: one plain JSON row per message with the Stage 2 texts
+  inline (the database format before compaction)
+- json / zlib / zstd: the current format with STORAGE_CODEC set to each
+  codec (zstd only if the zstandard package is installed)
+
+and reports total size, the mean time to load a conversation both as
+the API returns it (Stage 2 texts deferred) and in full, and the mean
+size of the API response.
+
+Usage:
+    uv run python -m benchmarks.storage_format [--conversations 200] [--turns 5]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+
+COMMON = (
+    "the of and to a in is that for it as with was on be by this are or an "
+    "which from at not but have has more can will model answer response each "
+    "however because while also clear accurate missing detail example point "
+    "argument evidence better weaker strong overall ranking stronger reasoning"
+).split()
+
+
+def make_words(rng: random.Random, vocabulary: List[str], count: int) -> str:
+    """Prose-like filler: Zipf-weighted words with some punctuation."""
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+    words = rng.choices(vocabulary, weights, k=count)
+    for i in range(12, count, rng.randint(10, 20)):
+        words[i] += rng.choice([".", ",", ".", ";"])
+    return " ".join(words)
+
+
+def make_conversation(rng: random.Random, vocabulary: List[str], index: int, turns: int) -> Dict[str, Any]:
+    models = [f"provider/model-{i}" for i in range(4)]
+    labels = [f"Response {chr(65 + i)}" for i in range(len(models))]
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": make_words(rng, vocabulary, 30)})
+        stage2 = []
+        for model in models:
+            order = rng.sample(labels, len(labels))
+            ranking = "\n".join(f"{i}. {label}" for i, label in enumerate(order, start=1))
+            stage2.append({
+                "model": model,
+                "ranking": f"{make_words(rng, vocabulary, 350)}\n\nFINAL RANKING:\n{ranking}",
+                "parsed_ranking": order,
+            })
+        messages.append({
+            "role": "assistant",
+            "stage1": [{"model": model, "response": make_words(rng, vocabulary, 400)} for model in models],
+            "stage2": stage2,
+            "stage3": {"model": models[0], "response": make_words(rng, vocabulary, 400)},
+        })
+    return {
+        "id": f"bench-{index}",
+        "created_at": f"2024-01-01T00:00:{index:06d}",
+        "title": f"Conversation {index}",
+        "messages": messages,
+    }
+
+
+def make_conversations(count: int, turns: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = COMMON + [
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(3000)
+    ]
+    return [make_conversation(rng, vocabulary, i, turns) for i in range(count)]
+
+
+def timed(func, items) -> float:
+    """Mean seconds per call of func(item)."""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def measure_files(directory: str, conversations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    paths = []
+    for conversation in conversations:
+        path = os.path.join(directory, f"{conversation['id']}.json")
+        with open(path, "w") as f:
+            json.dump(conversation, f, indent=2)
+        paths.append(path)
+
+    def load(path):
+        with open(path) as f:
+            return json.load(f)
+
+    load_time = timed(load, paths)
+    return {
+        "bytes": sum(os.path.getsize(path) for path in paths),
+        "load": load_time,
+        "load_full": load_time,
+        "response": sum(len(json.dumps(load(path))) for path in paths) / len(paths),
+    }
+
+
+def measure_database(db_path: str, codec: str, conversations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Runs in its own process, so the backend reads this format's settings."""
+    os.environ["STORAGE_DB_PATH"] = db_path
+    os.environ["STORAGE_CODEC"] = "json" if codec == "sqlite-inline" else codec
+    from backend import storage
+
+    conn = storage.get_connection()
+    for conversation in conversations:
+        if codec == "sqlite-inline":
+            with storage._transaction(conn):
+                conn.execute(
+                    "INSERT INTO conversations (id, created_at, title, message_count) VALUES (?, ?, ?, ?)",
+                    (conversation["id"], conversation["created_at"], conversation["title"],
+                     len(conversation["messages"]))
+                )
+                conn.executemany(
+                    "INSERT INTO messages (conversation_id, seq, data) VALUES (?, ?, ?)",
+                    [
+                        (conversation["id"], seq, json.dumps(message, separators=(",", ":")))
+                        for seq, message in enumerate(conversation["messages"])
+                    ]
+                )
+        else:
+            storage.save_conversation(conversation)
+
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    ids = [conversation["id"] for conversation in conversations]
+    return {
+        "bytes": os.path.getsize(db_path),
+        "load": timed(storage.get_conversation, ids),
+        "load_full": timed(lambda cid: storage.get_conversation(cid, stage2_text=True), ids),
+        "response": sum(len(json.dumps(storage.get_conversation(cid))) for cid in ids) / len(ids),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    conversations = make_conversations(args.conversations, args.turns, args.seed)
+    directory = tempfile.mkdtemp(prefix="council-bench-")
+
+    codecs = ["sqlite-inline", "json", "zlib"]
+    try:
+        import zstandard  # noqa: F401
+        codecs.append("zstd")
+    except ImportError:
+        print("zstandard not installed; skipping zstd\n")
+
+    results = {"files": measure_files(directory, conversations)}
+    context = multiprocessing.get_context("spawn")
+    for codec in codecs:
+        with context.Pool(1) as pool:
+            results[codec] = pool.apply(
+                measure_database,
+                (os.path.join(directory, f"{codec}.db"), codec, conversations)
+            )
+
+    baseline = results["files"]
+    print(f"{args.conversations} conversations x {args.turns} turns\n")
+    print(f"{'format':<15} {'size':>12} {'vs files':>9} {'load':>10} {'load full':>10} {'response':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<15} {result['bytes'] / 1e6:>10.2f}MB {result['bytes'] / baseline['bytes']:>8.0%} "
+            f"{result['load'] * 1000:>8.2f}ms {result['load_full'] * 1000:>8.2f}ms "
+            f"{result['response'] / 1e3:>8.1f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Event-loop jitter while conversations are being written.
+
+A ticker coroutine stands in for an SSE stream: it wakes every TICK
+seconds and records how late it woke up. Meanwhile several writers save
+large assistant messages, first through the blocking storage module
+called directly from coroutines (the old handler behaviour), then
+through async_storage. Flat jitter means SSE events keep flowing while
+writes are in progress.
+
+Usage:
+    uv run python -m benchmarks.storage_jitter [--writers 8] [--writes 25]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Point storage at a scratch database before the backend reads its config
+_tmpdir = tempfile.mkdtemp(prefix="council-bench-")
+os.environ.setdefault("STORAGE_DB_PATH", os.path.join(_tmpdir, "bench.db"))
+
+from backend import storage, async_storage  # noqa: E402
+
+TICK = 0.01
+
+
+def make_stages(size: int):
+    """Build stage payloads roughly the size of a real council turn."""
+    text = "lorem ipsum dolor sit amet " * (size // 27)
+    stage1 = [{"model": f"model-{i}", "response": text} for i in range(4)]
+    stage2 = [
+        {"model": f"model-{i}", "ranking": text, "parsed_ranking": ["Response A"]}
+        for i in range(4)
+    ]
+    stage3 = {"model": "chairman", "response": text}
+    return stage1, stage2, stage3
+
+
+async def ticker(lags: list, stop: asyncio.Event):
+    """Record how late each tick fires."""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def blocking_writer(conversation_id: str, writes: int, stages):
+    """Old behaviour: synchronous storage calls inside a coroutine."""
+    for _ in range(writes):
+        storage.add_assistant_message(conversation_id, *stages)
+        await asyncio.sleep(0)
+
+
+async def async_writer(conversation_id: str, writes: int, stages):
+    """New behaviour: storage calls offloaded to the storage thread pool."""
+    for _ in range(writes):
+        await async_storage.add_assistant_message(conversation_id, *stages)
+
+
+async def measure(writer, writers: int, writes: int, stages) -> dict:
+    """Run writers alongside the ticker and summarize tick lag."""
+    lags: list = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+
+    ids = []
+    for _ in range(writers):
+        conversation_id = f"bench-{time.perf_counter_ns()}"
+        storage.create_conversation(conversation_id)
+        ids.append(conversation_id)
+
+    start = time.perf_counter()
+    if writer is not None:
+        await asyncio.gather(*(writer(cid, writes, stages) for cid in ids))
+    else:
+        await asyncio.sleep(1.0)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick_task
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "elapsed_s": elapsed,
+        "ticks": len(lags_ms),
+        "p50_ms": statistics.median(lags_ms),
+        "p99_ms": lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))],
+        "max_ms": lags_ms[-1],
+    }
+
+
+def report(name: str, result: dict):
+    """Print one result row."""
+    print(
+        f"{name:<12} elapsed={result['elapsed_s']:.2f}s ticks={result['ticks']:<5} "
+        f"jitter p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+        f"max={result['max_ms']:.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--writers", type=int, default=8, help="concurrent writers")
+    parser.add_argument("--writes", type=int, default=25, help="messages per writer")
+    parser.add_argument("--size", type=int, default=200_000, help="approx bytes per stage text")
+    args = parser.parse_args()
+
+    stages = make_stages(args.size)
+    print(f"db: {os.environ['STORAGE_DB_PATH']}")
+
+    report("idle", await measure(None, 0, 0, stages))
+    report("blocking", await measure(blocking_writer, args.writers, args.writes, stages))
+    report("async", await measure(async_writer, args.writers, args.writes, stages))
+
+    async_storage.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""
+Local HTTP stub of the OpenAI / OpenRouter chat completions API.
+
+Answers POST /v1/chat/completions (OpenAI) and /api/v1/chat/completions
+(OpenRouter) with the mock provider's simulated latency, token rate and
+error rate, in both plain and streaming (SSE) form, including usage.
+Point the real providers at it to load-test the full HTTP path without
+API keys:
+
+    LLM_MODE=openrouter OPENROUTER_API_KEY=stub \\
+        OPENROUTER_API_URL=http://127.0.0.1:8900/api/v1/chat/completions ...
+    LLM_MODE=direct OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8900/v1 ...
+
+Usage:
+    uv run python -m benchmarks.stub_server [--port 8900] [--latency 0.5] [--error-rate 0.01]
+"""
+
+import argparse
+import json
+import time
+import uuid
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from backend.providers.mock_provider import MockProvider, MockProviderError
+
+
+def _chunk(completion_id: str, model: str, delta: Dict[str, Any], finish_reason=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _usage(usage: Dict[str, Any]) -> Dict[str, int]:
+    return {
+        "prompt_tokens": usage["prompt_tokens"],
+        "completion_tokens": usage["completion_tokens"],
+        "total_tokens": usage["prompt_tokens"] + usage["completion_tokens"],
+    }
+
+
+def _error(e: Exception) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"message": str(e), "code": MockProviderError.status_code}},
+        status_code=MockProviderError.status_code
+    )
+
+
+def create_app(provider: MockProvider) -> FastAPI:
+    """Stub API app answering with `provider`."""
+    app = FastAPI(title="Chat Completions Stub")
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        messages = body.get("messages", [])
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            try:
+                response = await provider._query(model, messages, timeout=600.0)
+            except MockProviderError as e:
+                return _error(e)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": response["content"]},
+                    "finish_reason": "stop",
+                }],
+                "usage": _usage(response["usage"]),
+            }
+
+        include_usage = (
+            (body.get("stream_options") or {}).get("include_usage")
+            or (body.get("usage") or {}).get("include")
+        )
+        deltas = provider._query_stream(model, messages, timeout=600.0)
+        try:
+            # Injected failures happen before the first delta, so they can
+            # still be reported as an HTTP error status
+            first = await deltas.__anext__()
+        except MockProviderError as e:
+            return _error(e)
+
+        async def events():
+            item = first
+            while True:
+                if isinstance(item, dict):
+                    yield _chunk(completion_id, model, {}, "stop")
+                    if include_usage:
+                        payload = {
+                            "id": completion_id,
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [],
+                            "usage": _usage(item),
+                        }
+                        yield f"data: {json.dumps(payload)}\n\n"
+                else:
+                    yield _chunk(completion_id, model, {"content": item})
+                try:
+                    item = await deltas.__anext__()
+                except StopAsyncIteration:
+                    break
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/api/v1/chat/completions", chat_completions, methods=["POST"])
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=None, help="median time to first token (s)")
+    parser.add_argument("--sigma", type=float, default=None, help="lognormal latency spread")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--response-tokens", type=int, default=None)
+    parser.add_argument("--error-rate", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    # Unset options fall back to the MOCK_* settings
+    overrides = {
+        "latency": args.latency,
+        "latency_sigma": args.sigma,
+        "tokens_per_second": args.tokens_per_second,
+        "response_tokens": args.response_tokens,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+    }
+    provider = MockProvider(**{k: v for k, v in overrides.items() if v is not None})
+
+    uvicorn.run(create_app(provider), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
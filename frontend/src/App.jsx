@@ -128,6 +128,25 @@ function App() {
             });
             break;
 
+          case 'stage1_delta':
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              const stage1 = [...(lastMsg.stage1 || [])];
+              const index = stage1.findIndex((r) => r.model === event.model);
+              if (index === -1) {
+                stage1.push({ model: event.model, response: event.delta });
+              } else {
+                stage1[index] = {
+                  ...stage1[index],
+                  response: stage1[index].response + event.delta,
+                };
+              }
+              lastMsg.stage1 = stage1;
+              return { ...prev, messages };
+            });
+            break;
+
           case 'stage1_complete':
             setCurrentConversation((prev) => {
               const messages = [...prev.messages];
@@ -138,6 +157,16 @@ function App() {
             });
             break;
 
+          case 'consensus_fast_path':
+            // Stage 1 answers agreed: peer review (and maybe the chairman) is skipped
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              lastMsg.consensus = event.data;
+              return { ...prev, messages };
+            });
+            break;
+
           case 'stage2_start':
             setCurrentConversation((prev) => {
               const messages = [...prev.messages];
@@ -167,6 +196,19 @@ function App() {
             });
             break;
 
+          case 'stage3_delta':
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              lastMsg.stage3 = {
+                model: event.model,
+                response: (lastMsg.stage3?.response || '') + event.delta,
+                consensus: lastMsg.consensus,
+              };
+              return { ...prev, messages };
+            });
+            break;
+
           case 'stage3_complete':
             setCurrentConversation((prev) => {
               const messages = [...prev.messages];
@@ -17,14 +17,25 @@ export const api = {
   },
 
   /**
-   * List all conversations.
+   * List conversations, newest first.
+   * @param {object} options - Optional pagination
+   * @param {number} options.limit - Page size (omit to list all)
+   * @param {string} options.cursor - Cursor returned with the previous page
+   * @returns {Promise<object[]>} Conversations; `nextCursor` is set on the array when more pages exist
    */
-  async listConversations() {
-    const response = await fetch(`${API_BASE}/api/conversations`);
+  async listConversations(options = {}) {
+    const params = new URLSearchParams();
+    if (options.limit) params.set('limit', options.limit);
+    if (options.cursor) params.set('cursor', options.cursor);
+    const query = params.toString() ? `?${params}` : '';
+
+    const response = await fetch(`${API_BASE}/api/conversations${query}`);
     if (!response.ok) {
       throw new Error('Failed to list conversations');
     }
-    return response.json();
+    const conversations = await response.json();
+    conversations.nextCursor = response.headers.get('X-Next-Cursor');
+    return conversations;
   },
 
   /**
@@ -57,6 +68,22 @@ export const api = {
     return response.json();
   },
 
+  /**
+   * Get the full Stage 2 evaluations of one assistant message.
+   * Conversations are loaded without the evaluation texts.
+   * @param {string} conversationId - The conversation ID
+   * @param {number} index - The message's position in the conversation
+   */
+  async getStage2(conversationId, index) {
+    const response = await fetch(
+      `${API_BASE}/api/conversations/${conversationId}/messages/${index}/stage2`
+    );
+    if (!response.ok) {
+      throw new Error('Failed to get evaluations');
+    }
+    return response.json();
+  },
+
   /**
    * Send a message in a conversation.
    * @param {string} conversationId - The conversation ID
@@ -88,6 +115,8 @@ export const api = {
 
   /**
    * Send a message and receive streaming updates.
+   * The council run continues on the server if the connection drops; the
+   * stream is resumed from the last received event.
    * @param {string} conversationId - The conversation ID
    * @param {string} content - The message content
    * @param {function} onEvent - Callback function for each event: (eventType, data) => void
@@ -116,27 +145,76 @@ export const api = {
       throw new Error('Failed to send message');
     }
 
-    const reader = response.body.getReader();
-    const decoder = new TextDecoder();
+    const jobId = response.headers.get('X-Job-Id');
+    const state = { lastEventId: 0, finished: false };
+    let attempts = 0;
+    let current = response;
 
     while (true) {
-      const { done, value } = await reader.read();
-      if (done) break;
-
-      const chunk = decoder.decode(value);
-      const lines = chunk.split('\n');
-
-      for (const line of lines) {
-        if (line.startsWith('data: ')) {
-          const data = line.slice(6);
-          try {
-            const event = JSON.parse(data);
-            onEvent(event.type, event);
-          } catch (e) {
-            console.error('Failed to parse SSE event:', e);
-          }
-        }
+      try {
+        await readEventStream(current, onEvent, state);
+      } catch (e) {
+        console.warn('Council stream interrupted:', e);
       }
+      if (state.finished || !jobId || attempts >= MAX_STREAM_RECONNECTS) break;
+
+      // Reconnect and replay everything after the last event received
+      attempts += 1;
+      await new Promise((resolve) => setTimeout(resolve, 1000 * attempts));
+      try {
+        current = await fetch(`${API_BASE}/api/jobs/${jobId}/events`, {
+          headers: { 'Last-Event-ID': String(state.lastEventId) },
+        });
+      } catch (e) {
+        continue;
+      }
+      if (!current.ok) break;
+    }
+
+    if (!state.finished) {
+      onEvent('error', { type: 'error', message: 'Lost connection to the council run' });
     }
   },
 };
+
+const MAX_STREAM_RECONNECTS = 5;
+
+/**
+ * Read Server-Sent Events from a response until it ends.
+ * @param {Response} response - Streaming response
+ * @param {function} onEvent - Callback function for each event: (eventType, data) => void
+ * @param {object} state - Tracks `lastEventId` and whether the run `finished`
+ */
+async function readEventStream(response, onEvent, state) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  // Token deltas are small and frequent, so an event can span reads;
+  // keep the trailing partial line until the rest of it arrives.
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+
+    for (const line of lines) {
+      if (line.startsWith('id: ')) {
+        state.lastEventId = Number(line.slice(4));
+      } else if (line.startsWith('data: ')) {
+        const data = line.slice(6);
+        try {
+          const event = JSON.parse(data);
+          if (event.type === 'complete' || event.type === 'error') {
+            state.finished = true;
+          }
+          onEvent(event.type, event);
+        } catch (e) {
+          console.error('Failed to parse SSE event:', e);
+        }
+      }
+    }
+  }
+}
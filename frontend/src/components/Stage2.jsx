@@ -14,13 +14,30 @@ function deAnonymizeText(text, labelToModel) {
   return result;
 }
 
-export default function Stage2({ rankings, labelToModel, aggregateRankings }) {
+export default function Stage2({ rankings, labelToModel, aggregateRankings, loadRankings }) {
   const [activeTab, setActiveTab] = useState(0);
+  // Saved turns come without the evaluation texts; they are fetched on expand
+  const [loadedRankings, setLoadedRankings] = useState(null);
+  const [isLoadingTexts, setIsLoadingTexts] = useState(false);
 
   if (!rankings || rankings.length === 0) {
     return null;
   }
 
+  const shownRankings = loadedRankings || rankings;
+  const textsMissing = shownRankings.some((rank) => rank.ranking === undefined);
+
+  const handleExpand = async () => {
+    setIsLoadingTexts(true);
+    try {
+      setLoadedRankings(await loadRankings());
+    } catch (error) {
+      console.error('Failed to load evaluations:', error);
+    } finally {
+      setIsLoadingTexts(false);
+    }
+  };
+
   return (
     <div className="stage stage2">
       <h3 className="stage-title">Stage 2: Peer Rankings</h3>
@@ -31,44 +48,56 @@ export default function Stage2({ rankings, labelToModel, aggregateRankings }) {
         Below, model names are shown in <strong>bold</strong> for readability, but the original evaluation used anonymous labels.
       </p>
 
-      <div className="tabs">
-        {rankings.map((rank, index) => (
-          <button
-            key={index}
-            className={`tab ${activeTab === index ? 'active' : ''}`}
-            onClick={() => setActiveTab(index)}
-          >
-            {rank.model.split('/')[1] || rank.model}
-          </button>
-        ))}
-      </div>
+      {textsMissing ? (
+        <button
+          className="tab"
+          onClick={handleExpand}
+          disabled={isLoadingTexts || !loadRankings}
+        >
+          {isLoadingTexts ? 'Loading evaluations...' : 'Show evaluations'}
+        </button>
+      ) : (
+        <>
+          <div className="tabs">
+            {shownRankings.map((rank, index) => (
+              <button
+                key={index}
+                className={`tab ${activeTab === index ? 'active' : ''}`}
+                onClick={() => setActiveTab(index)}
+              >
+                {rank.model.split('/')[1] || rank.model}
+              </button>
+            ))}
+          </div>
 
-      <div className="tab-content">
-        <div className="ranking-model">
-          {rankings[activeTab].model}
-        </div>
-        <div className="ranking-content markdown-content">
-          <ReactMarkdown>
-            {deAnonymizeText(rankings[activeTab].ranking, labelToModel)}
-          </ReactMarkdown>
-        </div>
+          <div className="tab-content">
+            <div className="ranking-model">
+              {shownRankings[activeTab].model}
+            </div>
+            <div className="ranking-content markdown-content">
+              <ReactMarkdown>
+                {deAnonymizeText(shownRankings[activeTab].ranking, labelToModel)}
+              </ReactMarkdown>
+            </div>
 
-        {rankings[activeTab].parsed_ranking &&
-         rankings[activeTab].parsed_ranking.length > 0 && (
-          <div className="parsed-ranking">
-            <strong>Extracted Ranking:</strong>
-            <ol>
-              {rankings[activeTab].parsed_ranking.map((label, i) => (
-                <li key={i}>
-                  {labelToModel && labelToModel[label]
-                    ? labelToModel[label].split('/')[1] || labelToModel[label]
-                    : label}
-                </li>
-              ))}
-            </ol>
+            {shownRankings[activeTab].parsed_ranking &&
+             shownRankings[activeTab].parsed_ranking.length > 0 && (
+              <div className="parsed-ranking">
+                <strong>Extracted Ranking:</strong>
+                <ol>
+                  {shownRankings[activeTab].parsed_ranking.map((label, i) => (
+                    <li key={i}>
+                      {labelToModel && labelToModel[label]
+                        ? labelToModel[label].split('/')[1] || labelToModel[label]
+                        : label}
+                    </li>
+                  ))}
+                </ol>
+              </div>
+            )}
           </div>
-        )}
-      </div>
+        </>
+      )}
 
       {aggregateRankings && aggregateRankings.length > 0 && (
         <div className="aggregate-rankings">
@@ -11,8 +11,14 @@ export default function Stage3({ finalResponse }) {
       <h3 className="stage-title">Stage 3: Final Council Answer</h3>
       <div className="final-response">
         <div className="chairman-label">
-          Chairman: {finalResponse.model.split('/')[1] || finalResponse.model}
+          {finalResponse.consensus?.skip_chairman ? 'Consensus answer' : 'Chairman'}: {finalResponse.model.split('/')[1] || finalResponse.model}
         </div>
+        {finalResponse.consensus && (
+          <div className="consensus-note">
+            Consensus fast-path: the council's answers agreed
+            ({Math.round(finalResponse.consensus.agreement * 100)}% similarity), so peer review was skipped.
+          </div>
+        )}
         <div className="final-text markdown-content">
           <ReactMarkdown>{finalResponse.response}</ReactMarkdown>
         </div>